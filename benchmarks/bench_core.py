@@ -0,0 +1,159 @@
+"""Time the core APIs against synthetic histories of several sizes.
+
+Each size gets a fresh database filled by jikan.core.seed. Operations run several times and
+report the median and fastest run. Save the JSON output of one version and pass it to
+--compare when running another to see the change per operation.
+
+    uv run python benchmarks/bench_core.py
+    uv run python benchmarks/bench_core.py --sizes 10000,100000,1000000 --json > before.json
+    uv run python benchmarks/bench_core.py --sizes 10000,100000,1000000 --compare before.json
+"""
+
+import argparse
+import io
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any
+
+import jikan.core.analytics as analytics_core
+import jikan.core.entry as entry_core
+import jikan.core.report as report_core
+import jikan.core.seed as seed_core
+import jikan.models
+from jikan.lib.export import CSV_TAG_SEPARATOR, write_csv
+from jikan.lib.report import ReportGroup
+from jikan.migrations import migrate
+from jikan.models import create_sqlite_engine
+
+
+def measure(run: Callable[[], Any], repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "runs": repeat,
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+    }
+
+
+def operations(
+    size: int, rng: random.Random, directory: Path
+) -> dict[str, tuple[Callable[[], Any], int]]:
+    """Operations to time and how often to run each, slow full scans fewer times."""
+    scans = 3
+
+    def start_stop() -> None:
+        entry_core.start_time_entry(None, "bench", "")
+        entry_core.stop_time_entry()
+
+    def export() -> None:
+        rows = entry_core.iter_entry_rows(tag_separator=CSV_TAG_SEPARATOR)
+        write_csv(entry_core.ENTRY_ROW_FIELDS, rows, io.StringIO())
+
+    def edit() -> None:
+        entry_core.edit_entry(rng.randint(1, size), title="edited")
+
+    # Each run deletes a different entry from the top of the id range.
+    deleted = iter(range(size, 0, -1))
+    snapshot = directory / f"analytics-{size}"
+
+    def report_snapshot() -> None:
+        analytics_core.report(analytics_core.load_snapshot(snapshot), ReportGroup.day)
+
+    return {
+        "list_first_page": (lambda: entry_core.list_time_entry(limit=100), 20),
+        "list_all": (lambda: sum(1 for _ in entry_core.iter_time_entry()), scans),
+        "get_running_entry": (entry_core.get_running_entry, 50),
+        "start_stop": (start_stop, 20),
+        "edit_entry": (edit, 20),
+        "delete_entry": (lambda: entry_core.delete_entry(next(deleted)), 20),
+        "search": (lambda: entry_core.search_time_entry("vendor meet*", limit=20), 20),
+        "export_csv": (export, scans),
+        "report_project": (lambda: report_core.report(ReportGroup.project), 10),
+        "report_day_scan": (lambda: report_core.report(ReportGroup.day, use_rollup=False), scans),
+        # The first run builds and saves the snapshot, later ones read it back.
+        "report_day_snapshot": (report_snapshot, 10),
+    }
+
+
+def bench(size: int, directory: Path, users: int) -> list[dict]:
+    engine = create_sqlite_engine(f"sqlite:///{directory / f'bench-{size}.db'}")
+    with engine.connect() as connection:
+        migrate(connection)
+    # Core modules look up jikan.models.engine when they run.
+    jikan.models.engine = engine
+
+    results = []
+    started = time.perf_counter()
+    seed_core.seed_history(size, users=users)
+    seconds = time.perf_counter() - started
+    results.append(
+        {"size": size, "operation": "seed", "runs": 1, "median_ms": round(seconds * 1000, 3)}
+    )
+
+    for name, (run, repeat) in operations(size, random.Random(0), directory).items():
+        results.append({"size": size, "operation": name, **measure(run, repeat)})
+    engine.dispose()
+    return results
+
+
+def compare(results: list[dict], baseline_path: Path) -> None:
+    baseline = {
+        (r["size"], r["operation"]): r["median_ms"]
+        for r in json.loads(baseline_path.read_text())["results"]
+    }
+    print(f"{'size':>9}  {'operation':<20}{'before ms':>12}{'after ms':>12}{'change':>9}")
+    for r in results:
+        before = baseline.get((r["size"], r["operation"]))
+        change = f"{r['median_ms'] / before - 1:+.0%}" if before else ""
+        before_ms = f"{before:.3f}" if before else "-"
+        after_ms = r["median_ms"]
+        print(f"{r['size']:>9}  {r['operation']:<20}{before_ms:>12}{after_ms:>12.3f}{change:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", default="10000,100000", help="Comma separated numbers of entries to seed"
+    )
+    parser.add_argument("--users", type=int, default=10, help="People sharing the history")
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON output of an earlier run")
+    options = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(s) for s in options.sizes.split(",")):
+            results.extend(bench(size, Path(directory), options.users))
+
+    if options.json:
+        environment = {
+            "jikan": version("jikan"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        }
+        print(json.dumps({"environment": environment, "results": results}, indent=2))
+        return
+    if options.compare:
+        compare(results, options.compare)
+        return
+
+    print(f"{'size':>9}  {'operation':<20}{'runs':>6}{'median ms':>12}")
+    for r in results:
+        print(f"{r['size']:>9}  {r['operation']:<20}{r['runs']:>6}{r['median_ms']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare command latency with and without the jikan daemon.
+
+Each command runs as a fresh `jikan` process, as from a shell. In-process mode pays for
+interpreter startup, imports and opening the database every time; with the daemon the
+process only forwards its arguments over the Unix socket.
+
+    uv run python benchmarks/bench_daemon.py
+    uv run python benchmarks/bench_daemon.py --runs 50 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CLI = [sys.executable, "-c", "from jikan.cli import main; main()"]
+COMMANDS = [["start", "--title", "bench"], ["status"], ["stop"]]
+
+
+def jikan(args: list[str], env: dict[str, str]) -> float:
+    started = time.perf_counter()
+    subprocess.run([*CLI, *args], env=env, stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def bench(mode: str, env: dict[str, str], runs: int) -> list[dict]:
+    timings: dict[str, list[float]] = {" ".join(args): [] for args in COMMANDS}
+    for _ in range(runs):
+        for args in COMMANDS:
+            timings[" ".join(args)].append(jikan(args, env))
+    return [
+        {
+            "mode": mode,
+            "command": command,
+            "min_ms": round(min(values), 2),
+            "median_ms": round(statistics.median(values), 2),
+            "max_ms": round(max(values), 2),
+        }
+        for command, values in timings.items()
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command")
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON")
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {**os.environ, "JIKAN_DATA_DIR": data_dir}
+        env.pop("JIKAN_NO_DAEMON", None)
+        subprocess.run([*CLI, "init"], env=env, stdout=subprocess.DEVNULL, check=True)
+
+        results = bench("in-process", {**env, "JIKAN_NO_DAEMON": "1"}, options.runs)
+        subprocess.run([*CLI, "daemon", "start"], env=env, stdout=subprocess.DEVNULL, check=True)
+        try:
+            results += bench("daemon", env, options.runs)
+        finally:
+            subprocess.run([*CLI, "daemon", "stop"], env=env, stdout=subprocess.DEVNULL)
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<12}{'command':<24}{'min':>10}{'median':>10}{'max':>10}")
+    for r in results:
+        print(
+            f"{r['mode']:<12}{r['command']:<24}"
+            f"{r['min_ms']:>10.1f}{r['median_ms']:>10.1f}{r['max_ms']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
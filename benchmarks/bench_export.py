@@ -0,0 +1,91 @@
+"""Measure export throughput over a synthetic history.
+
+uv run python benchmarks/bench_export.py
+uv run python benchmarks/bench_export.py --entries 1000000 --json
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlmodel import SQLModel
+
+import jikan.core.entry as entry_core
+import jikan.models
+from jikan.lib.export import CSV_TAG_SEPARATOR, write_csv, write_jsonl
+from jikan.models import Entry, EntryTagLink, Project, Tag, create_sqlite_engine
+
+
+def seed(engine, entries: int) -> None:
+    base = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Project), [{"id": i, "name": f"project-{i}"} for i in range(1, 51)])
+        conn.execute(insert(Tag), [{"id": i, "name": f"tag-{i}"} for i in range(1, 21)])
+        conn.execute(
+            insert(Entry),
+            [
+                {
+                    "id": i,
+                    "title": f"entry {i}",
+                    "description": "",
+                    "project_id": i % 50 + 1,
+                    "start_at": base + timedelta(minutes=30 * i),
+                    "end_at": base + timedelta(minutes=30 * i + 25),
+                }
+                for i in range(1, entries + 1)
+            ],
+        )
+        conn.execute(
+            insert(EntryTagLink),
+            [{"entry_id": i, "tag_id": i % 20 + 1} for i in range(1, entries + 1)],
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200_000, help="Entries to export")
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON")
+    options = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_sqlite_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        seed(engine, options.entries)
+        jikan.models.engine = engine
+
+        for name, writer, tag_separator in (
+            ("csv", write_csv, CSV_TAG_SEPARATOR),
+            ("jsonl", write_jsonl, None),
+        ):
+            sink = io.StringIO()
+            started = time.perf_counter()
+            rows = entry_core.iter_entry_rows(tag_separator=tag_separator)
+            count = writer(entry_core.ENTRY_ROW_FIELDS, rows, sink)
+            elapsed = time.perf_counter() - started
+            results.append(
+                {
+                    "format": name,
+                    "rows": count,
+                    "seconds": round(elapsed, 3),
+                    "rows_per_s": round(count / elapsed),
+                }
+            )
+        engine.dispose()
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'format':<8}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+    for r in results:
+        print(f"{r['format']:<8}{r['rows']:>10}{r['seconds']:>10.3f}{r['rows_per_s']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Measure bulk import throughput from a synthetic JSONL export.
+
+uv run python benchmarks/bench_import.py
+uv run python benchmarks/bench_import.py --entries 500000 --chunk-size 5000 --json
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlmodel import SQLModel
+
+import jikan.core.importer as importer_core
+import jikan.models
+from jikan.lib.export import ExportFormat
+from jikan.lib.importer import read_records
+from jikan.models import create_sqlite_engine
+
+
+def source(entries: int) -> str:
+    base = datetime(2020, 1, 1)
+    lines = []
+    for i in range(1, entries + 1):
+        start_at = base + timedelta(minutes=30 * i)
+        row = {
+            "title": f"entry {i}",
+            "start_at": start_at.isoformat() + "Z",
+            "end_at": (start_at + timedelta(minutes=25)).isoformat() + "Z",
+            "project": f"project-{i % 50}",
+            "tags": [f"tag-{i % 20}"],
+        }
+        lines.append(json.dumps(row))
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000, help="Entries to import")
+    parser.add_argument(
+        "--chunk-size", type=int, default=importer_core.IMPORT_CHUNK_SIZE, help="Rows per commit"
+    )
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON")
+    options = parser.parse_args()
+
+    text = source(options.entries)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_sqlite_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        jikan.models.engine = engine
+
+        started = time.perf_counter()
+        items = read_records(io.StringIO(text), ExportFormat.jsonl, UTC)
+        summary = importer_core.import_entries(
+            items, "bench", "bench.jsonl", chunk_size=options.chunk_size
+        )
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    result = {
+        "rows": summary.imported,
+        "chunk_size": options.chunk_size,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(summary.imported / elapsed),
+    }
+    if options.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{'rows':>10}{'chunk':>8}{'seconds':>10}{'rows/s':>12}")
+    print(
+        f"{result['rows']:>10}{result['chunk_size']:>8}"
+        f"{result['seconds']:>10.3f}{result['rows_per_s']:>12}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measure cold start time of the jikan CLI per command.
+
+Each command is run in a fresh interpreter against a throwaway home directory so that
+the numbers include interpreter startup, imports and (where needed) opening the database.
+
+    uv run python benchmarks/bench_startup.py
+    uv run python benchmarks/bench_startup.py --runs 20 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COMMANDS: list[list[str]] = [
+    ["--help"],
+    ["status"],
+    ["prompt"],
+    ["start", "--help"],
+    ["start", "--title", "bench"],
+    ["stop"],
+    ["list"],
+    ["project", "list"],
+    ["tag", "list"],
+]
+
+
+def run_once(args: list[str], env: dict[str, str]) -> float:
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "from jikan.main import app; app()", *args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=False,
+    )
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command")
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON")
+    options = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as home:
+        env = {**os.environ, "HOME": home}
+        subprocess.run(
+            [sys.executable, "-c", "from jikan.main import app; app()", "init"],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        for args in COMMANDS:
+            timings = [run_once(args, env) for _ in range(options.runs)]
+            results.append(
+                {
+                    "command": " ".join(args),
+                    "min_ms": round(min(timings), 2),
+                    "median_ms": round(statistics.median(timings), 2),
+                    "max_ms": round(max(timings), 2),
+                }
+            )
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'command':<28}{'min':>10}{'median':>10}{'max':>10}")
+    for r in results:
+        print(f"{r['command']:<28}{r['min_ms']:>10.1f}{r['median_ms']:>10.1f}{r['max_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
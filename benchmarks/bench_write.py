@@ -0,0 +1,93 @@
+"""Compare write throughput of a bare SQLite engine with the tuned jikan engine.
+
+Every write is its own transaction, like a `jikan start`/`jikan stop`. The concurrent run
+starts several processes writing to the same file and counts "database is locked" failures.
+
+    uv run python benchmarks/bench_write.py
+    uv run python benchmarks/bench_write.py --commits 2000 --processes 8 --json
+"""
+
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine
+
+from jikan.models import Entry, create_sqlite_engine
+
+ENGINES = {
+    "bare": create_engine,
+    "tuned": create_sqlite_engine,
+}
+
+
+def write(profile: str, url: str, commits: int) -> tuple[int, int]:
+    engine = ENGINES[profile](url)
+    errors = 0
+    for i in range(commits):
+        try:
+            with Session(engine) as session:
+                session.add(Entry(title=f"entry-{i}"))
+                session.commit()
+        except OperationalError:
+            errors += 1
+    engine.dispose()
+    return commits - errors, errors
+
+
+def bench(profile: str, directory: Path, commits: int, processes: int) -> dict:
+    url = f"sqlite:///{directory / f'{profile}.db'}"
+    engine = ENGINES[profile](url)
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+
+    started = time.perf_counter()
+    ok, _ = write(profile, url, commits)
+    sequential = ok / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.starmap(write, [(profile, url, commits // processes)] * processes)
+    elapsed = time.perf_counter() - started
+    ok = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+
+    return {
+        "profile": profile,
+        "sequential_commits_per_s": round(sequential, 1),
+        "concurrent_commits_per_s": round(ok / elapsed, 1),
+        "concurrent_lock_errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=1000, help="Commits per run")
+    parser.add_argument("--processes", type=int, default=4, help="Concurrent writer processes")
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON")
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [
+            bench(profile, Path(directory), options.commits, options.processes)
+            for profile in ENGINES
+        ]
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'profile':<10}{'seq commits/s':>16}{'conc commits/s':>16}{'lock errors':>14}")
+    for r in results:
+        print(
+            f"{r['profile']:<10}{r['sequential_commits_per_s']:>16.1f}"
+            f"{r['concurrent_commits_per_s']:>16.1f}{r['concurrent_lock_errors']:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
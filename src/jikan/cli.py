@@ -0,0 +1,56 @@
+"""Console entry point: forward to a running jikan daemon, or run the command in-process."""
+
+import time
+
+# Start of the import phase reported by --profile.
+STARTED_AT = time.perf_counter()
+
+import os  # noqa: E402
+import sys  # noqa: E402
+
+from jikan.lib.daemon import NO_DAEMON_ENV, DaemonUnavailableError, forward  # noqa: E402
+
+# Managing the daemon, running long-lived servers and the live dashboard always happen locally,
+# and so do commands asking for confirmation: the daemon serves one client at a time and would
+# wait for the answer.
+LOCAL_COMMANDS = (
+    ["daemon"],
+    ["serve"],
+    ["dashboard"],
+    ["delete"],
+    ["project", "delete"],
+    ["tag", "delete"],
+    ["dev", "seed"],
+)
+# Profiling measures the process it runs in and a pager needs the terminal, so these options
+# also keep a command local.
+LOCAL_OPTIONS = ("--profile", "--trace-sql", "--profile-output", "--pager")
+# Options of the root command that take a value, which may come before the command.
+GLOBAL_VALUE_OPTIONS = ("--output-format", "--profile-output")
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    args = command_args(argv)
+    local = any(args[: len(command)] == command for command in LOCAL_COMMANDS) or any(
+        arg.split("=")[0] in LOCAL_OPTIONS for arg in argv
+    )
+    if not os.environ.get(NO_DAEMON_ENV) and not local:
+        try:
+            sys.exit(forward(argv))
+        except DaemonUnavailableError:
+            pass
+
+    from jikan.main import app
+
+    app()
+
+
+def command_args(argv: list[str]) -> list[str]:
+    """`argv` from the command name on, without the global options before it."""
+    index = 0
+    while index < len(argv) and argv[index].startswith("-"):
+        # `--output-format json` takes the next argument as its value, `--output-format=json`
+        # does not.
+        index += 2 if argv[index] in GLOBAL_VALUE_OPTIONS else 1
+    return argv[index:]
@@ -0,0 +1,93 @@
+from typing import Annotated
+
+import typer
+from typer import echo
+
+from jikan.lib.print import error, success, warn
+
+app = typer.Typer()
+
+# Seconds to wait for a newly started daemon to accept connections.
+START_TIMEOUT = 10.0
+LOG_FILE_NAME = "daemon.log"
+
+
+@app.command()
+def start(
+    foreground: Annotated[
+        bool, typer.Option("--foreground", help="Serve in this process instead of detaching")
+    ] = False,
+):
+    """Start a daemon that keeps jikan loaded so commands respond faster"""
+    import subprocess
+    import sys
+    import time
+
+    from jikan.lib.config import get_app_dir
+    from jikan.lib.daemon import DaemonUnavailableError, control
+
+    try:
+        reply = control("ping")
+        warn(f"Daemon is already running (pid {reply['pid']})")
+        return
+    except DaemonUnavailableError:
+        pass
+
+    if foreground:
+        from jikan.daemon import serve
+
+        serve()
+        return
+
+    app_dir = get_app_dir()
+    app_dir.mkdir(parents=True, exist_ok=True)
+    with (app_dir / LOG_FILE_NAME).open("ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "jikan.daemon"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            error(f"Daemon exited with code {process.returncode}. See {app_dir / LOG_FILE_NAME}")
+            raise typer.Exit(code=1)
+        try:
+            reply = control("ping")
+        except DaemonUnavailableError:
+            time.sleep(0.05)
+            continue
+        success(f"Daemon started (pid {reply['pid']})")
+        return
+
+    error("Daemon did not start in time")
+    raise typer.Exit(code=1)
+
+
+@app.command()
+def stop():
+    """Stop the daemon"""
+    from jikan.lib.daemon import DaemonUnavailableError, control
+
+    try:
+        reply = control("stop")
+    except DaemonUnavailableError as e:
+        error("Daemon is not running")
+        raise typer.Exit(code=1) from e
+    success(f"Daemon stopped (pid {reply['pid']})")
+
+
+@app.command()
+def status():
+    """Show whether the daemon is running"""
+    from jikan.lib.daemon import DaemonUnavailableError, control, get_socket_path
+
+    try:
+        reply = control("ping")
+    except DaemonUnavailableError:
+        echo("Daemon is not running.")
+        return
+    echo(f"Daemon running (pid {reply['pid']}) on {get_socket_path()}")
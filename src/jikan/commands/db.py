@@ -0,0 +1,56 @@
+from typing import Annotated
+
+import typer
+from typer import echo
+
+from jikan.lib.print import error, success
+
+app = typer.Typer()
+
+
+@app.command("rebuild-rollups")
+def rebuild_rollups():
+    """Recompute the daily rollup used by reports from all entries"""
+    from jikan.core.rollup import rebuild_rollups
+
+    try:
+        count = rebuild_rollups()
+        success(f"Rollups rebuilt. {count} rows")
+    except Exception as e:
+        error(f"Failed to rebuild rollups: {e}")
+        raise typer.Exit(code=1) from e
+
+
+@app.command()
+def migrate(
+    dry_run: Annotated[
+        bool, typer.Option("--dry-run", help="List pending migrations without applying them")
+    ] = False,
+):
+    """Bring the database schema up to date"""
+    from jikan.lib.config import get_sqlite_path
+    from jikan.migrations import LATEST_VERSION, migrate, pending_migrations
+    from jikan.models import create_sqlite_engine
+
+    # Not the application engine, which would migrate on connecting.
+    sqlite_path = get_sqlite_path()
+    sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+    engine = create_sqlite_engine(f"sqlite:///{sqlite_path}")
+    try:
+        with engine.connect() as connection:
+            pending = pending_migrations(connection)
+            if not pending:
+                success(f"Database schema is up to date (version {LATEST_VERSION})")
+                return
+            if dry_run:
+                echo(f"{len(pending)} pending migrations:")
+                for migration in pending:
+                    echo(f"  {migration.version}: {migration.description}")
+                return
+            applied = migrate(connection)
+        success(f"Applied {len(applied)} migrations. Schema version {LATEST_VERSION}")
+    except Exception as e:
+        error(f"Failed to migrate: {e}")
+        raise typer.Exit(code=1) from e
+    finally:
+        engine.dispose()
@@ -0,0 +1,38 @@
+from typing import Annotated
+
+import typer
+
+from jikan.lib.print import error, success
+
+app = typer.Typer()
+
+
+@app.command()
+def seed(
+    entries: Annotated[int, typer.Option(help="Number of entries to generate")] = 10_000,
+    users: Annotated[int, typer.Option(help="Number of people whose histories to generate")] = 1,
+    projects: Annotated[int, typer.Option(help="Number of projects per person")] = 20,
+    tags: Annotated[int, typer.Option(help="Number of tags per person")] = 30,
+    seed: Annotated[int, typer.Option(help="Random seed; the same seed gives the same data")] = 0,
+    yes: Annotated[bool, typer.Option("--yes", "-y", help="Do not ask for confirmation")] = False,
+):
+    """Fill the database with a synthetic history for development and benchmarks"""
+    from jikan.lib.config import get_sqlite_path
+
+    if not yes:
+        _ = typer.confirm(f"Add {entries} synthetic entries to {get_sqlite_path()}?", abort=True)
+
+    import time
+
+    from jikan.core.seed import seed_history
+
+    started = time.perf_counter()
+    try:
+        summary = seed_history(entries, users, projects, tags, seed)
+    except Exception as e:
+        error(f"Failed to seed: {e}")
+        raise typer.Exit(code=1) from e
+    success(
+        f"Added {summary.entries} entries, {summary.projects} projects, {summary.tags} tags "
+        f"and {summary.links} tag links in {time.perf_counter() - started:.1f}s"
+    )
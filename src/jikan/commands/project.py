@@ -1,22 +1,10 @@
 from typing import Annotated
 
 import typer
-from rich import print
-from rich.console import Console
-from rich.table import Table
-
-from jikan.core.project import (
-    ProjectNotFoundError,
-    add_project,
-    delete_project,
-    edit_project,
-    get_project,
-    list_project,
-    set_project_archived,
-)
-from jikan.lib.print import error, success
+from typer import echo
 
-console = Console()
+from jikan.lib.output import OutputFormat, output_format, write_rows
+from jikan.lib.print import error, success
 
 app = typer.Typer()
 
@@ -24,11 +12,23 @@ app = typer.Typer()
 @app.command()
 def list():
     """List projects"""
+    format = output_format()
+    if format is not OutputFormat.rich:
+        from jikan.core.project import PROJECT_ROW_FIELDS, iter_project_rows
+
+        write_rows(format, PROJECT_ROW_FIELDS, iter_project_rows())
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    from jikan.core.project import list_project
+
     table = Table("ID", "Name", "Description")
     projects = list_project()
     for project in projects:
         table.add_row(str(project.id), project.name, project.description)
-    console.print(table)
+    Console().print(table)
 
 
 @app.command()
@@ -39,17 +39,21 @@ def add(
     ] = "",
 ):
     """Add new project"""
+    from jikan.core.project import add_project
+
     new_project = add_project(name, description)
     success(f"Project created. name: {new_project.name}, description: {new_project.description}")
 
 
 @app.command()
 def delete(id: Annotated[int, typer.Argument(help="ID of project to be deleted")]):
+    from jikan.core.project import ProjectNotFoundError, delete_project, get_project
+
     try:
         project = get_project(id)
-        print(str(project))
+        echo(str(project))
         _ = typer.confirm("Are you sure you want to delete it?", abort=True)
-        delete_project(project)
+        delete_project(id)
         success("Project deleted.")
     except ProjectNotFoundError as e:
         error("Project not found")
@@ -71,9 +75,10 @@ def edit(
         error("You must specify either name or description")
         raise typer.Exit(code=1)
 
+    from jikan.core.project import ProjectNotFoundError, edit_project
+
     try:
-        project = get_project(id)
-        updated_project = edit_project(project, name, description)
+        updated_project = edit_project(id, name, description)
         success(
             f"project edited. "
             f"name: {updated_project.name}, "
@@ -89,9 +94,10 @@ def edit(
 
 @app.command()
 def archive(id: Annotated[int, typer.Argument(help="ID of project to be archived")]):
+    from jikan.core.project import ProjectNotFoundError, set_project_archived
+
     try:
-        project = get_project(id)
-        set_project_archived(project, True)
+        project = set_project_archived(id, True)
         success(f"Project {project.id} is archived")
     except ProjectNotFoundError as e:
         error("Project not found")
@@ -103,9 +109,10 @@ def archive(id: Annotated[int, typer.Argument(help="ID of project to be archived
 
 @app.command()
 def unarchive(id: Annotated[int, typer.Argument(help="ID of project to be unarchived")]):
+    from jikan.core.project import ProjectNotFoundError, set_project_archived
+
     try:
-        project = get_project(id)
-        set_project_archived(project, False)
+        project = set_project_archived(id, False)
         success(f"Project {project.id} is unarchived")
     except ProjectNotFoundError as e:
         error("Project not found")
@@ -1,31 +1,45 @@
 from typing import Annotated
 
 import typer
-from rich import print
-from rich.console import Console
-from rich.table import Table
+from typer import echo
 
-from jikan.core.tag import TagNotFoundError, add_tag, delete_tag, edit_tag, get_tag, list_tag
+from jikan.lib.output import OutputFormat, output_format, write_rows
 from jikan.lib.print import error, success
 
-console = Console()
-
 app = typer.Typer()
 
+# Defined before the list command shadows the builtin.
+EntryIdsArgument = Annotated[list[int], typer.Argument(help="IDs of time entries")]
+TagIdsOption = Annotated[list[int], typer.Option("--tag", "-t", help="ID of tag. Can be repeated")]
+
 
 @app.command()
 def list():
     """List tags"""
+    format = output_format()
+    if format is not OutputFormat.rich:
+        from jikan.core.tag import TAG_ROW_FIELDS, iter_tag_rows
+
+        write_rows(format, TAG_ROW_FIELDS, iter_tag_rows())
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    from jikan.core.tag import list_tag
+
     table = Table("ID", "Name")
     tags = list_tag()
     for tag in tags:
         table.add_row(str(tag.id), tag.name)
-    console.print(table)
+    Console().print(table)
 
 
 @app.command()
 def add(name: Annotated[str, typer.Option("--name", "-n", help="Name of tag")]):
     """Add new tag"""
+    from jikan.core.tag import add_tag
+
     new_tag = add_tag(name)
     success(f"Tag created. name: {new_tag.name}")
 
@@ -35,9 +49,10 @@ def edit(
     id: Annotated[int, typer.Argument(help="ID of tag to be edited")],
     name: Annotated[str, typer.Option("--name", "-n", help="Name of tag")],
 ):
+    from jikan.core.tag import TagNotFoundError, edit_tag
+
     try:
-        tag = get_tag(id)
-        updated_tag = edit_tag(tag, name)
+        updated_tag = edit_tag(id, name)
         success(f"Tag edited. name: {updated_tag.name}")
     except TagNotFoundError as e:
         error("Tag not found")
@@ -49,11 +64,13 @@ def edit(
 
 @app.command()
 def delete(id: Annotated[int, typer.Argument(help="ID of tag to be deleted")]):
+    from jikan.core.tag import TagNotFoundError, delete_tag, get_tag
+
     try:
         tag = get_tag(id)
-        print(str(tag))
+        echo(str(tag))
         _ = typer.confirm("Are you sure you want to delete it?", abort=True)
-        delete_tag(tag)
+        delete_tag(id)
         success("Tag deleted.")
     except TagNotFoundError as e:
         error("Tag not found")
@@ -61,3 +78,43 @@ def delete(id: Annotated[int, typer.Argument(help="ID of tag to be deleted")]):
     except Exception as e:
         error(f"Failed to delete tag: {e}")
         raise typer.Exit(code=1) from e
+
+
+@app.command()
+def attach(entries: EntryIdsArgument, tag: TagIdsOption):
+    """Attach tags to time entries"""
+    from jikan.core.entry import EntryNotFoundError, attach_tags
+    from jikan.core.tag import TagNotFoundError
+
+    try:
+        added = attach_tags(entries, tag)
+        success(f"Attached {added} tags")
+    except EntryNotFoundError as e:
+        error(f"Entry not found: {e}")
+        raise typer.Exit(code=1) from e
+    except TagNotFoundError as e:
+        error(f"Tag not found: {e}")
+        raise typer.Exit(code=1) from e
+    except Exception as e:
+        error(f"Failed to attach tags: {e}")
+        raise typer.Exit(code=1) from e
+
+
+@app.command()
+def detach(entries: EntryIdsArgument, tag: TagIdsOption):
+    """Detach tags from time entries"""
+    from jikan.core.entry import EntryNotFoundError, detach_tags
+    from jikan.core.tag import TagNotFoundError
+
+    try:
+        removed = detach_tags(entries, tag)
+        success(f"Detached {removed} tags")
+    except EntryNotFoundError as e:
+        error(f"Entry not found: {e}")
+        raise typer.Exit(code=1) from e
+    except TagNotFoundError as e:
+        error(f"Tag not found: {e}")
+        raise typer.Exit(code=1) from e
+    except Exception as e:
+        error(f"Failed to detach tags: {e}")
+        raise typer.Exit(code=1) from e
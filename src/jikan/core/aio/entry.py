@@ -0,0 +1,263 @@
+"""Async counterparts of jikan.core.entry on the aiosqlite engine.
+
+Statements and validation come from the sync module, and rollup maintenance runs on the
+same transaction through AsyncSession.run_sync, so both APIs write the same rows.
+Entries from get_entry and the listing functions come with their project and tags loaded;
+other functions return entries with only their columns loaded.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from jikan import models
+from jikan.core import rollup
+from jikan.core.entry import (
+    ENTRY_LOAD_OPTIONS,
+    EntryAlreadyRunningError,
+    EntryCursor,
+    EntryNotFoundError,
+    EntryNotRunningError,
+    check_entries_exist,
+    check_tags_exist,
+    close_entry,
+    link_tags_statement,
+    list_entry_statement,
+    new_entry,
+    running_entry_statement,
+    running_state_from_rows,
+    running_state_statement,
+    unlink_tags_statement,
+    update_entry,
+)
+from jikan.core.project import ProjectNotFoundError
+from jikan.lib.datetime import utc_now
+from jikan.lib.state import RunningState, clear_running_state, write_running_state
+from jikan.models import Entry, Project, database_path, immediate
+
+
+async def get_entry(id: int) -> Entry:
+    async with AsyncSession(models.async_engine) as session:
+        entry = await session.get(Entry, id, options=ENTRY_LOAD_OPTIONS)
+        if entry is None:
+            raise EntryNotFoundError
+        return entry
+
+
+async def edit_entry(
+    id: int,
+    title: str | None = None,
+    description: str | None = None,
+    start_at: datetime | None = None,
+    end_at: datetime | None = None,
+    project_id: int | None = None,
+    tag_ids: Sequence[int] = (),
+) -> Entry:
+    """Edit an entry, its rollup rows and the state file in a single transaction."""
+    async with AsyncSession(immediate(models.async_engine), expire_on_commit=False) as session:
+        db_entry = await session.get(Entry, id)
+        if db_entry is None:
+            raise EntryNotFoundError
+        await session.run_sync(rollup.remove_entry, db_entry)
+        update_entry(db_entry, title, description, start_at, end_at)
+
+        if project_id is not None:
+            if await session.get(Project, project_id) is None:
+                raise ProjectNotFoundError
+            db_entry.project_id = project_id
+        if tag_ids:
+            await session.run_sync(check_tags_exist, tag_ids)
+            await session.exec(link_tags_statement([id], tag_ids))
+
+        session.add(db_entry)
+        await session.flush()
+        await session.run_sync(rollup.add_entry, db_entry)
+        await _commit_with_state(session)
+
+    return db_entry
+
+
+async def delete_entry(id: int) -> None:
+    async with AsyncSession(immediate(models.async_engine)) as session:
+        db_entry = await session.get(Entry, id)
+        if db_entry is None:
+            raise EntryNotFoundError
+        await session.run_sync(rollup.remove_entry, db_entry)
+        await session.delete(db_entry)
+        await session.flush()
+        await _commit_with_state(session)
+
+
+async def start_time_entry(
+    project_id: int | None, title: str, description: str, tag_ids: Sequence[int] = ()
+) -> Entry:
+    entry = new_entry(project_id, title, description, utc_now())
+    async with AsyncSession(immediate(models.async_engine)) as session:
+        if (await session.exec(running_entry_statement().limit(1))).first() is not None:
+            raise EntryAlreadyRunningError("Time entry is already running.")
+        await session.run_sync(check_tags_exist, tag_ids)
+
+        session.add(entry)
+        try:
+            await session.flush()
+        except IntegrityError as e:
+            raise EntryAlreadyRunningError("Time entry is already running.") from e
+        assert entry.id is not None
+        if tag_ids:
+            await session.exec(link_tags_statement([entry.id], tag_ids))
+        await _commit_with_state(session)
+        await session.refresh(entry)
+
+    return entry
+
+
+async def stop_time_entry() -> Entry:
+    async with AsyncSession(immediate(models.async_engine)) as session:
+        running_entry = (await session.exec(running_entry_statement())).all()
+
+        if len(running_entry) == 0:
+            raise EntryNotRunningError("No time entry running.")
+        elif len(running_entry) > 1:
+            raise RuntimeError("Multiple time entries running")
+
+        entry = running_entry[0]
+        close_entry(entry, utc_now())
+        session.add(entry)
+        await session.run_sync(rollup.add_entry, entry)
+        await session.flush()
+        await _commit_with_state(session)
+        await session.refresh(entry)
+
+    return entry
+
+
+async def switch_time_entry(
+    project_id: int | None,
+    title: str,
+    description: str,
+    tag_ids: Sequence[int] = (),
+) -> tuple[Entry | None, Entry]:
+    """Stop the running entry, if any, and start a new one in a single transaction."""
+    async with AsyncSession(immediate(models.async_engine)) as session:
+        running_entry = (await session.exec(running_entry_statement())).all()
+        if len(running_entry) > 1:
+            raise RuntimeError("Multiple time entries running")
+
+        await session.run_sync(check_tags_exist, tag_ids)
+
+        now = utc_now()
+        stopped_entry = running_entry[0] if running_entry else None
+        if stopped_entry is not None:
+            close_entry(stopped_entry, now)
+            session.add(stopped_entry)
+            await session.run_sync(rollup.add_entry, stopped_entry)
+            # Close the running entry before inserting so the running-entry index stays valid.
+            await session.flush()
+
+        started_entry = new_entry(project_id, title, description, now)
+        session.add(started_entry)
+        await session.flush()
+        assert started_entry.id is not None
+        if tag_ids:
+            await session.exec(link_tags_statement([started_entry.id], tag_ids))
+        await _commit_with_state(session)
+
+        if stopped_entry is not None:
+            await session.refresh(stopped_entry)
+        await session.refresh(started_entry)
+
+    return stopped_entry, started_entry
+
+
+async def attach_tags(entry_ids: Sequence[int], tag_ids: Sequence[int]) -> int:
+    """Attach every tag in `tag_ids` to every entry in `entry_ids`. Returns the links added."""
+    async with AsyncSession(immediate(models.async_engine)) as session:
+        await session.run_sync(check_entries_exist, entry_ids)
+        await session.run_sync(check_tags_exist, tag_ids)
+        await session.run_sync(rollup.remove_entry_ids, entry_ids)
+        added = (await session.exec(link_tags_statement(entry_ids, tag_ids))).rowcount
+        await session.run_sync(rollup.add_entry_ids, entry_ids)
+        await session.commit()
+    return added
+
+
+async def detach_tags(entry_ids: Sequence[int], tag_ids: Sequence[int]) -> int:
+    """Detach every tag in `tag_ids` from every entry in `entry_ids`. Returns the links removed."""
+    async with AsyncSession(immediate(models.async_engine)) as session:
+        await session.run_sync(check_entries_exist, entry_ids)
+        await session.run_sync(check_tags_exist, tag_ids)
+        await session.run_sync(rollup.remove_entry_ids, entry_ids)
+        removed = (await session.exec(unlink_tags_statement(entry_ids, tag_ids))).rowcount
+        await session.run_sync(rollup.add_entry_ids, entry_ids)
+        await session.commit()
+    return removed
+
+
+async def load_running_state() -> RunningState | None:
+    """Read the running entry from the database and rewrite the state file with it."""
+    # Under the write lock, so that no writer commits a newer state in between.
+    async with AsyncSession(immediate(models.async_engine)) as session:
+        state = running_state_from_rows((await session.exec(running_state_statement())).all())
+        await _write_running_state(state)
+    return state
+
+
+async def _commit_with_state(session: AsyncSession) -> None:
+    # As in jikan.core.entry: written under the write lock, before the commit.
+    state = running_state_from_rows((await session.exec(running_state_statement())).all())
+    await _write_running_state(state)
+    try:
+        await session.commit()
+    except BaseException:
+        await _clear_running_state()
+        raise
+
+
+async def _write_running_state(state: RunningState | None) -> None:
+    db_path = database_path(models.async_engine)
+    if db_path is not None:
+        await asyncio.to_thread(write_running_state, db_path, state)
+
+
+async def _clear_running_state() -> None:
+    db_path = database_path(models.async_engine)
+    if db_path is not None:
+        await asyncio.to_thread(clear_running_state, db_path)
+
+
+async def get_running_entry() -> Sequence[Entry]:
+    async with AsyncSession(models.async_engine) as session:
+        return (await session.exec(running_entry_statement())).all()
+
+
+async def iter_time_entry(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+    after: EntryCursor | None = None,
+    limit: int | None = None,
+    batch_size: int = 500,
+) -> AsyncIterator[Entry]:
+    """Yield entries in (start_at, id) order, fetching `batch_size` rows at a time."""
+    statement = list_entry_statement(since, until, project_ids, tag_ids, after, limit)
+    async with AsyncSession(models.async_engine) as session:
+        result = await session.stream_scalars(statement.execution_options(yield_per=batch_size))
+        async for entry in result:
+            yield entry
+
+
+async def list_time_entry(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+    after: EntryCursor | None = None,
+    limit: int | None = None,
+) -> Sequence[Entry]:
+    statement = list_entry_statement(since, until, project_ids, tag_ids, after, limit)
+    async with AsyncSession(models.async_engine) as session:
+        return (await session.exec(statement)).all()
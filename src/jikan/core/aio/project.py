@@ -0,0 +1,82 @@
+"""Async counterparts of jikan.core.project on the aiosqlite engine."""
+
+import asyncio
+from collections.abc import Sequence
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from jikan import models
+from jikan.core import rollup
+from jikan.core.project import ProjectNotFoundError, list_project_statement
+from jikan.lib.state import clear_running_state
+from jikan.models import Project, database_path, immediate
+
+
+async def list_project() -> Sequence[Project]:
+    async with AsyncSession(models.async_engine) as session:
+        return (await session.exec(list_project_statement())).all()
+
+
+async def add_project(name: str, description: str) -> Project:
+    if not name:
+        raise ValueError("name should not be empty")
+    new_project = Project(name=name, description=description)
+    async with AsyncSession(models.async_engine) as session:
+        session.add(new_project)
+        await session.commit()
+        await session.refresh(new_project)
+    return new_project
+
+
+async def get_project(id: int) -> Project:
+    async with AsyncSession(models.async_engine) as session:
+        project = await session.get(Project, id)
+        if project is None:
+            raise ProjectNotFoundError
+        return project
+
+
+async def delete_project(id: int) -> None:
+    async with AsyncSession(immediate(models.async_engine)) as session:
+        db_project = await session.get(Project, id)
+        if db_project is None:
+            raise ProjectNotFoundError
+        await session.run_sync(rollup.remove_project, db_project.id)
+        await session.delete(db_project)
+        await session.commit()
+    await _clear_running_state()
+
+
+async def edit_project(id: int, name: str | None, description: str | None) -> Project:
+    async with AsyncSession(models.async_engine) as session:
+        db_project = await session.get(Project, id)
+        if db_project is None:
+            raise ProjectNotFoundError
+        if name is not None:
+            db_project.name = name
+        if description is not None:
+            db_project.description = description
+        session.add(db_project)
+        await session.commit()
+        await session.refresh(db_project)
+    await _clear_running_state()
+    return db_project
+
+
+async def set_project_archived(id: int, is_archived: bool) -> Project:
+    async with AsyncSession(models.async_engine) as session:
+        db_project = await session.get(Project, id)
+        if db_project is None:
+            raise ProjectNotFoundError
+        db_project.archived = is_archived
+        session.add(db_project)
+        await session.commit()
+        await session.refresh(db_project)
+        return db_project
+
+
+async def _clear_running_state() -> None:
+    # The running entry's project name may have changed; the next reader reloads it.
+    db_path = database_path(models.async_engine)
+    if db_path is not None:
+        await asyncio.to_thread(clear_running_state, db_path)
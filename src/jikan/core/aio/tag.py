@@ -0,0 +1,65 @@
+"""Async counterparts of jikan.core.tag on the aiosqlite engine."""
+
+from collections.abc import Sequence
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from jikan import models
+from jikan.core import rollup
+from jikan.core.tag import TagNotFoundError
+from jikan.models import EntryTagLink, Tag, immediate
+
+
+async def list_tag() -> Sequence[Tag]:
+    async with AsyncSession(models.async_engine) as session:
+        return (await session.exec(select(Tag))).all()
+
+
+async def get_tag(id: int) -> Tag:
+    async with AsyncSession(models.async_engine) as session:
+        tag = await session.get(Tag, id)
+        if tag is None:
+            raise TagNotFoundError
+        return tag
+
+
+async def add_tag(name: str) -> Tag:
+    if not name:
+        raise ValueError("name should not be empty")
+    async with AsyncSession(models.async_engine) as session:
+        tag = Tag(name=name)
+        session.add(tag)
+        await session.commit()
+        await session.refresh(tag)
+        return tag
+
+
+async def edit_tag(id: int, name: str) -> Tag:
+    if not name:
+        raise ValueError("name should not be empty")
+    async with AsyncSession(models.async_engine) as session:
+        db_tag = await session.get(Tag, id)
+        if db_tag is None:
+            raise TagNotFoundError
+        db_tag.name = name
+        session.add(db_tag)
+        await session.commit()
+        await session.refresh(db_tag)
+        return db_tag
+
+
+async def delete_tag(id: int) -> None:
+    async with AsyncSession(immediate(models.async_engine)) as session:
+        db_tag = await session.get(Tag, id)
+        if db_tag is None:
+            raise TagNotFoundError
+        # See jikan.core.tag.delete_tag.
+        entry_ids = (
+            await session.exec(select(EntryTagLink.entry_id).where(EntryTagLink.tag_id == id))
+        ).all()
+        await session.run_sync(rollup.remove_entry_ids, entry_ids)
+        await session.delete(db_tag)
+        await session.flush()
+        await session.run_sync(rollup.add_entry_ids, entry_ids)
+        await session.commit()
@@ -0,0 +1,313 @@
+"""Columnar snapshot of the entry history for reports computed with NumPy.
+
+A Snapshot holds one array per column of `entry`, sorted by id, and the entries' tags in
+CSR form: the tags of the i-th entry are tag_ids[tag_offsets[i]:tag_offsets[i + 1]].
+Times are microseconds since the epoch (UTC); `end` is RUNNING for the running entry and
+`project` is NO_PROJECT for entries without one.
+
+Snapshots are saved as .npy files in the `analytics` directory next to the database and
+read back memory-mapped. They are brought up to date from the entry_change log, in which
+this module registers itself as the READER, so only entries changed since the snapshot
+was taken are read again. A snapshot left behind by more than MAX_READER_LAG changes loses
+its reader and is rebuilt.
+
+Requires the optional numpy dependency.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Sequence
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+from sqlalchemy import String, func, type_coerce
+from sqlmodel import Session, col, select
+
+from jikan import models
+from jikan.core import changes
+from jikan.core.report import NO_PROJECT_LABEL, NO_TAG_LABEL, merge_rows
+from jikan.lib.datetime import ensure_utc_aware, utc_now
+from jikan.lib.report import ReportGroup, ReportRow
+from jikan.models import Entry, EntryTagLink, Project, Tag, database_path, immediate
+
+READER = "analytics"
+# Bumped whenever the files written by save_snapshot() change.
+FORMAT = 1
+RUNNING = -1
+NO_PROJECT = 0
+# Key of entries without tags when grouping by tag.
+_NO_TAG = 0
+_DAY_US = 86_400 * 1_000_000
+_COLUMNS = ("ids", "start", "end", "project", "tag_offsets", "tag_ids")
+
+
+class Snapshot(NamedTuple):
+    ids: np.ndarray  # int64
+    start: np.ndarray  # int64
+    end: np.ndarray  # int64
+    project: np.ndarray  # int32
+    tag_offsets: np.ndarray  # int64, one more than there are entries
+    tag_ids: np.ndarray  # int32
+    seq: int  # last entry_change applied
+
+
+def snapshot_dir() -> Path | None:
+    """Where snapshots of the database are saved, or None for an in-memory database."""
+    path = database_path(models.engine)
+    return None if path is None else path.parent / "analytics"
+
+
+def load_snapshot(directory: Path | None = None) -> Snapshot:
+    """Read the saved snapshot, bring it up to date and save it again if it changed.
+
+    Builds a new snapshot when none was saved, or the saved one cannot be brought up to
+    date. `directory` defaults to snapshot_dir().
+    """
+    directory = directory or snapshot_dir()
+    snapshot = read_snapshot(directory) if directory is not None else None
+    updated = build_snapshot() if snapshot is None else refresh_snapshot(snapshot)
+    if directory is not None and updated is not snapshot:
+        save_snapshot(updated, directory)
+    return updated
+
+
+def build_snapshot() -> Snapshot:
+    """Read every entry and start logging changes for later refreshes."""
+    with Session(immediate(models.engine)) as session:
+        seq = changes.last_seq(session)
+        changes.set_reader_seq(session, READER, seq)
+        ids, start, end, project = _read_entries(session)
+        links = _read_links(session)
+        session.commit()
+    return Snapshot(ids, start, end, project, *_tags_csr(ids, *links), seq=seq)
+
+
+def refresh_snapshot(snapshot: Snapshot) -> Snapshot:
+    """Apply the entries changed since `snapshot` was taken.
+
+    Returns `snapshot` itself when nothing changed, and a new snapshot from
+    build_snapshot() when the changes since then are no longer logged.
+    """
+    with Session(models.engine) as session:
+        reader_seq = changes.reader_seq(session, READER)
+        last_seq = changes.last_seq(session)
+    if reader_seq != snapshot.seq:
+        return build_snapshot()
+    if last_seq <= snapshot.seq:
+        return snapshot
+
+    with Session(immediate(models.engine)) as session:
+        # Checked again under the write lock: another refresh may have moved the reader, or
+        # dropped it, since the check above.
+        if changes.reader_seq(session, READER) != snapshot.seq:
+            session.rollback()
+            return build_snapshot()
+        seq = changes.last_seq(session)
+        changed = changes.changed_entries(snapshot.seq)
+        changed_ids = np.array(session.exec(changed).all(), dtype=np.int64)
+        ids, start, end, project = _read_entries(session, col(Entry.id).in_(changed))
+        link_entry_ids, link_tag_ids = _read_links(session, col(EntryTagLink.entry_id).in_(changed))
+        changes.set_reader_seq(session, READER, seq)
+        session.commit()
+
+    keep = ~np.isin(snapshot.ids, changed_ids)
+    counts = np.diff(snapshot.tag_offsets)
+    new_offsets, new_tag_ids = _tags_csr(ids, link_entry_ids, link_tag_ids)
+    all_ids = np.concatenate([snapshot.ids[keep], ids])
+    all_counts = np.concatenate([counts[keep], np.diff(new_offsets)])
+    all_tag_ids = np.concatenate([snapshot.tag_ids[np.repeat(keep, counts)], new_tag_ids])
+
+    order = np.argsort(all_ids, kind="stable")
+    # Move each entry's run of tags along with the entry.
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    tag_order = np.argsort(np.repeat(rank, all_counts), kind="stable")
+    return Snapshot(
+        ids=all_ids[order],
+        start=np.concatenate([snapshot.start[keep], start])[order],
+        end=np.concatenate([snapshot.end[keep], end])[order],
+        project=np.concatenate([snapshot.project[keep], project])[order],
+        tag_offsets=_offsets(all_counts[order]),
+        tag_ids=all_tag_ids[tag_order],
+        seq=seq,
+    )
+
+
+def save_snapshot(snapshot: Snapshot, directory: Path) -> None:
+    """Write `snapshot` to `directory`, replacing the one saved there.
+
+    Arrays go to a new subdirectory that meta.json is then switched to, so readers never
+    see a partly written snapshot.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    arrays = Path(tempfile.mkdtemp(prefix=f"{snapshot.seq}-", dir=directory))
+    for name in _COLUMNS:
+        np.save(arrays / f"{name}.npy", getattr(snapshot, name))
+
+    previous = _read_meta(directory)
+    meta = directory / "meta.json"
+    temporary = meta.with_suffix(f".{os.getpid()}.tmp")
+    temporary.write_text(json.dumps({"format": FORMAT, "seq": snapshot.seq, "path": arrays.name}))
+    os.replace(temporary, meta)
+    if previous is not None:
+        shutil.rmtree(directory / previous["path"], ignore_errors=True)
+
+
+def read_snapshot(directory: Path) -> Snapshot | None:
+    """The snapshot saved in `directory`, memory-mapped, or None if there is none."""
+    meta = _read_meta(directory)
+    if meta is None:
+        return None
+    try:
+        arrays = {
+            name: np.load(directory / meta["path"] / f"{name}.npy", mmap_mode="r")
+            for name in _COLUMNS
+        }
+    except (OSError, ValueError):
+        return None
+    return Snapshot(**arrays, seq=meta["seq"])
+
+
+def durations(snapshot: Snapshot, now: datetime) -> np.ndarray:
+    """Length of each entry in seconds, counting the running entry up to `now`."""
+    end = np.where(snapshot.end == RUNNING, _epoch_us(now), snapshot.end)
+    return np.maximum(end - snapshot.start, 0) / 1_000_000
+
+
+def start_days(snapshot: Snapshot) -> np.ndarray:
+    """The UTC day each entry starts on, as datetime64[D]."""
+    return (snapshot.start // _DAY_US).astype("datetime64[D]")
+
+
+def report(
+    snapshot: Snapshot,
+    group_by: ReportGroup,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+    now: datetime | None = None,
+) -> Sequence[ReportRow]:
+    """Total tracked time per group, with the same results as jikan.core.report.report()."""
+    mask = np.ones(len(snapshot.ids), dtype=bool)
+    if since is not None:
+        mask &= snapshot.start >= _epoch_us(since)
+    if until is not None:
+        mask &= snapshot.start < _epoch_us(until)
+    if project_ids:
+        mask &= np.isin(snapshot.project, project_ids)
+    counts = np.diff(snapshot.tag_offsets)
+    if tag_ids:
+        # Number of matching tags up to each link; an entry matches if its run has any.
+        tagged = np.concatenate([[0], np.cumsum(np.isin(snapshot.tag_ids, tag_ids))])
+        mask &= tagged[snapshot.tag_offsets[1:]] > tagged[snapshot.tag_offsets[:-1]]
+
+    seconds = durations(snapshot, now or utc_now())
+    if group_by is ReportGroup.tag:
+        # One row per tag of an entry, and one for each entry without tags.
+        keys = np.concatenate([snapshot.tag_ids, np.full(np.count_nonzero(counts == 0), _NO_TAG)])
+        rows = np.concatenate(
+            [np.repeat(np.arange(len(counts)), counts), np.flatnonzero(counts == 0)]
+        )
+        keep = mask[rows]
+        keys, seconds = keys[keep], seconds[rows[keep]]
+    elif group_by is ReportGroup.project:
+        keys, seconds = snapshot.project[mask], seconds[mask]
+    else:
+        keys, seconds = start_days(snapshot)[mask].astype(np.int64), seconds[mask]
+
+    groups, inverse = np.unique(keys, return_inverse=True)
+    totals = np.bincount(inverse, weights=seconds, minlength=len(groups))
+    entries = np.bincount(inverse, minlength=len(groups))
+    grouped = zip(groups.tolist(), totals.tolist(), entries.tolist(), strict=True)
+    if group_by in (ReportGroup.project, ReportGroup.tag):
+        model = Project if group_by is ReportGroup.project else Tag
+        no_label = NO_PROJECT_LABEL if group_by is ReportGroup.project else NO_TAG_LABEL
+        with Session(models.engine) as session:
+            names = dict(session.exec(select(model.id, model.name)).all())
+        return merge_rows(
+            group_by,
+            (
+                (key, names[key], total, count) if key in names else (None, no_label, total, count)
+                for key, total, count in grouped
+            ),
+        )
+    rows = []
+    for day, total, count in grouped:
+        label = _period_label(group_by, day)
+        rows.append((label, label, total, count))
+    return merge_rows(group_by, rows)
+
+
+def _read_entries(session: Session, *where: Any) -> tuple[np.ndarray, ...]:
+    # Times are read as stored, "YYYY-MM-DD HH:MM:SS.ffffff" in UTC, which NumPy parses
+    # much faster than the datetimes SQLAlchemy would build.
+    statement = select(
+        col(Entry.id),
+        type_coerce(Entry.start_at, String),
+        type_coerce(Entry.end_at, String),
+        func.coalesce(Entry.project_id, NO_PROJECT),
+    )
+    rows = session.exec(statement.where(*where).order_by(col(Entry.id))).all()
+    ids, start, end, project = zip(*rows, strict=True) if rows else ((), (), (), ())
+    end_us = np.array(end, dtype="datetime64[us]")
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array(start, dtype="datetime64[us]").astype(np.int64),
+        np.where(np.isnat(end_us), RUNNING, end_us.astype(np.int64)),
+        np.array(project, dtype=np.int32),
+    )
+
+
+def _read_links(session: Session, *where: Any) -> tuple[np.ndarray, np.ndarray]:
+    statement = select(EntryTagLink.entry_id, EntryTagLink.tag_id).where(*where)
+    rows = session.exec(
+        statement.order_by(col(EntryTagLink.entry_id), col(EntryTagLink.tag_id))
+    ).all()
+    links = np.array(rows, dtype=np.int64).reshape(-1, 2)
+    return links[:, 0], links[:, 1].astype(np.int32)
+
+
+def _tags_csr(
+    ids: np.ndarray, link_entry_ids: np.ndarray, link_tag_ids: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Offsets and tag ids of the entries `ids` from links sorted by entry id."""
+    if not len(ids):
+        return _offsets(np.zeros(0, dtype=np.int64)), link_tag_ids[:0]
+    positions = np.searchsorted(ids, link_entry_ids)
+    # Links of entries that do not exist are left out.
+    valid = ids[np.minimum(positions, len(ids) - 1)] == link_entry_ids
+    counts = np.bincount(positions[valid], minlength=len(ids))
+    return _offsets(counts), link_tag_ids[valid]
+
+
+def _offsets(counts: np.ndarray) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+
+def _read_meta(directory: Path) -> dict | None:
+    try:
+        meta = json.loads((directory / "meta.json").read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict) or meta.get("format") != FORMAT:
+        return None
+    return meta
+
+
+def _epoch_us(at: datetime) -> int:
+    return int(np.datetime64(ensure_utc_aware(at).replace(tzinfo=None), "us").astype(np.int64))
+
+
+def _period_label(group_by: ReportGroup, day: int) -> str:
+    start = date.fromordinal(date(1970, 1, 1).toordinal() + day)
+    if group_by is ReportGroup.day:
+        return start.isoformat()
+    if group_by is ReportGroup.month:
+        return start.strftime("%Y-%m")
+    year, week, _ = start.isocalendar()
+    return f"{year}-W{week:02d}"
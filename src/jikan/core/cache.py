@@ -0,0 +1,153 @@
+"""Cache of report and list results, valid for as long as the data does not change.
+
+Results are stored with the change_counter of the database they were computed from. A
+lookup reads the counter, a single-row query, and returns the stored result only if the
+counter is the same, so any write, by this process or another, makes earlier results miss.
+
+Each ResultCache keeps its most recently used results in memory. With a directory it also
+writes them there, pickled, so later processes can reuse them; set `disk_cache = true` in
+the config file to give result_cache() one in the data directory.
+"""
+
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from functools import cache
+from pathlib import Path
+
+from sqlmodel import Session, select
+
+from jikan import models
+from jikan.lib.config import load_config
+from jikan.models import ChangeCounter, database_path
+
+# Results kept in memory and on disk.
+MEMORY_ENTRIES = 256
+DISK_ENTRIES = 1024
+
+type Version = tuple[str, int]
+
+
+def data_version() -> Version | None:
+    """The database's id and change counter, or None if it does not count changes."""
+    with Session(models.engine) as session:
+        row = session.exec(select(ChangeCounter.database_id, ChangeCounter.value)).first()
+    return None if row is None else (row[0], row[1])
+
+
+class ResultCache:
+    """Results of calls keyed on their arguments, kept for the data version they were
+    computed from. Least recently used results are dropped beyond `max_entries`.
+
+    Callers share the returned objects, so they must not modify them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MEMORY_ENTRIES,
+        directory: Path | None = None,
+        max_files: int = DISK_ENTRIES,
+    ) -> None:
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_files = max_files
+        self._entries: OrderedDict[Hashable, tuple[Version, object]] = OrderedDict()
+        # Core functions are called from the worker threads of the API server.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get[T](self, key: Hashable, compute: Callable[[], T]) -> T:
+        """The result stored for `key` at the current data version, or else compute()."""
+        # Read before computing: a write in between then only makes the stored result miss.
+        version = data_version()
+        if version is None:
+            return compute()
+
+        with self._lock:
+            stored = self._entries.get(key)
+        if stored is None and self.directory is not None:
+            stored = self._read(key)
+        if stored is not None and stored[0] == version:
+            self.hits += 1
+            self._remember(key, stored)
+            return stored[1]  # type: ignore[return-value]
+
+        self.misses += 1
+        result = compute()
+        self._remember(key, (version, result))
+        if self.directory is not None:
+            self._write(key, (version, result))
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.directory is not None:
+            for path in self.directory.glob("*.pickle"):
+                path.unlink(missing_ok=True)
+
+    def _remember(self, key: Hashable, stored: tuple[Version, object]) -> None:
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key: Hashable) -> Path:
+        assert self.directory is not None
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return self.directory / f"{digest}.pickle"
+
+    def _read(self, key: Hashable) -> tuple[Version, object] | None:
+        path = self._path(key)
+        try:
+            stored_key, version, result = pickle.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Written by another version of jikan, or damaged.
+            path.unlink(missing_ok=True)
+            return None
+        if stored_key != key:
+            return None
+        # Reading counts as a use for the least-recently-used order on disk.
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return version, result
+
+    def _write(self, key: Hashable, stored: tuple[Version, object]) -> None:
+        assert self.directory is not None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = pickle.dumps((key, *stored), protocol=pickle.HIGHEST_PROTOCOL)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(data)
+        os.replace(temporary, self._path(key))
+
+        files = sorted(self.directory.glob("*.pickle"), key=_mtime)
+        for path in files[: max(len(files) - self.max_files, 0)]:
+            path.unlink(missing_ok=True)
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0
+
+
+@cache
+def result_cache() -> ResultCache:
+    """The cache used by the core functions, on disk too if the config asks for it."""
+    directory = None
+    if load_config().get("disk_cache"):
+        path = database_path(models.engine)
+        if path is not None:
+            directory = path.parent / "cache"
+    return ResultCache(directory=directory)
@@ -0,0 +1,54 @@
+"""Readers of the entry_change log.
+
+Triggers log the id of every entry added, deleted or changed, see ENTRY_CHANGE_DDL, but
+only while at least one reader is registered in change_reader. A reader remembers the
+last seq it has applied; rows every reader has applied are pruned. A reader more than
+MAX_READER_LAG changes behind is dropped, so the log stays bounded, and finds reader_seq
+returning None on its next use.
+"""
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, select
+from sqlmodel.sql.expression import SelectOfScalar
+
+from jikan import models
+from jikan.models import ChangeReader, EntryChange, immediate
+
+
+def last_seq(session: Session) -> int:
+    """The seq of the latest logged change, 0 if none is logged."""
+    return session.exec(select(func.coalesce(func.max(EntryChange.seq), 0))).one()
+
+
+def reader_seq(session: Session, name: str) -> int | None:
+    """The last seq applied by reader `name`, or None if it is not registered."""
+    return session.exec(select(ChangeReader.seq).where(col(ChangeReader.name) == name)).first()
+
+
+def set_reader_seq(session: Session, name: str, seq: int) -> None:
+    """Register reader `name`, or move it forward, and prune what every reader has applied."""
+    statement = insert(ChangeReader).values(name=name, seq=seq)
+    session.exec(statement.on_conflict_do_update(index_elements=["name"], set_={"seq": seq}))
+    prune(session)
+
+
+def changed_entries(seq: int) -> SelectOfScalar[int]:
+    """Select the ids of the entries changed after `seq`."""
+    return select(EntryChange.entry_id).where(col(EntryChange.seq) > seq).distinct()
+
+
+def prune(session: Session) -> None:
+    oldest = select(func.min(ChangeReader.seq)).scalar_subquery()
+    # With no reader left, nothing needs the log.
+    session.exec(
+        delete(EntryChange).where(col(EntryChange.seq) <= func.coalesce(oldest, EntryChange.seq))
+    )
+
+
+def remove_reader(name: str) -> None:
+    """Unregister reader `name`, so changes are no longer kept for it."""
+    with Session(immediate(models.engine)) as session:
+        session.exec(delete(ChangeReader).where(col(ChangeReader.name) == name))
+        prune(session)
+        session.commit()
@@ -0,0 +1,192 @@
+"""The entries shown by `jikan dashboard`, kept up to date without reloading them.
+
+Polling is layered so that an idle dashboard does almost no work: PRAGMA data_version on
+a connection of its own tells, without reading the database, whether anything committed;
+only then is the change_counter read, and only if that moved are the entries in the
+entry_change log fetched again.
+"""
+
+import os
+import sqlite3
+from collections.abc import Sequence
+from datetime import UTC, datetime, time
+from typing import NamedTuple
+
+from sqlalchemy import or_
+from sqlmodel import Session, col, select
+
+from jikan import models
+from jikan.core import changes
+from jikan.core.cache import Version, data_version
+from jikan.core.entry import ENTRY_LOAD_OPTIONS
+from jikan.lib.datetime import ensure_utc_aware, utc_now
+from jikan.models import ChangeReader, Entry, database_path, immediate
+
+RECENT_ENTRIES = 10
+# Readers are named after the process, so readers left behind by one that died can be found.
+READER_PREFIX = "dashboard-"
+
+
+class ProjectTotal(NamedTuple):
+    label: str
+    seconds: float
+    entries: int
+
+
+class DashboardView:
+    """Today's (UTC) entries, the `recent` latest ones and the running entry.
+
+    While open, the view is a reader of the entry_change log; call close() when done.
+    """
+
+    def __init__(self, recent: int = RECENT_ENTRIES) -> None:
+        self.recent = recent
+        self.reader = f"{READER_PREFIX}{os.getpid()}"
+        self.entries: dict[int, Entry] = {}
+        self.day = utc_now().date()
+        # Position of the oldest of the latest entries when loaded, None if there were fewer.
+        # Every entry from there on is loaded, and so is every entry changed since.
+        self.oldest: tuple[datetime, int] | None = None
+        self.seq = 0
+        self.version: Version | None = None
+        self._pragma: sqlite3.Connection | None = None
+        self._data_version: int | None = None
+
+    def load(self) -> None:
+        """Load every entry of the view and start following changes."""
+        self.day = utc_now().date()
+        latest = (
+            select(Entry.start_at, Entry.id)
+            .order_by(col(Entry.start_at).desc(), col(Entry.id).desc())
+            .limit(self.recent)
+        )
+        # The entries are read and the reader moved in one transaction, so no change is
+        # missed or applied twice; they stay loaded after the commit.
+        with Session(immediate(models.engine), expire_on_commit=False) as session:
+            _remove_dead_readers(session)
+            self.seq = changes.last_seq(session)
+            changes.set_reader_seq(session, self.reader, self.seq)
+            positions = session.exec(latest).all()
+            self.oldest = None if len(positions) < self.recent else tuple(positions[-1])
+            conditions = [col(Entry.start_at) >= self._day_start(), col(Entry.end_at).is_(None)]
+            if positions:
+                conditions.append(col(Entry.start_at) >= positions[-1][0])
+            statement = select(Entry).options(*ENTRY_LOAD_OPTIONS).where(or_(*conditions))
+            entries = session.exec(statement).all()
+            # Read while holding the write lock, so no commit can slip in between.
+            self.version = data_version()
+            session.commit()
+        self.entries = {entry.id: entry for entry in entries if entry.id is not None}
+
+    def refresh(self) -> bool:
+        """Apply what changed since the last call and return whether anything did."""
+        if utc_now().date() != self.day:
+            self.load()
+            return True
+        if not self._committed():
+            return False
+        if self.version is not None and data_version() == self.version:
+            return False
+
+        with Session(immediate(models.engine), expire_on_commit=False) as session:
+            if changes.reader_seq(session, self.reader) != self.seq:
+                # Not registered any more, so changes may have been missed.
+                session.rollback()
+                self.load()
+                return True
+            seq = changes.last_seq(session)
+            changed = set(session.exec(changes.changed_entries(self.seq)).all())
+            if not changed:
+                # Projects or tags changed, which may be shown with any entry.
+                changed = set(self.entries)
+            statement = select(Entry).options(*ENTRY_LOAD_OPTIONS).where(col(Entry.id).in_(changed))
+            entries = session.exec(statement).all()
+            changes.set_reader_seq(session, self.reader, seq)
+            self.version = data_version()
+            session.commit()
+        self.seq = seq
+
+        for id in changed:
+            self.entries.pop(id, None)
+        self.entries.update((entry.id, entry) for entry in entries if self._shown(entry))
+        if self.oldest is not None:
+            loaded = sum(_position(entry) >= self.oldest for entry in self.entries.values())
+            if loaded < self.recent:
+                # Entries were deleted or moved back, making room for ones never loaded.
+                self.load()
+        return True
+
+    def close(self) -> None:
+        if self._pragma is not None:
+            self._pragma.close()
+        changes.remove_reader(self.reader)
+
+    def running(self) -> Entry | None:
+        return next((entry for entry in self.entries.values() if entry.end_at is None), None)
+
+    def latest(self) -> Sequence[Entry]:
+        """The `recent` latest entries, latest first."""
+        return sorted(self.entries.values(), key=_position, reverse=True)[: self.recent]
+
+    def today(self, now: datetime) -> Sequence[ProjectTotal]:
+        """Time per project of the entries started today, counting the running one to `now`."""
+        totals: dict[str, list] = {}
+        for entry in self.entries.values():
+            if ensure_utc_aware(entry.start_at) < self._day_start():
+                continue
+            end_at = ensure_utc_aware(entry.end_at) if entry.end_at is not None else now
+            seconds = max((end_at - ensure_utc_aware(entry.start_at)).total_seconds(), 0)
+            label = entry.project.name if entry.project is not None else "(no project)"
+            total = totals.setdefault(label, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+        rows = [ProjectTotal(label, *total) for label, total in totals.items()]
+        return sorted(rows, key=lambda row: (-row.seconds, row.label))
+
+    def _day_start(self) -> datetime:
+        return datetime.combine(self.day, time(), UTC)
+
+    def _shown(self, entry: Entry) -> bool:
+        return (
+            self.oldest is None
+            or _position(entry) >= self.oldest
+            or entry.end_at is None
+            or ensure_utc_aware(entry.start_at) >= self._day_start()
+        )
+
+    def _committed(self) -> bool:
+        # This connection never writes, so its data_version changes only when another
+        # connection commits. Reading it does not touch the database file.
+        path = database_path(models.engine)
+        if path is None:
+            return True
+        if self._pragma is None:
+            self._pragma = sqlite3.connect(path, check_same_thread=False)
+        version = self._pragma.execute("PRAGMA data_version").fetchone()[0]
+        committed = version != self._data_version
+        self._data_version = version
+        return committed
+
+
+def _position(entry: Entry) -> tuple[datetime, int]:
+    return entry.start_at, entry.id or 0
+
+
+def _remove_dead_readers(session: Session) -> None:
+    names = session.exec(
+        select(ChangeReader.name).where(col(ChangeReader.name).startswith(READER_PREFIX))
+    ).all()
+    for name in names:
+        pid = name.removeprefix(READER_PREFIX)
+        if pid.isdigit() and not _alive(int(pid)):
+            session.delete(session.get(ChangeReader, name))
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
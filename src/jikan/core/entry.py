@@ -1,11 +1,54 @@
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
 from datetime import datetime, timedelta
+from typing import Any
 
+from sqlalchemy import Delete, Integer, Select, cast, delete, func, or_, true
+from sqlalchemy.dialects.sqlite import Insert, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, col, select
+from sqlmodel.sql.expression import SelectOfScalar
 
-from jikan.core.project import get_project
+from jikan import models
+from jikan.core import rollup
+from jikan.core.cache import result_cache
+from jikan.core.project import ProjectNotFoundError
+from jikan.core.tag import TagNotFoundError
 from jikan.lib.datetime import ensure_utc_aware, utc_now
-from jikan.models import Entry, engine
+from jikan.lib.state import RunningState, clear_running_state, write_running_state
+from jikan.models import (
+    Entry,
+    EntryTagLink,
+    Project,
+    Tag,
+    database_path,
+    entry_fts,
+    id_values,
+    immediate,
+    in_ids,
+)
+
+# Position of an entry in (start_at, id) order, used for keyset pagination.
+EntryCursor = tuple[datetime, int]
+
+# Loads an entry's project and tags along with it, one query each for any number of entries.
+ENTRY_LOAD_OPTIONS = (selectinload(Entry.project), selectinload(Entry.tags))
+
+# Columns yielded by iter_entry_rows, in order.
+ENTRY_ROW_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "start_at",
+    "end_at",
+    "duration_seconds",
+    "project_id",
+    "project",
+    "tags",
+)
+# Joins tag names in SQL; a control character cannot clash with a real tag name.
+_TAG_SEPARATOR = "\x1f"
+_ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 
 
 class EntryAlreadyRunningError(Exception):
@@ -21,8 +64,8 @@ class EntryNotFoundError(Exception):
 
 
 def get_entry(id: int) -> Entry:
-    with Session(engine) as session:
-        statement = select(Entry).where(Entry.id == id)
+    with Session(models.engine) as session:
+        statement = select(Entry).options(*ENTRY_LOAD_OPTIONS).where(Entry.id == id)
         entry = session.exec(statement).one_or_none()
         if entry is None:
             raise EntryNotFoundError
@@ -30,108 +73,553 @@ def get_entry(id: int) -> Entry:
 
 
 def edit_entry(
-    entry: Entry,
+    id: int,
     title: str | None = None,
     description: str | None = None,
     start_at: datetime | None = None,
     end_at: datetime | None = None,
     project_id: int | None = None,
+    tag_ids: Sequence[int] = (),
 ) -> Entry:
-    with Session(engine) as session:
-        db_entry = session.get(Entry, entry.id)
+    """Edit an entry, its rollup rows and the state file in a single transaction.
+
+    Tags in `tag_ids` are attached to the entry in addition to those it already has.
+    """
+    with Session(immediate(models.engine), expire_on_commit=False) as session:
+        db_entry = session.get(Entry, id)
         if db_entry is None:
             raise EntryNotFoundError
-
-        if title is not None:
-            db_entry.title = title
-        if description is not None:
-            db_entry.description = description
-
-        sa = db_entry.start_at if start_at is None else start_at
-        ea = db_entry.end_at if end_at is None else end_at
-        if ea is not None and sa > ea:
-            raise ValueError("Start time must be before or equal to end time.")
-
-        if start_at is not None:
-            db_entry.start_at = start_at
-        if end_at is not None:
-            db_entry.end_at = end_at
+        rollup.remove_entry(session, db_entry)
+        update_entry(db_entry, title, description, start_at, end_at)
 
         if project_id is not None:
-            project = get_project(project_id)
-            db_entry.project = project
+            if session.get(Project, project_id) is None:
+                raise ProjectNotFoundError
+            db_entry.project_id = project_id
+        if tag_ids:
+            check_tags_exist(session, tag_ids)
+            session.exec(link_tags_statement([id], tag_ids))
 
         session.add(db_entry)
-        session.commit()
-        session.refresh(db_entry)
-        return db_entry
+        session.flush()
+        rollup.add_entry(session, db_entry)
+        _commit_with_state(session)
+
+    return db_entry
 
 
-def delete_entry(entry: Entry) -> None:
-    with Session(engine) as session:
-        db_entry = session.get(Entry, entry.id)
+def update_entry(
+    entry: Entry,
+    title: str | None = None,
+    description: str | None = None,
+    start_at: datetime | None = None,
+    end_at: datetime | None = None,
+) -> None:
+    """Apply the given changes to `entry`, checking that it still starts before it ends."""
+    if title is not None:
+        entry.title = title
+    if description is not None:
+        entry.description = description
+
+    sa = entry.start_at if start_at is None else start_at
+    ea = entry.end_at if end_at is None else end_at
+    if ea is not None and sa > ea:
+        raise ValueError("Start time must be before or equal to end time.")
+
+    if start_at is not None:
+        entry.start_at = start_at
+    if end_at is not None:
+        entry.end_at = end_at
+
+
+def delete_entry(id: int) -> None:
+    with Session(immediate(models.engine)) as session:
+        db_entry = session.get(Entry, id)
         if db_entry is None:
             raise EntryNotFoundError
+        rollup.remove_entry(session, db_entry)
         session.delete(db_entry)
-        session.commit()
-
+        session.flush()
+        _commit_with_state(session)
 
-def start_time_entry(project_id: int | None, title: str, description: str) -> Entry:
-    running_entry = get_running_entry()
-    if running_entry != []:
-        raise EntryAlreadyRunningError("Time entry is already running.")
 
-    new_entry = Entry(
+def new_entry(project_id: int | None, title: str, description: str, now: datetime) -> Entry:
+    return Entry(
         project_id=project_id,
         title=title,
         description=description,
+        start_at=now,
+        created_at=now,
+        updated_at=now,
     )
-    with Session(engine) as session:
-        session.add(new_entry)
-        session.commit()
-        session.refresh(new_entry)
 
-    return new_entry
+
+def start_time_entry(
+    project_id: int | None, title: str, description: str, tag_ids: Sequence[int] = ()
+) -> Entry:
+    entry = new_entry(project_id, title, description, utc_now())
+    with Session(immediate(models.engine)) as session:
+        if session.exec(running_entry_statement().limit(1)).first() is not None:
+            raise EntryAlreadyRunningError("Time entry is already running.")
+        check_tags_exist(session, tag_ids)
+
+        session.add(entry)
+        try:
+            session.flush()
+        except IntegrityError as e:
+            raise EntryAlreadyRunningError("Time entry is already running.") from e
+        assert entry.id is not None
+        if tag_ids:
+            session.exec(link_tags_statement([entry.id], tag_ids))
+        _commit_with_state(session)
+        session.refresh(entry)
+
+    return entry
 
 
 def stop_time_entry() -> Entry:
-    running_entry = get_running_entry()
+    with Session(immediate(models.engine)) as session:
+        running_entry = session.exec(running_entry_statement()).all()
 
-    if len(running_entry) == 0:
-        raise EntryNotRunningError("No time entry running.")
-    elif len(running_entry) > 1:
-        raise RuntimeError("Multiple time entries running")
+        if len(running_entry) == 0:
+            raise EntryNotRunningError("No time entry running.")
+        elif len(running_entry) > 1:
+            raise RuntimeError("Multiple time entries running")
+
+        entry = running_entry[0]
+        close_entry(entry, utc_now())
+        session.add(entry)
+        rollup.add_entry(session, entry)
+        session.flush()
+        _commit_with_state(session)
+        session.refresh(entry)
+
+    return entry
 
-    entry = running_entry[0]
-    now = utc_now()
 
+def close_entry(entry: Entry, now: datetime) -> None:
     if ensure_utc_aware(entry.start_at) > now:
         raise RuntimeError(
             "Cannot stop: start time is in the future. Edit start_at to be <= now and retry."
         )
+    entry.end_at = now
+    entry.updated_at = now
+
+
+def switch_time_entry(
+    project_id: int | None,
+    title: str,
+    description: str,
+    tag_ids: Sequence[int] = (),
+) -> tuple[Entry | None, Entry]:
+    """Stop the running entry, if any, and start a new one in a single transaction.
+
+    Both use the same timestamp, so the entries are contiguous.
+    """
+    with Session(immediate(models.engine)) as session:
+        running_entry = session.exec(running_entry_statement()).all()
+        if len(running_entry) > 1:
+            raise RuntimeError("Multiple time entries running")
+
+        check_tags_exist(session, tag_ids)
+
+        now = utc_now()
+        stopped_entry = running_entry[0] if running_entry else None
+        if stopped_entry is not None:
+            close_entry(stopped_entry, now)
+            session.add(stopped_entry)
+            rollup.add_entry(session, stopped_entry)
+            # Close the running entry before inserting so the running-entry index stays valid.
+            session.flush()
+
+        started_entry = new_entry(project_id, title, description, now)
+        session.add(started_entry)
+        session.flush()
+        assert started_entry.id is not None
+        if tag_ids:
+            session.exec(link_tags_statement([started_entry.id], tag_ids))
+        _commit_with_state(session)
+
+        if stopped_entry is not None:
+            session.refresh(stopped_entry)
+        session.refresh(started_entry)
+
+    return stopped_entry, started_entry
+
+
+def attach_tags(entry_ids: Sequence[int], tag_ids: Sequence[int]) -> int:
+    """Attach every tag in `tag_ids` to every entry in `entry_ids`.
+
+    The links are written with a single INSERT ... ON CONFLICT DO NOTHING and the rollup
+    is adjusted with set-based statements, so retagging many entries costs a few queries.
+    Returns the number of links added.
+    """
+    with Session(immediate(models.engine)) as session:
+        check_entries_exist(session, entry_ids)
+        check_tags_exist(session, tag_ids)
+        rollup.remove_entry_ids(session, entry_ids)
+        added = session.exec(link_tags_statement(entry_ids, tag_ids)).rowcount
+        rollup.add_entry_ids(session, entry_ids)
+        session.commit()
+    return added
 
-    with Session(engine) as session:
-        entry.end_at = now
-        entry.updated_at = now
-        session.add(entry)
+
+def detach_tags(entry_ids: Sequence[int], tag_ids: Sequence[int]) -> int:
+    """Detach every tag in `tag_ids` from every entry in `entry_ids`.
+
+    Returns the number of links removed; tags that were not attached are skipped.
+    """
+    with Session(immediate(models.engine)) as session:
+        check_entries_exist(session, entry_ids)
+        check_tags_exist(session, tag_ids)
+        rollup.remove_entry_ids(session, entry_ids)
+        removed = session.exec(unlink_tags_statement(entry_ids, tag_ids)).rowcount
+        rollup.add_entry_ids(session, entry_ids)
         session.commit()
-        session.refresh(entry)
+    return removed
+
+
+def link_tags_statement(entry_ids: Sequence[int], tag_ids: Sequence[int]) -> Insert:
+    """Insert a link for each pair of entry and tag, skipping the ones that exist."""
+    pairs = (
+        select(col(Entry.id), col(Tag.id))
+        .join(Tag, true())
+        .where(in_ids(col(Entry.id), entry_ids), in_ids(col(Tag.id), tag_ids))
+    )
+    return (
+        insert(EntryTagLink)
+        .from_select(["entry_id", "tag_id"], pairs)
+        .on_conflict_do_nothing(index_elements=["entry_id", "tag_id"])
+    )
+
+
+def unlink_tags_statement(entry_ids: Sequence[int], tag_ids: Sequence[int]) -> Delete:
+    return delete(EntryTagLink).where(
+        in_ids(col(EntryTagLink.entry_id), entry_ids), in_ids(col(EntryTagLink.tag_id), tag_ids)
+    )
+
+
+def missing_ids_statement(column: Any, ids: Sequence[int]) -> Select:
+    """Select the ids in `ids` that `column` does not contain."""
+    values = id_values(ids)
+    return select(values.c.value).where(values.c.value.not_in(select(column)))
+
+
+def check_entries_exist(session: Session, entry_ids: Sequence[int]) -> None:
+    missing = session.exec(missing_ids_statement(col(Entry.id), entry_ids)).all()
+    if missing:
+        raise EntryNotFoundError(", ".join(map(str, missing)))
+
+
+def check_tags_exist(session: Session, tag_ids: Sequence[int]) -> None:
+    if not tag_ids:
+        return
+    missing = session.exec(missing_ids_statement(col(Tag.id), tag_ids)).all()
+    if missing:
+        raise TagNotFoundError(", ".join(map(str, missing)))
+
+
+def running_state_statement() -> Select[tuple[Entry, Project | None]]:
+    """Select the running entry together with its project, if any."""
+    return (
+        select(Entry, Project)
+        .outerjoin(Project, col(Project.id) == col(Entry.project_id))
+        .where(col(Entry.end_at).is_(None))
+    )
+
+
+def load_running_state() -> RunningState | None:
+    """Read the running entry from the database and rewrite the state file with it."""
+    # Under the write lock, so that no writer commits a newer state in between.
+    with Session(immediate(models.engine)) as session:
+        state = running_state_from_rows(session.exec(running_state_statement()).all())
+        _write_running_state(state)
+    return state
+
+
+def running_state_from_rows(rows: Sequence[tuple[Entry, Project | None]]) -> RunningState | None:
+    """The state of the running entry, given the rows of running_state_statement()."""
+    if len(rows) > 1:
+        raise RuntimeError("Multiple time entries running")
+    return to_running_state(*rows[0]) if rows else None
+
+
+def to_running_state(entry: Entry | None, project: Project | None = None) -> RunningState | None:
+    if entry is None:
+        return None
+    assert entry.id is not None
+    return RunningState(
+        id=entry.id,
+        title=entry.title,
+        description=entry.description,
+        project=project.name if project is not None else None,
+        start_at=ensure_utc_aware(entry.start_at).timestamp(),
+    )
+
+
+def _commit_with_state(session: Session) -> None:
+    # The state file is written before the commit, while this transaction holds the write
+    # lock, so writers that overlap rewrite it in the order they commit.
+    _write_running_state(running_state_from_rows(session.exec(running_state_statement()).all()))
+    try:
+        session.commit()
+    except BaseException:
+        _clear_running_state()
+        raise
+
+
+def _write_running_state(state: RunningState | None) -> None:
+    db_path = database_path(models.engine)
+    if db_path is not None:
+        write_running_state(db_path, state)
+
+
+def _clear_running_state() -> None:
+    db_path = database_path(models.engine)
+    if db_path is not None:
+        clear_running_state(db_path)
 
-    return entry
+
+def running_entry_statement() -> SelectOfScalar[Entry]:
+    return select(Entry).where(col(Entry.end_at).is_(None))
 
 
 def get_running_entry() -> Sequence[Entry]:
-    with Session(engine) as session:
-        statement = select(Entry).where(col(Entry.end_at).is_(None))
-        entries = session.exec(statement).all()
+    with Session(models.engine) as session:
+        entries = session.exec(running_entry_statement()).all()
         return entries
 
 
-def list_time_entry() -> Sequence[Entry]:
-    with Session(engine) as session:
-        statement = select(Entry)
-        time_entries = session.exec(statement).all()
-        return time_entries
+def filter_entries[S: Select](
+    statement: S,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+) -> S:
+    """Restrict a statement selecting from `entry` to the given filters.
+
+    `since` is inclusive and `until` exclusive, both compared with start_at. An entry
+    matches `tag_ids` if it has any of the tags.
+    """
+    if since is not None:
+        statement = statement.where(col(Entry.start_at) >= since)
+    if until is not None:
+        statement = statement.where(col(Entry.start_at) < until)
+    if project_ids:
+        statement = statement.where(col(Entry.project_id).in_(project_ids))
+    if tag_ids:
+        tagged = select(EntryTagLink.entry_id).where(col(EntryTagLink.tag_id).in_(tag_ids))
+        statement = statement.where(col(Entry.id).in_(tagged))
+    return statement
+
+
+def list_entry_statement(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+    after: EntryCursor | None = None,
+    limit: int | None = None,
+) -> SelectOfScalar[Entry]:
+    """Select entries matching the filters in (start_at, id) order, starting after `after`.
+
+    Projects and tags are loaded per batch of entries, so they can be read after the session
+    is closed.
+    """
+    statement = filter_entries(
+        select(Entry).options(*ENTRY_LOAD_OPTIONS), since, until, project_ids, tag_ids
+    )
+    if after is not None:
+        start_at, id = after
+        statement = statement.where(
+            col(Entry.start_at) >= start_at,
+            or_(col(Entry.start_at) > start_at, col(Entry.id) > id),
+        )
+    return statement.order_by(col(Entry.start_at), col(Entry.id)).limit(limit)
+
+
+def iter_time_entry(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+    after: EntryCursor | None = None,
+    limit: int | None = None,
+    batch_size: int = 500,
+) -> Iterator[Entry]:
+    """Yield entries in (start_at, id) order, fetching `batch_size` rows at a time.
+
+    Pass the cursor of the last entry of a page as `after` to get the next page.
+    """
+    statement = list_entry_statement(since, until, project_ids, tag_ids, after, limit)
+    with Session(models.engine) as session:
+        yield from session.exec(statement.execution_options(yield_per=batch_size))
+
+
+def iter_entry_rows(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+    tag_separator: str | None = None,
+    limit: int | None = None,
+    batch_size: int = 5000,
+) -> Iterator[tuple]:
+    """Yield flat rows of ENTRY_ROW_FIELDS in (start_at, id) order without loading models.
+
+    Project and tag names are joined and timestamps formatted as ISO 8601 UTC by SQLite, so
+    each row costs one tuple in Python. `tags` is a tuple of names, or a single string
+    joined with `tag_separator` when one is given. `end_at` and `duration_seconds` are None
+    for the running entry.
+    """
+    tag_names = (
+        select(func.group_concat(Tag.name, tag_separator or _TAG_SEPARATOR))
+        .join(EntryTagLink, col(EntryTagLink.tag_id) == col(Tag.id))
+        .where(col(EntryTagLink.entry_id) == col(Entry.id))
+        .scalar_subquery()
+    )
+    statement = (
+        select(
+            col(Entry.id),
+            col(Entry.title),
+            col(Entry.description),
+            func.strftime(_ISO_FORMAT, Entry.start_at),
+            func.strftime(_ISO_FORMAT, Entry.end_at),
+            cast(
+                func.round((func.julianday(Entry.end_at) - func.julianday(Entry.start_at)) * 86400),
+                Integer,
+            ),
+            col(Entry.project_id),
+            col(Project.name),
+            tag_names,
+        )
+        .outerjoin(Project, col(Project.id) == col(Entry.project_id))
+        .order_by(col(Entry.start_at), col(Entry.id))
+    )
+    statement = filter_entries(statement, since, until, project_ids, tag_ids)
+    if limit is not None:
+        statement = statement.limit(limit)
+
+    with models.engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+            statement
+        )
+        if tag_separator is not None:
+            yield from result.tuples()
+            return
+        for *row, tags in result:
+            yield (*row, tuple(tags.split(_TAG_SEPARATOR)) if tags else ())
+
+
+def entry_cursor(entry: Entry) -> EntryCursor:
+    assert entry.id is not None
+    return entry.start_at, entry.id
+
+
+def list_time_entry(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+    after: EntryCursor | None = None,
+    limit: int | None = None,
+    use_cache: bool = True,
+) -> Sequence[Entry]:
+    """A page of entries, see iter_time_entry().
+
+    Pages, i.e. calls with a `limit`, are kept in the result cache until the data changes,
+    unless `use_cache=False`. The entries may then be shared with other callers.
+    """
+    project_ids, tag_ids = tuple(project_ids), tuple(tag_ids)
+
+    def page() -> list[Entry]:
+        return list(iter_time_entry(since, until, project_ids, tag_ids, after, limit))
+
+    if not use_cache or limit is None:
+        return page()
+    key = ("list_time_entry", since, until, project_ids, tag_ids, after, limit)
+    return list(result_cache().get(key, page))
+
+
+def iter_entry_pages(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+    page_size: int = 100,
+    limit: int | None = None,
+) -> Iterator[Sequence[Entry]]:
+    """Yield pages of up to `page_size` entries in (start_at, id) order, `limit` in all.
+
+    Each page is a keyset-paginated query, made only when the previous page has been
+    consumed; no page is kept, so memory use does not grow with the number of entries.
+    """
+    after = None
+    while limit is None or limit > 0:
+        size = page_size if limit is None else min(page_size, limit)
+        page = list_time_entry(since, until, project_ids, tag_ids, after, size, use_cache=False)
+        if page:
+            yield page
+        if len(page) < size:
+            return
+        after = entry_cursor(page[-1])
+        if limit is not None:
+            limit -= len(page)
+
+
+def list_widths() -> tuple[int, int]:
+    """Lengths of the largest entry id and of the longest project name.
+
+    Both are cheap whatever the history: max(id) is read off the end of the primary key,
+    and projects are few.
+    """
+    with Session(models.engine) as session:
+        max_id = session.exec(select(func.max(Entry.id))).one()
+        longest = session.exec(select(func.max(func.length(Project.name)))).one()
+    return len(str(max_id or 0)), longest or 0
+
+
+def match_query(text: str) -> str:
+    """Turn search terms into an FTS5 query for entries containing all of them.
+
+    Each term is quoted, so punctuation in it is matched literally rather than parsed as
+    query syntax. A term ending in `*` matches any word starting with it.
+    """
+    terms = []
+    for term in text.split():
+        prefix = "*" if term.endswith("*") else ""
+        term = term.rstrip("*")
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"' + prefix)
+    return " ".join(terms)
+
+
+def search_time_entry(
+    text: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+    limit: int | None = None,
+) -> Sequence[Entry]:
+    """Entries whose title or description match the search terms, most relevant first.
+
+    See match_query() for the terms and filter_entries() for the filters.
+    """
+    query = match_query(text)
+    if not query:
+        return []
+    statement = (
+        select(Entry)
+        .options(*ENTRY_LOAD_OPTIONS)
+        .join(entry_fts, entry_fts.c.rowid == col(Entry.id))
+        .where(entry_fts.c.entry_fts.match(query))
+    )
+    statement = filter_entries(statement, since, until, project_ids, tag_ids)
+    statement = statement.order_by(entry_fts.c.rank, col(Entry.start_at).desc()).limit(limit)
+    with Session(models.engine) as session:
+        return session.exec(statement).all()
 
 
 def running_time(entry: Entry) -> timedelta:
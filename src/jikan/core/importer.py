@@ -0,0 +1,200 @@
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, select
+
+from jikan import models
+from jikan.core import rollup
+from jikan.lib.datetime import utc_now
+from jikan.lib.importer import ImportItem, ImportRecord, RejectedRow
+from jikan.models import Entry, EntryTagLink, ImportJob, Project, Tag, immediate
+
+# Records per transaction. Each chunk is committed together with the job's position, so an
+# interrupted import loses at most one chunk of work and resumes right after the last one.
+IMPORT_CHUNK_SIZE = 2000
+
+
+class ImportAlreadyDoneError(Exception):
+    pass
+
+
+class ImportSummary(NamedTuple):
+    job: ImportJob
+    skipped: int  # records already imported by an earlier, interrupted run
+    imported: int
+    rejected: list[RejectedRow]
+
+
+def import_entries(
+    items: Iterable[ImportItem],
+    digest: str,
+    source: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    restart: bool = False,
+    progress: Callable[[ImportJob], None] | None = None,
+) -> ImportSummary:
+    """Insert finished time entries in chunked transactions.
+
+    Projects and tags are matched by name and created when missing. Progress is recorded per
+    source `digest`: importing the same source again resumes after the last committed chunk,
+    and fails with ImportAlreadyDoneError once it completed, unless `restart` is set.
+    """
+    job = _start_job(digest, source, restart)
+    position = job.position
+    names = _NameMaps.load()
+
+    skipped = imported = 0
+    rejected: list[RejectedRow] = []
+    chunk: list[ImportRecord] = []
+    chunk_rejected = 0
+    last_line = position
+    for item in items:
+        if item.line <= position:
+            skipped += 1
+            continue
+        last_line = item.line
+        if isinstance(item, RejectedRow):
+            rejected.append(item)
+            chunk_rejected += 1
+        else:
+            chunk.append(item)
+        if len(chunk) + chunk_rejected >= chunk_size:
+            job = _write_chunk(job, names, chunk, chunk_rejected, last_line, finished=False)
+            imported += len(chunk)
+            chunk, chunk_rejected = [], 0
+            if progress is not None:
+                progress(job)
+
+    job = _write_chunk(job, names, chunk, chunk_rejected, last_line, finished=True)
+    imported += len(chunk)
+    if progress is not None:
+        progress(job)
+    return ImportSummary(job=job, skipped=skipped, imported=imported, rejected=rejected)
+
+
+def _start_job(digest: str, source: str, restart: bool) -> ImportJob:
+    with Session(immediate(models.engine)) as session:
+        job = session.exec(select(ImportJob).where(ImportJob.digest == digest)).one_or_none()
+        if job is None:
+            job = ImportJob(digest=digest, source=source)
+        elif restart:
+            job.position = job.imported = job.rejected = 0
+            job.finished_at = None
+        elif job.finished_at is not None:
+            raise ImportAlreadyDoneError(f"{job.source} was already imported")
+        job.source = source
+        job.updated_at = utc_now()
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        return job
+
+
+def _write_chunk(
+    job: ImportJob,
+    names: "_NameMaps",
+    records: list[ImportRecord],
+    rejected: int,
+    position: int,
+    finished: bool,
+) -> ImportJob:
+    now = utc_now()
+    project_ids: dict[str | None, int] = {}
+    tag_ids: dict[str | None, int] = {}
+    with Session(immediate(models.engine)) as session:
+        if records:
+            project_ids = names.resolve(session, Project, {r.project for r in records}, now)
+            tag_ids = names.resolve(session, Tag, {t for r in records for t in r.tags}, now)
+
+            # Ids are assigned here so that entries and their tag links can both be inserted
+            # with executemany; BEGIN IMMEDIATE keeps other writers out until commit. The
+            # inserts target the tables rather than the models to skip ORM bulk processing.
+            first_id = session.exec(select(func.coalesce(func.max(Entry.id), 0))).one() + 1
+            connection = session.connection()
+            connection.execute(
+                insert(Entry.__table__),
+                [
+                    {
+                        "id": id,
+                        "title": r.title,
+                        "description": r.description,
+                        "start_at": r.start_at,
+                        "end_at": r.end_at,
+                        "created_at": now,
+                        "updated_at": now,
+                        "project_id": project_ids.get(r.project),
+                    }
+                    for id, r in enumerate(records, start=first_id)
+                ],
+            )
+            links = [
+                {"entry_id": id, "tag_id": tag_ids[name]}
+                for id, r in enumerate(records, start=first_id)
+                for name in r.tags
+            ]
+            if links:
+                connection.execute(insert(EntryTagLink.__table__), links)
+            rollup.add_entries(session, first_id, first_id + len(records) - 1)
+
+        db_job = session.get(ImportJob, job.id)
+        assert db_job is not None
+        db_job.position = position
+        db_job.imported += len(records)
+        db_job.rejected += rejected
+        db_job.updated_at = now
+        if finished:
+            db_job.finished_at = now
+        session.add(db_job)
+        session.commit()
+        session.refresh(db_job)
+
+    # Only remember ids once they are committed, so a failed chunk leaves no stale ones.
+    names.remember(Project, project_ids)
+    names.remember(Tag, tag_ids)
+    return db_job
+
+
+class _NameMaps:
+    """Ids of projects and tags by name, loaded once and extended as chunks create more."""
+
+    def __init__(self) -> None:
+        self.ids: dict[type[Project] | type[Tag], dict[str, int]] = {}
+
+    @classmethod
+    def load(cls) -> "_NameMaps":
+        maps = cls()
+        with Session(models.engine) as session:
+            for model in (Project, Tag):
+                rows = session.exec(select(model.name, model.id)).all()
+                maps.ids[model] = {name: id for name, id in rows if id is not None}
+        return maps
+
+    def remember(self, model: type[Project] | type[Tag], ids: dict[str | None, int]) -> None:
+        self.ids[model].update((name, id) for name, id in ids.items() if name is not None)
+
+    def resolve(
+        self,
+        session: Session,
+        model: type[Project] | type[Tag],
+        names: set[str | None],
+        now: datetime,
+    ) -> dict[str | None, int]:
+        """Ids of `names`, creating the missing rows in the session's transaction."""
+        known = self.ids[model]
+        resolved: dict[str | None, int] = {n: known[n] for n in names if n in known}
+        missing = sorted(name for name in names if name is not None and name not in known)
+        if missing:
+            values: dict = {"created_at": now}
+            if model is Project:
+                values |= {"description": "", "archived": False, "updated_at": now}
+            # Another process may have created some of them since the maps were loaded.
+            statement = insert(model).on_conflict_do_nothing(index_elements=["name"])
+            session.exec(statement, params=[{"name": name, **values} for name in missing])
+            found = session.exec(
+                select(model.name, model.id).where(col(model.name).in_(missing))
+            ).all()
+            resolved.update((name, id) for name, id in found if id is not None)
+        return resolved
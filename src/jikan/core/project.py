@@ -1,26 +1,44 @@
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
 
 from sqlmodel import Session, select
+from sqlmodel.sql.expression import SelectOfScalar
 
-from jikan.models import Project, engine
+from jikan import models
+from jikan.core import rollup
+from jikan.lib.state import clear_running_state
+from jikan.models import Project, database_path, immediate
+
+PROJECT_ROW_FIELDS = ("id", "name", "description")
 
 
 class ProjectNotFoundError(Exception):
     pass
 
 
+def list_project_statement() -> SelectOfScalar[Project]:
+    return select(Project).where(Project.archived == False)  # noqa E712
+
+
 def list_project() -> Sequence[Project]:
-    with Session(engine) as session:
-        statement = select(Project).where(Project.archived == False)  # noqa E712
-        projects = session.exec(statement).all()
+    with Session(models.engine) as session:
+        projects = session.exec(list_project_statement()).all()
         return projects
 
 
+def iter_project_rows() -> Iterator[tuple]:
+    """Yield PROJECT_ROW_FIELDS of the projects listed by list_project, without models."""
+    statement = select(Project.id, Project.name, Project.description).where(
+        Project.archived == False  # noqa E712
+    )
+    with models.engine.connect() as conn:
+        yield from conn.execute(statement).tuples()
+
+
 def add_project(name: str, description: str) -> Project:
     if not name:
         raise ValueError("name should not be empty")
     new_project = Project(name=name, description=description)
-    with Session(engine) as session:
+    with Session(models.engine) as session:
         session.add(new_project)
         session.commit()
         session.refresh(new_project)
@@ -28,7 +46,7 @@ def add_project(name: str, description: str) -> Project:
 
 
 def get_project(id: int) -> Project:
-    with Session(engine) as session:
+    with Session(models.engine) as session:
         statement = select(Project).where(Project.id == id)
         project = session.exec(statement).one_or_none()
         if project is None:
@@ -36,18 +54,20 @@ def get_project(id: int) -> Project:
         return project
 
 
-def delete_project(project: Project) -> None:
-    with Session(engine) as session:
-        db_project = session.get(Project, project.id)
+def delete_project(id: int) -> None:
+    with Session(immediate(models.engine)) as session:
+        db_project = session.get(Project, id)
         if db_project is None:
             raise ProjectNotFoundError
+        rollup.remove_project(session, db_project.id)
         session.delete(db_project)
         session.commit()
+    _clear_running_state()
 
 
-def edit_project(project: Project, name: str | None, description: str | None) -> Project:
-    with Session(engine) as session:
-        db_project = session.get(Project, project.id)
+def edit_project(id: int, name: str | None, description: str | None) -> Project:
+    with Session(models.engine) as session:
+        db_project = session.get(Project, id)
         if db_project is None:
             raise ProjectNotFoundError
         if name is not None:
@@ -57,12 +77,13 @@ def edit_project(project: Project, name: str | None, description: str | None) ->
         session.add(db_project)
         session.commit()
         session.refresh(db_project)
-        return db_project
+    _clear_running_state()
+    return db_project
 
 
-def set_project_archived(project: Project, is_archived: bool) -> Project:
-    with Session(engine) as session:
-        db_project = session.get(Project, project.id)
+def set_project_archived(id: int, is_archived: bool) -> Project:
+    with Session(models.engine) as session:
+        db_project = session.get(Project, id)
         if db_project is None:
             raise ProjectNotFoundError
         db_project.archived = is_archived
@@ -70,3 +91,10 @@ def set_project_archived(project: Project, is_archived: bool) -> Project:
         session.commit()
         session.refresh(db_project)
         return db_project
+
+
+def _clear_running_state() -> None:
+    # The running entry's project name may have changed; the next reader reloads it.
+    db_path = database_path(models.engine)
+    if db_path is not None:
+        clear_running_state(db_path)
@@ -0,0 +1,200 @@
+from collections.abc import Iterable, Sequence
+from datetime import datetime, time
+
+from sqlalchemy import DateTime, Integer, Select, cast, func, literal
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session, col, select
+
+from jikan import models
+from jikan.core import rollup
+from jikan.core.cache import result_cache
+from jikan.core.entry import filter_entries
+from jikan.lib.datetime import utc_now
+from jikan.lib.report import ReportGroup, ReportRow
+from jikan.models import DailyRollup, Entry, EntryTagLink, Project, Tag
+
+NO_PROJECT_LABEL = "(no project)"
+NO_TAG_LABEL = "(no tag)"
+
+
+def duration_seconds(now: datetime) -> ColumnElement[float]:
+    """Length of an entry in seconds, counting a running entry up to `now`."""
+    end_at = func.coalesce(Entry.end_at, literal(now, DateTime))
+    seconds = (func.julianday(end_at) - func.julianday(Entry.start_at)) * 86400
+    return func.max(seconds, 0)
+
+
+def period_label(group_by: ReportGroup, day: ColumnElement) -> ColumnElement[str]:
+    """Label of the day, ISO week or month that the date or datetime `day` falls in."""
+    if group_by is ReportGroup.day:
+        return func.strftime("%Y-%m-%d", day)
+    if group_by is ReportGroup.month:
+        return func.strftime("%Y-%m", day)
+    # The ISO week is the one containing the Thursday of the Monday-based week.
+    thursday = func.date(day, "-3 days", "weekday 4")
+    week = (cast(func.strftime("%j", thursday), Integer) - 1) / 7 + 1
+    return func.printf("%s-W%02d", func.strftime("%Y", thursday), week)
+
+
+def report(
+    group_by: ReportGroup,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    project_ids: Sequence[int] = (),
+    tag_ids: Sequence[int] = (),
+    use_rollup: bool = True,
+    use_cache: bool = True,
+) -> Sequence[ReportRow]:
+    """Total tracked time per group, computed by SQLite.
+
+    Entries are attributed to the UTC period they start in. Grouping by tag counts an entry
+    once for every tag it has, so tag totals can add up to more than the tracked time.
+
+    Finished entries are read from the daily rollup when the filters line up with it, i.e.
+    whole days and at most one tag; otherwise, or with `use_rollup=False`, every entry is
+    aggregated. Their totals are kept in the result cache until the data changes, so only
+    the running entry is queried again, unless `use_cache=False`.
+    """
+    now = utc_now()
+    project_ids, tag_ids = tuple(project_ids), tuple(tag_ids)
+
+    def finished() -> list[tuple]:
+        if use_rollup and _rollup_applies(group_by, since, until, tag_ids):
+            rows = _rollup_report(group_by, since, until, project_ids, tag_ids)
+        else:
+            rows = _entry_report(group_by, now, since, until, project_ids, tag_ids, running=False)
+        return [tuple(row) for row in rows]
+
+    key = ("report", group_by, since, until, project_ids, tag_ids, use_rollup)
+    rows = [
+        *(result_cache().get(key, finished) if use_cache else finished()),
+        *_entry_report(group_by, now, since, until, project_ids, tag_ids, running=True),
+    ]
+    return merge_rows(group_by, rows)
+
+
+def _rollup_applies(
+    group_by: ReportGroup,
+    since: datetime | None,
+    until: datetime | None,
+    tag_ids: Sequence[int],
+) -> bool:
+    whole_days = all(bound is None or bound.time() == time() for bound in (since, until))
+    if group_by is ReportGroup.tag:
+        return whole_days and not tag_ids
+    return whole_days and len(tag_ids) <= 1
+
+
+def _entry_report(
+    group_by: ReportGroup,
+    now: datetime,
+    since: datetime | None,
+    until: datetime | None,
+    project_ids: Sequence[int],
+    tag_ids: Sequence[int],
+    running: bool | None = None,
+) -> Iterable[tuple]:
+    seconds = func.sum(duration_seconds(now))
+    entries = func.count(col(Entry.id))
+
+    statement: Select
+    if group_by is ReportGroup.project:
+        statement = (
+            select(col(Project.id), func.coalesce(Project.name, NO_PROJECT_LABEL), seconds, entries)
+            .select_from(Entry)
+            .outerjoin(Project, col(Project.id) == col(Entry.project_id))
+            .group_by(col(Project.id))
+        )
+    elif group_by is ReportGroup.tag:
+        statement = (
+            select(col(Tag.id), func.coalesce(Tag.name, NO_TAG_LABEL), seconds, entries)
+            .select_from(Entry)
+            .outerjoin(EntryTagLink, col(EntryTagLink.entry_id) == col(Entry.id))
+            .outerjoin(Tag, col(Tag.id) == col(EntryTagLink.tag_id))
+            .group_by(col(Tag.id))
+        )
+    else:
+        label = period_label(group_by, col(Entry.start_at))
+        statement = select(label.label("key"), label.label("label"), seconds, entries).group_by(
+            label
+        )
+
+    statement = filter_entries(statement, since, until, project_ids, tag_ids)
+    if running is not None:
+        statement = statement.where(
+            col(Entry.end_at).is_(None) if running else col(Entry.end_at).isnot(None)
+        )
+
+    with Session(models.engine) as session:
+        return session.exec(statement).all()
+
+
+def _rollup_report(
+    group_by: ReportGroup,
+    since: datetime | None,
+    until: datetime | None,
+    project_ids: Sequence[int],
+    tag_ids: Sequence[int],
+) -> Iterable[tuple]:
+    seconds = func.sum(DailyRollup.seconds)
+    entries = func.sum(DailyRollup.entries)
+
+    statement: Select
+    if group_by is ReportGroup.project:
+        statement = (
+            select(col(Project.id), func.coalesce(Project.name, NO_PROJECT_LABEL), seconds, entries)
+            .select_from(DailyRollup)
+            .outerjoin(Project, col(Project.id) == col(DailyRollup.project_id))
+            .group_by(col(Project.id))
+        )
+    elif group_by is ReportGroup.tag:
+        statement = (
+            select(col(Tag.id), func.coalesce(Tag.name, NO_TAG_LABEL), seconds, entries)
+            .select_from(DailyRollup)
+            .outerjoin(Tag, col(Tag.id) == col(DailyRollup.tag_id))
+            .where(col(DailyRollup.tag_id) != rollup.ALL_TAGS)
+            .group_by(col(Tag.id))
+        )
+    else:
+        label = period_label(group_by, col(DailyRollup.day))
+        statement = select(label.label("key"), label.label("label"), seconds, entries).group_by(
+            label
+        )
+
+    if group_by is not ReportGroup.tag:
+        statement = statement.where(
+            col(DailyRollup.tag_id) == (tag_ids[0] if tag_ids else rollup.ALL_TAGS)
+        )
+    if since is not None:
+        statement = statement.where(col(DailyRollup.day) >= since.date().isoformat())
+    if until is not None:
+        statement = statement.where(col(DailyRollup.day) < until.date().isoformat())
+    if project_ids:
+        statement = statement.where(col(DailyRollup.project_id).in_(project_ids))
+
+    with Session(models.engine) as session:
+        return session.exec(statement).all()
+
+
+def merge_rows(group_by: ReportGroup, rows: Iterable[tuple]) -> Sequence[ReportRow]:
+    """Add up (key, label, seconds, entries) rows of the same group and sort the groups."""
+    totals: dict[tuple, list] = {}
+    for key, label, seconds, entries in rows:
+        total = totals.setdefault((key, label), [0.0, 0])
+        total[0] += seconds or 0
+        total[1] += entries
+    merged = [
+        ReportRow(
+            key=None if key is None else str(key),
+            label=label,
+            seconds=round(seconds),
+            entries=entries,
+        )
+        for (key, label), (seconds, entries) in totals.items()
+        if entries
+    ]
+    if group_by in (ReportGroup.project, ReportGroup.tag):
+        merged.sort(key=lambda row: (-row.seconds, row.label))
+    else:
+        merged.sort(key=lambda row: row.label)
+    return merged
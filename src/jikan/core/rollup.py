@@ -0,0 +1,184 @@
+"""Incremental maintenance of the daily_rollup summary table.
+
+Every finished entry contributes its duration to the day its start_at falls on (UTC):
+
+- one row with tag_id ALL_TAGS, used for project and period totals, and
+- one row per tag of the entry, or one row with tag_id NO_TAG if it has none.
+
+project_id is NO_PROJECT for entries without an (existing) project. These are the same
+attribution rules as the queries in jikan.core.report, so both give the same totals.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import Float, Select, delete, func, literal, true, union_all
+from sqlalchemy.dialects.sqlite import Insert, insert
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session, col, select
+
+from jikan import models
+from jikan.lib.datetime import ensure_utc_aware
+from jikan.models import DailyRollup, Entry, EntryTagLink, Project, Tag, immediate, in_ids
+
+NO_PROJECT = 0
+ALL_TAGS = 0
+NO_TAG = -1
+
+ROLLUP_COLUMNS = ["day", "project_id", "tag_id", "seconds", "entries"]
+
+
+def add_entry(session: Session, entry: Entry) -> None:
+    """Add a finished entry's duration to the rollup."""
+    _apply(session, entry, 1)
+
+
+def remove_entry(session: Session, entry: Entry) -> None:
+    """Take a finished entry's duration out of the rollup."""
+    _apply(session, entry, -1)
+
+
+def _apply(session: Session, entry: Entry, sign: int) -> None:
+    if entry.end_at is None:
+        return
+    start_at = ensure_utc_aware(entry.start_at)
+    seconds = max((ensure_utc_aware(entry.end_at) - start_at).total_seconds(), 0)
+    day = start_at.date().isoformat()
+
+    project_id = NO_PROJECT
+    if entry.project_id is not None and session.get(Project, entry.project_id) is not None:
+        project_id = entry.project_id
+    tag_ids = session.exec(
+        select(func.coalesce(Tag.id, NO_TAG))
+        .select_from(EntryTagLink)
+        .outerjoin(Tag, col(Tag.id) == col(EntryTagLink.tag_id))
+        .where(col(EntryTagLink.entry_id) == entry.id)
+    ).all() or [NO_TAG]
+
+    _upsert(
+        session,
+        [
+            {
+                "day": day,
+                "project_id": project_id,
+                "tag_id": tag_id,
+                "seconds": sign * seconds,
+                "entries": sign,
+            }
+            for tag_id in [ALL_TAGS, *tag_ids]
+        ],
+    )
+    if sign < 0:
+        session.exec(delete(DailyRollup).where(col(DailyRollup.entries) <= 0))
+
+
+def _upsert(session: Session, rows: list[dict]) -> None:
+    session.exec(_accumulate(insert(DailyRollup)), params=rows)
+
+
+def _accumulate(statement: Insert) -> Insert:
+    """Add inserted rows onto existing rollup rows for the same day, project and tag."""
+    return statement.on_conflict_do_update(
+        index_elements=["day", "project_id", "tag_id"],
+        set_={
+            "seconds": DailyRollup.seconds + statement.excluded.seconds,
+            "entries": DailyRollup.entries + statement.excluded.entries,
+        },
+    )
+
+
+def _move(session: Session, column: InstrumentedAttribute[int], old_id: int, new_id: int) -> None:
+    rows = session.exec(select(DailyRollup).where(column == old_id)).all()
+    if not rows:
+        return
+    moved = [{**row.model_dump(), column.key: new_id} for row in rows]
+    session.exec(delete(DailyRollup).where(column == old_id))
+    _upsert(session, moved)
+
+
+def remove_project(session: Session, project_id: int) -> None:
+    """Attribute a deleted project's time to NO_PROJECT, as reports on `entry` do."""
+    _move(session, col(DailyRollup.project_id), project_id, NO_PROJECT)
+
+
+def add_entries(session: Session, first_id: int, last_id: int) -> None:
+    """Add the finished entries with ids in [first_id, last_id] to the rollup in one statement.
+
+    Used after bulk inserts, where calling add_entry per entry would cost several queries each.
+    """
+    _apply_aggregate(session, col(Entry.id).between(first_id, last_id), 1)
+
+
+def add_entry_ids(session: Session, entry_ids: Iterable[int]) -> None:
+    """Add the finished entries among `entry_ids` to the rollup in one statement."""
+    _apply_aggregate(session, in_ids(col(Entry.id), entry_ids), 1)
+
+
+def remove_entry_ids(session: Session, entry_ids: Iterable[int]) -> None:
+    """Take the finished entries among `entry_ids` out of the rollup in one statement.
+
+    Together with add_entry_ids, brackets set-based changes to many entries, e.g. retagging.
+    """
+    _apply_aggregate(session, in_ids(col(Entry.id), entry_ids), -1)
+
+
+def _apply_aggregate(session: Session, where: ColumnElement[bool], sign: int) -> None:
+    aggregated = _aggregate(where, sign)
+    session.exec(_accumulate(insert(DailyRollup).from_select(ROLLUP_COLUMNS, aggregated)))
+    if sign < 0:
+        session.exec(delete(DailyRollup).where(col(DailyRollup.entries) <= 0))
+
+
+def rebuild_rollups() -> int:
+    """Recompute the whole rollup from `entry`. Returns the number of rollup rows."""
+    with Session(immediate(models.engine)) as session:
+        count = rebuild(session)
+        session.commit()
+        return count
+
+
+def rebuild(session: Session) -> int:
+    """Recompute the whole rollup in the session's transaction, see rebuild_rollups()."""
+    session.exec(delete(DailyRollup))
+    session.exec(insert(DailyRollup).from_select(ROLLUP_COLUMNS, _aggregate(true())))
+    return session.exec(select(func.count()).select_from(DailyRollup)).one()
+
+
+def _aggregate(where: ColumnElement[bool], sign: int = 1) -> Select:
+    """Rollup rows contributed by the finished entries matching `where`, times `sign`."""
+    finished = col(Entry.end_at).is_not(None)
+    day = func.date(Entry.start_at)
+    project_id = func.coalesce(Project.id, NO_PROJECT)
+    seconds = func.max((func.julianday(Entry.end_at) - func.julianday(Entry.start_at)) * 86400, 0)
+
+    def contributions(tag_id: Any) -> Select:
+        return (
+            select(
+                day.label("day"),
+                project_id.label("project_id"),
+                tag_id.label("tag_id"),
+                seconds.label("seconds"),
+            )
+            .select_from(Entry)
+            .outerjoin(Project, col(Project.id) == col(Entry.project_id))
+            .where(finished, where)
+        )
+
+    all_tags = contributions(literal(ALL_TAGS))
+    tagged = (
+        contributions(func.coalesce(Tag.id, NO_TAG))
+        .join(EntryTagLink, col(EntryTagLink.entry_id) == col(Entry.id))
+        .outerjoin(Tag, col(Tag.id) == col(EntryTagLink.tag_id))
+    )
+    untagged = contributions(literal(NO_TAG)).where(
+        ~select(EntryTagLink.entry_id).where(col(EntryTagLink.entry_id) == col(Entry.id)).exists()
+    )
+    source = union_all(all_tags, tagged, untagged).subquery()
+    return select(
+        source.c.day,
+        source.c.project_id,
+        source.c.tag_id,
+        (func.sum(source.c.seconds) * sign).cast(Float),
+        func.count() * sign,
+    ).group_by(source.c.day, source.c.project_id, source.c.tag_id)
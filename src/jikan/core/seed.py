@@ -0,0 +1,157 @@
+import random
+from collections.abc import Iterator
+from datetime import datetime, time, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select
+
+from jikan import models
+from jikan.core import rollup
+from jikan.lib.datetime import utc_now
+from jikan.models import Entry, EntryTagLink, Project, Tag, immediate
+
+# Entries per transaction.
+SEED_CHUNK_SIZE = 10_000
+
+_WORDS = (
+    "review design sync planning vendor meeting budget release bug fix refactor api docs "
+    "onboarding interview research report customer support deploy migration test metrics "
+    "roadmap retro standup invoice contract hiring training security audit backlog demo"
+).split()
+# Number of tags on an entry; most have one or two.
+_TAG_COUNTS = (0, 1, 1, 1, 2, 2, 3)
+
+
+class SeedSummary(NamedTuple):
+    projects: int
+    tags: int
+    entries: int
+    links: int
+
+
+def seed_history(
+    entries: int,
+    users: int = 1,
+    projects: int = 20,
+    tags: int = 30,
+    seed: int = 0,
+    end: datetime | None = None,
+    chunk_size: int = SEED_CHUNK_SIZE,
+) -> SeedSummary:
+    """Insert a synthetic history of finished entries ending before `end`.
+
+    The history is that of `users` people, each with their own `projects` and `tags` and an
+    equal share of the entries. A person's entries follow each other through weekday working
+    hours, about eight a day, so histories of different people overlap. A few projects get
+    most of the time, one entry in ten has none, and most entries have one or two tags.
+
+    The same arguments always generate the same history. Rows are added after the existing
+    ones, with the rollup and search index kept up to date.
+    """
+    rng = random.Random(seed)
+    now = utc_now()
+    # Working days needed at eight entries a day, plus weekends.
+    days = -(-entries // users) * 7 // (5 * 8) + 1
+    start = (end or now).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    with Session(immediate(models.engine)) as session:
+        people = [
+            _Person(
+                project_ids=_insert_named(session, Project, projects, rng, now),
+                tag_ids=_insert_named(session, Tag, tags, rng, now),
+                spans=_spans(rng, start),
+            )
+            for _ in range(users)
+        ]
+        session.commit()
+
+    # Zipf-like weights: the k-th project is picked about 1/k as often as the first.
+    project_weights = [1 / k for k in range(1, projects + 1)]
+
+    links = 0
+    remaining = entries
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        with Session(immediate(models.engine)) as session:
+            first_id = session.exec(select(func.coalesce(func.max(Entry.id), 0))).one() + 1
+            rows = []
+            chunk_links = []
+            for id in range(first_id, first_id + size):
+                person = people[id % users]
+                start_at, end_at = next(person.spans)
+                project_id = None
+                if person.project_ids and rng.random() >= 0.1:
+                    project_id = rng.choices(person.project_ids, project_weights)[0]
+                rows.append(
+                    {
+                        "id": id,
+                        "title": _phrase(rng, 2, 4).capitalize(),
+                        "description": _phrase(rng, 4, 10) if rng.random() < 0.5 else "",
+                        "start_at": start_at,
+                        "end_at": end_at,
+                        "created_at": end_at,
+                        "updated_at": end_at,
+                        "project_id": project_id,
+                    }
+                )
+                count = min(rng.choice(_TAG_COUNTS), tags)
+                chunk_links.extend(
+                    {"entry_id": id, "tag_id": tag_id}
+                    for tag_id in rng.sample(person.tag_ids, count)
+                )
+            connection = session.connection()
+            connection.execute(insert(Entry.__table__), rows)
+            if chunk_links:
+                connection.execute(insert(EntryTagLink.__table__), chunk_links)
+            rollup.add_entries(session, first_id, first_id + size - 1)
+            session.commit()
+        links += len(chunk_links)
+        remaining -= size
+
+    return SeedSummary(projects=projects * users, tags=tags * users, entries=entries, links=links)
+
+
+class _Person(NamedTuple):
+    project_ids: list[int]
+    tag_ids: list[int]
+    spans: Iterator[tuple[datetime, datetime]]
+
+
+def _insert_named(
+    session: Session,
+    model: type[Project] | type[Tag],
+    count: int,
+    rng: random.Random,
+    now: datetime,
+) -> list[int]:
+    """Add `count` rows of `model` with unique names and return their ids."""
+    first_id = session.exec(select(func.coalesce(func.max(model.id), 0))).one() + 1
+    ids = list(range(first_id, first_id + count))
+    if ids:
+        values: dict = {"created_at": now}
+        if model is Project:
+            values |= {"description": "", "archived": False, "updated_at": now}
+        session.exec(
+            insert(model),
+            params=[{"id": id, "name": f"{rng.choice(_WORDS)}-{id}", **values} for id in ids],
+        )
+    return ids
+
+
+def _spans(rng: random.Random, start: datetime) -> Iterator[tuple[datetime, datetime]]:
+    """Yield (start_at, end_at) of consecutive entries on weekdays from 9:00 to 18:00."""
+    day = start
+    while True:
+        if day.weekday() < 5:
+            at = datetime.combine(day.date(), time(9), day.tzinfo)
+            closing = at.replace(hour=18)
+            while at < closing:
+                end_at = at + timedelta(minutes=rng.randint(15, 90))
+                yield at, end_at
+                at = end_at + timedelta(minutes=rng.randint(0, 20))
+        day += timedelta(days=1)
+
+
+def _phrase(rng: random.Random, shortest: int, longest: int) -> str:
+    return " ".join(rng.choices(_WORDS, k=rng.randint(shortest, longest)))
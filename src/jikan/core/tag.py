@@ -1,8 +1,12 @@
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
 
 from sqlmodel import Session, select
 
-from jikan.models import Tag, engine
+from jikan import models
+from jikan.core import rollup
+from jikan.models import EntryTagLink, Tag, immediate
+
+TAG_ROW_FIELDS = ("id", "name")
 
 
 class TagNotFoundError(Exception):
@@ -10,14 +14,20 @@ class TagNotFoundError(Exception):
 
 
 def list_tag() -> Sequence[Tag]:
-    with Session(engine) as session:
+    with Session(models.engine) as session:
         statement = select(Tag)
         tags = session.exec(statement).all()
         return tags
 
 
+def iter_tag_rows() -> Iterator[tuple]:
+    """Yield TAG_ROW_FIELDS of every tag, without models."""
+    with models.engine.connect() as conn:
+        yield from conn.execute(select(Tag.id, Tag.name)).tuples()
+
+
 def get_tag(id: int) -> Tag:
-    with Session(engine) as session:
+    with Session(models.engine) as session:
         statement = select(Tag).where(Tag.id == id)
         tag = session.exec(statement).one_or_none()
         if tag is None:
@@ -28,7 +38,7 @@ def get_tag(id: int) -> Tag:
 def add_tag(name: str) -> Tag:
     if not name:
         raise ValueError("name should not be empty")
-    with Session(engine) as session:
+    with Session(models.engine) as session:
         tag = Tag(name=name)
         session.add(tag)
         session.commit()
@@ -36,11 +46,11 @@ def add_tag(name: str) -> Tag:
         return tag
 
 
-def edit_tag(tag: Tag, name: str) -> Tag:
+def edit_tag(id: int, name: str) -> Tag:
     if not name:
         raise ValueError("name should not be empty")
-    with Session(engine) as session:
-        db_tag = session.get(Tag, tag.id)
+    with Session(models.engine) as session:
+        db_tag = session.get(Tag, id)
         if db_tag is None:
             raise TagNotFoundError
         db_tag.name = name
@@ -50,10 +60,18 @@ def edit_tag(tag: Tag, name: str) -> Tag:
         return db_tag
 
 
-def delete_tag(tag: Tag) -> None:
-    with Session(engine) as session:
-        db_tag = session.get(Tag, tag.id)
+def delete_tag(id: int) -> None:
+    with Session(immediate(models.engine)) as session:
+        db_tag = session.get(Tag, id)
         if db_tag is None:
             raise TagNotFoundError
+        # The tagged entries may have other tags, so they are taken out of the rollup and
+        # added back without this one, rather than moved to NO_TAG.
+        entry_ids = session.exec(
+            select(EntryTagLink.entry_id).where(EntryTagLink.tag_id == id)
+        ).all()
+        rollup.remove_entry_ids(session, entry_ids)
         session.delete(db_tag)
+        session.flush()
+        rollup.add_entry_ids(session, entry_ids)
         session.commit()
@@ -0,0 +1,222 @@
+"""Resident jikan process serving CLI commands over a Unix socket.
+
+Commands run one at a time in this process, exactly as they would from the shell, but with
+Python, SQLAlchemy, the core modules and an open SQLite connection already warm. See
+jikan.lib.daemon for the protocol and the client.
+
+    python -m jikan.daemon
+"""
+
+import base64
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import traceback
+from contextlib import redirect_stderr, redirect_stdout, suppress
+from typing import Any, BinaryIO
+
+import click
+import typer
+
+from jikan.lib.daemon import DaemonUnavailableError, control, get_socket_path
+
+# Seconds a client may leave the daemon waiting on a read or write before it is dropped, so a
+# stalled client cannot hold up the others.
+CLIENT_TIMEOUT = 30.0
+
+
+class _ClientStream(io.TextIOBase):
+    """A stdout or stderr replacement that relays writes to the client."""
+
+    def __init__(self, handler: "_Handler", name: str, tty: bool) -> None:
+        self.handler = handler
+        self.name = name
+        self.tty = tty
+        self.buffer = _ClientBuffer(handler, name)
+
+    def write(self, s: str) -> int:
+        if not isinstance(s, str):
+            # click probes streams with write(b"") to find binary ones.
+            raise TypeError(f"write() argument must be str, not {type(s).__name__}")
+        if s:
+            self.handler.send({self.name: s})
+        return len(s)
+
+    def isatty(self) -> bool:
+        return self.tty
+
+    @property
+    def encoding(self) -> str:  # type: ignore[override]
+        return "utf-8"
+
+
+class _ClientBuffer(io.RawIOBase):
+    """Binary side of a _ClientStream, e.g. for gzipped export to stdout."""
+
+    def __init__(self, handler: "_Handler", name: str) -> None:
+        self.handler = handler
+        self.name = name
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:  # type: ignore[override]
+        data = bytes(b)
+        if data:
+            self.handler.send({f"{self.name}_bytes": base64.b64encode(data).decode()})
+        return len(data)
+
+
+class _ClientInput(io.TextIOBase):
+    """A stdin replacement that asks the client for each line, e.g. for confirmations."""
+
+    def __init__(self, handler: "_Handler") -> None:
+        self.handler = handler
+
+    def readline(self, size: int | None = -1) -> str:  # type: ignore[override]
+        self.handler.send({"read": True})
+        reply = self.handler.rfile.readline()
+        return json.loads(reply)["line"] if reply else ""
+
+    def isatty(self) -> bool:
+        return False
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "DaemonServer"
+    wfile: BinaryIO
+    timeout = CLIENT_TIMEOUT
+
+    def send(self, message: dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        with suppress(TimeoutError):
+            self._handle()
+
+    def _handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        command = request.get("control")
+        if command == "ping":
+            self.send({"pid": os.getpid()})
+        elif command == "stop":
+            self.send({"pid": os.getpid()})
+            # shutdown() waits for serve_forever() to return, which it does after this request.
+            threading.Thread(target=self.server.shutdown).start()
+        elif "argv" in request:
+            self.send({"exit": self.run(request)})
+
+    def run(self, request: dict[str, Any]) -> int:
+        tty = request.get("tty", {})
+        stdout = _ClientStream(self, "out", tty.get("out", False))
+        stderr = _ClientStream(self, "err", tty.get("err", False))
+        saved_cwd, saved_columns, saved_stdin = os.getcwd(), os.environ.get("COLUMNS"), sys.stdin
+        try:
+            os.chdir(request["cwd"])
+            # rich and click size their output from COLUMNS when stdout is not a terminal.
+            _set_env("COLUMNS", str(request["columns"]) if request.get("columns") else None)
+            sys.stdin = _ClientInput(self)
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                return _main(request["argv"])
+        finally:
+            sys.stdin = saved_stdin
+            _set_env("COLUMNS", saved_columns)
+            os.chdir(saved_cwd)
+
+
+def _set_env(name: str, value: str | None) -> None:
+    if value is None:
+        os.environ.pop(name, None)
+    else:
+        os.environ[name] = value
+
+
+def _main(argv: list[str]) -> int:
+    command = _command()
+    try:
+        command.main(args=argv, prog_name="jikan", standalone_mode=True)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+_click_command: click.Command | None = None
+
+
+def _command() -> click.Command:
+    global _click_command
+    if _click_command is None:
+        from jikan.main import app
+
+        _click_command = typer.main.get_command(app)
+    return _click_command
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Handles one connection at a time: commands redirect the process-wide stdio and cwd.
+
+    Commands that wait on the user run locally instead, see jikan.cli.LOCAL_COMMANDS, and a
+    client that stops reading or writing is dropped after CLIENT_TIMEOUT.
+    """
+
+
+def warm_up() -> None:
+    """Import everything commands need and open the database connection."""
+    import jikan.core.entry
+    import jikan.core.importer
+    import jikan.core.project
+    import jikan.core.report
+    import jikan.core.rollup
+    import jikan.core.tag  # noqa: F401
+    from jikan.models import get_engine
+
+    _command()
+    with get_engine().connect():
+        pass
+
+
+def create_server(path: str) -> DaemonServer:
+    """Bind the daemon's socket at `path`, replacing one left behind by a crashed daemon."""
+    with suppress(DaemonUnavailableError):
+        control("ping", path)
+        raise RuntimeError(f"A jikan daemon is already listening on {path}")
+    with suppress(FileNotFoundError):
+        os.unlink(path)
+
+    umask = os.umask(0o177)  # the socket is only for the current user
+    try:
+        return DaemonServer(path, _Handler)
+    finally:
+        os.umask(umask)
+
+
+def serve(path: str | None = None) -> None:
+    """Serve commands on the Unix socket at `path` until stopped."""
+    path = path or get_socket_path()
+    server = create_server(path)
+    warm_up()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        with server:
+            server.serve_forever()
+    finally:
+        with suppress(FileNotFoundError):
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,37 @@
+import os
+import tomllib
+from pathlib import Path
+
+DATA_DIR_ENV = "JIKAN_DATA_DIR"
+APP_DIR_NAME = ".jikan"
+SQLITE_FILE_NAME = "database.db"
+
+
+def get_config_path() -> Path:
+    config_home = os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config"
+    return Path(config_home) / "jikan" / "config.toml"
+
+
+def load_config() -> dict:
+    path = get_config_path()
+    try:
+        with path.open("rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def get_app_dir() -> Path:
+    """Return the data directory.
+
+    Resolved from the JIKAN_DATA_DIR environment variable, then `data_dir` in the config
+    file, then ~/.jikan.
+    """
+    data_dir = os.environ.get(DATA_DIR_ENV) or load_config().get("data_dir")
+    if data_dir:
+        return Path(data_dir).expanduser()
+    return Path.home() / APP_DIR_NAME
+
+
+def get_sqlite_path() -> Path:
+    return get_app_dir() / SQLITE_FILE_NAME
@@ -0,0 +1,128 @@
+"""Client side of the jikan daemon protocol.
+
+The daemon (jikan.daemon) runs the CLI in a long-lived process with the engine and the
+core modules already loaded. A client sends one request per connection as a JSON line:
+
+    {"argv": [...], "cwd": "...", "columns": 120, "tty": {"out": true, "err": true}}
+
+and receives JSON lines until the command exits:
+
+    {"out": "text"} / {"err": "text"}   output of the command
+    {"out_bytes": "base64"}              binary output, e.g. gzip
+    {"read": true}                       the command reads a line; reply {"line": "..."}
+    {"exit": 0}                          exit code, always the last message
+
+`{"control": "ping"}` and `{"control": "stop"}` manage the daemon itself. This module
+only uses the standard library so that forwarding a command stays cheap.
+"""
+
+import base64
+import json
+import os
+import socket
+import sys
+from typing import Any, TextIO
+
+from jikan.lib.config import get_app_dir
+
+SOCKET_FILE_NAME = "jikan.sock"
+# Set to run every command in-process even when a daemon is listening.
+NO_DAEMON_ENV = "JIKAN_NO_DAEMON"
+
+
+class DaemonUnavailableError(Exception):
+    pass
+
+
+def get_socket_path() -> str:
+    return str(get_app_dir() / SOCKET_FILE_NAME)
+
+
+def connect(path: str | None = None) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or get_socket_path())
+    except OSError as e:
+        sock.close()
+        raise DaemonUnavailableError(str(e)) from e
+    return sock
+
+
+def forward(
+    argv: list[str],
+    path: str | None = None,
+    stdin: TextIO | None = None,
+    stdout: TextIO | None = None,
+    stderr: TextIO | None = None,
+) -> int:
+    """Run a CLI command in the daemon, relaying its input and output. Returns the exit code.
+
+    Raises DaemonUnavailableError when no daemon is listening, before anything has run.
+    """
+    stdin = stdin or sys.stdin
+    streams = {"out": stdout or sys.stdout, "err": stderr or sys.stderr}
+    with connect(path) as sock, sock.makefile("rw", encoding="utf-8", newline="\n") as conn:
+        _send(
+            conn,
+            {
+                "argv": argv,
+                "cwd": os.getcwd(),
+                "columns": _columns(streams["out"]),
+                "tty": {name: _isatty(stream) for name, stream in streams.items()},
+            },
+        )
+        for line in conn:
+            message = json.loads(line)
+            if "exit" in message:
+                return message["exit"]
+            if message.get("read"):
+                streams["out"].flush()
+                _send(conn, {"line": stdin.readline()})
+                continue
+            for name, stream in streams.items():
+                if name in message:
+                    stream.write(message[name])
+                    stream.flush()
+                elif f"{name}_bytes" in message:
+                    _write_bytes(stream, base64.b64decode(message[f"{name}_bytes"]))
+    streams["err"].write("Error: the jikan daemon closed the connection\n")
+    return 1
+
+
+def control(command: str, path: str | None = None) -> dict[str, Any]:
+    """Send a control command ("ping" or "stop") and return the daemon's reply."""
+    with connect(path) as sock, sock.makefile("rw", encoding="utf-8", newline="\n") as conn:
+        _send(conn, {"control": command})
+        line = conn.readline()
+    if not line:
+        raise DaemonUnavailableError("no reply")
+    return json.loads(line)
+
+
+def _send(conn: TextIO, message: dict[str, Any]) -> None:
+    conn.write(json.dumps(message) + "\n")
+    conn.flush()
+
+
+def _write_bytes(stream: TextIO, data: bytes) -> None:
+    stream.flush()
+    buffer = getattr(stream, "buffer", None)
+    if buffer is None:
+        stream.write(data.decode("utf-8", errors="replace"))
+    else:
+        buffer.write(data)
+        buffer.flush()
+
+
+def _isatty(stream: TextIO) -> bool:
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _columns(stream: TextIO) -> int | None:
+    try:
+        return os.get_terminal_size(stream.fileno()).columns
+    except (AttributeError, ValueError, OSError):
+        return None
@@ -0,0 +1,91 @@
+"""Rendering and refresh loop of `jikan dashboard`."""
+
+import time
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+from rich import box
+from rich.console import Group, RenderableType
+from rich.live import Live
+from rich.markup import escape
+from rich.panel import Panel
+from rich.table import Table
+
+from jikan.lib.datetime import ensure_utc_aware, format_datetime, format_timedelta
+
+if TYPE_CHECKING:
+    from jikan.core.dashboard import DashboardView
+
+
+def render(view: "DashboardView", now: datetime) -> RenderableType:
+    return Group(_running(view, now), _today(view, now), _latest(view, now))
+
+
+def run(view: "DashboardView", interval: float = 1.0) -> None:
+    """Redraw the dashboard every `interval` seconds until interrupted.
+
+    A redraw follows a change to the data or, while an entry runs, the timer; the timer is
+    advanced from the entry's start time, without querying.
+    """
+    with Live(render(view, datetime.now(UTC)), auto_refresh=False) as live:
+        while True:
+            # Wake on whole intervals, so the timer ticks evenly.
+            time.sleep(interval - time.time() % interval)
+            if view.refresh() or view.running() is not None:
+                live.update(render(view, datetime.now(UTC)), refresh=True)
+
+
+def _running(view: "DashboardView", now: datetime) -> RenderableType:
+    entry = view.running()
+    if entry is None:
+        return Panel("No time entry running.", title="Running")
+    elapsed = format_timedelta(now - ensure_utc_aware(entry.start_at))
+    # Titles and names are the user's; brackets in them must not be read as markup.
+    project = f" [dim]{escape(entry.project.name)}[/dim]" if entry.project is not None else ""
+    tags = escape(", ".join(tag.name for tag in entry.tags))
+    lines = [
+        f"[bold]{elapsed}[/bold]  {escape(entry.title or '')}{project}",
+        f"Started {format_datetime(entry.start_at)}" + (f"  Tags: {tags}" if tags else ""),
+    ]
+    return Panel("\n".join(lines), title="Running")
+
+
+def _today(view: "DashboardView", now: datetime) -> RenderableType:
+    rows = view.today(now)
+    table = Table("Project", "Entries", "Time", title="Today (UTC)", box=box.SIMPLE_HEAD)
+    table.show_footer = bool(rows)
+    for row in rows:
+        table.add_row(
+            escape(row.label), str(row.entries), format_timedelta(timedelta(seconds=row.seconds))
+        )
+    if rows:
+        table.columns[0].footer = "Total"
+        table.columns[1].footer = str(sum(row.entries for row in rows))
+        table.columns[2].footer = format_timedelta(
+            timedelta(seconds=sum(row.seconds for row in rows))
+        )
+    return table
+
+
+def _latest(view: "DashboardView", now: datetime) -> RenderableType:
+    table = Table(
+        "ID",
+        "Title",
+        "Project",
+        "Start at",
+        "End at",
+        "Time",
+        title="Recent entries",
+        box=box.SIMPLE_HEAD,
+    )
+    for entry in view.latest():
+        end_at = ensure_utc_aware(entry.end_at) if entry.end_at is not None else now
+        table.add_row(
+            str(entry.id),
+            escape(entry.title or ""),
+            escape(entry.project.name) if entry.project is not None else "",
+            format_datetime(entry.start_at),
+            format_datetime(entry.end_at) if entry.end_at is not None else "running",
+            format_timedelta(max(end_at - ensure_utc_aware(entry.start_at), timedelta())),
+        )
+    return table
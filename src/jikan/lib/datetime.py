@@ -34,3 +34,12 @@ def parse_dt(value: str) -> _datetime.datetime:
         return ensure_utc_aware(parse_dt)
     except ValueError as e:
         raise typer.BadParameter("Invalid datetime. Use format like YYYY/MM/DD HH:MM:SS") from e
+
+
+def parse_date_or_dt(value: str) -> _datetime.datetime:
+    for fmt in ("%Y/%m/%d %H:%M:%S", "%Y/%m/%d"):
+        try:
+            return ensure_utc_aware(_datetime.datetime.strptime(value, fmt))
+        except ValueError:
+            continue
+    raise typer.BadParameter("Invalid date. Use format like YYYY/MM/DD or YYYY/MM/DD HH:MM:SS")
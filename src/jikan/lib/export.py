@@ -0,0 +1,74 @@
+import csv
+import gzip
+import io
+import json
+import sys
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import ExitStack, contextmanager
+from enum import StrEnum
+from pathlib import Path
+from typing import TextIO
+
+
+class ExportFormat(StrEnum):
+    csv = "csv"
+    jsonl = "jsonl"
+    ndjson = "ndjson"
+
+
+@contextmanager
+def open_export_stream(output: Path | None, compress: bool) -> Iterator[TextIO]:
+    """Open a text stream to `output`, or to stdout when it is None, optionally gzipped."""
+    with ExitStack() as stack:
+        if output is None:
+            raw = sys.stdout.buffer
+        else:
+            raw = stack.enter_context(output.open("wb"))
+        if compress:
+            raw = stack.enter_context(gzip.GzipFile(fileobj=raw, mode="wb"))
+        stream = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        try:
+            yield stream
+        finally:
+            stream.flush()
+            # Leave the underlying stream (possibly stdout) open; the exit stack closes the rest.
+            stream.detach()
+
+
+def write_csv(fields: Sequence[str], rows: Iterable[tuple], stream: TextIO) -> int:
+    """Write rows as CSV. Rows must already be flat, e.g. with tags joined into a string."""
+    writer = csv.writer(stream, lineterminator="\n")
+    writer.writerow(fields)
+    counter = _Counter(rows)
+    writer.writerows(counter)
+    return counter.count
+
+
+def write_jsonl(fields: Sequence[str], rows: Iterable[tuple], stream: TextIO) -> int:
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    counter = _Counter(rows)
+    stream.writelines(encode(dict(zip(fields, row, strict=True))) + "\n" for row in counter)
+    return counter.count
+
+
+class _Counter:
+    """Count rows as they are consumed, so writers can hand the whole iterable to C code."""
+
+    def __init__(self, rows: Iterable[tuple]) -> None:
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self) -> Iterator[tuple]:
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+# Tags are a single ;-separated field in CSV and a list in JSON.
+CSV_TAG_SEPARATOR = ";"
+
+WRITERS = {
+    ExportFormat.csv: write_csv,
+    ExportFormat.jsonl: write_jsonl,
+    ExportFormat.ndjson: write_jsonl,
+}
@@ -0,0 +1,239 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, tzinfo
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, NamedTuple, TextIO
+
+from jikan.lib.datetime import ensure_utc_aware
+from jikan.lib.export import CSV_TAG_SEPARATOR, ExportFormat
+
+
+class ImportDialect(StrEnum):
+    jikan = "jikan"
+    toggl = "toggl"
+    clockify = "clockify"
+
+
+class ImportRecord(NamedTuple):
+    """A time entry read from an import source. Datetimes are aware UTC."""
+
+    line: int
+    title: str | None
+    description: str | None
+    start_at: datetime
+    end_at: datetime
+    project: str | None
+    tags: tuple[str, ...]
+
+
+class RejectedRow(NamedTuple):
+    line: int
+    reason: str
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+# `line` numbers records of the source from 1: data rows of a CSV file, lines of JSONL.
+# Rejected rows are numbered too, so a position in the source is a single number.
+ImportItem = ImportRecord | RejectedRow
+
+# Columns that identify each CSV dialect; matched against the header row.
+_DIALECT_COLUMNS = {
+    ImportDialect.jikan: {"start_at", "end_at"},
+    ImportDialect.toggl: {"Start date", "Start time", "End date", "End time"},
+    ImportDialect.clockify: {"Start Date", "Start Time", "End Date", "End Time"},
+}
+# Toggl and Clockify write dates and times in the account's preferred format.
+_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d.%m.%Y")
+_TIME_FORMATS = ("%H:%M:%S", "%I:%M:%S %p", "%H:%M", "%I:%M %p")
+_EXTERNAL_TAG_SEPARATOR = ","
+
+
+def guess_format(path: Path) -> ExportFormat:
+    """Guess the file format from the suffix, ignoring a trailing .gz."""
+    suffixes = [s.lower() for s in path.suffixes if s.lower() != ".gz"]
+    suffix = suffixes[-1].lstrip(".") if suffixes else ""
+    try:
+        return ExportFormat(suffix)
+    except ValueError as e:
+        raise ImportFormatError(f"Cannot tell the format of {path.name}; pass --format") from e
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of the file's bytes, identifying the source when an import is resumed."""
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+@contextmanager
+def open_import_stream(path: Path) -> Iterator[TextIO]:
+    """Open `path` as text, transparently decompressing gzip."""
+    with path.open("rb") as raw:
+        compressed = raw.read(2) == b"\x1f\x8b"
+        raw.seek(0)
+        binary = gzip.GzipFile(fileobj=raw, mode="rb") if compressed else raw
+        with io.TextIOWrapper(binary, encoding="utf-8-sig", newline="") as stream:
+            yield stream
+
+
+def read_records(stream: TextIO, format: ExportFormat, tz: tzinfo) -> Iterator[ImportItem]:
+    """Parse time entries from `stream`, yielding a RejectedRow for each invalid one.
+
+    JSONL is read as written by `jikan export`. CSV may be a jikan, Toggl or Clockify
+    export, told apart by the header. Timestamps without an offset are taken to be in `tz`.
+    """
+    if format is ExportFormat.csv:
+        return _read_csv(stream, tz)
+    return _read_jsonl(stream, tz)
+
+
+def _read_jsonl(stream: TextIO, tz: tzinfo) -> Iterator[ImportItem]:
+    for line, text in enumerate(stream, start=1):
+        try:
+            data = json.loads(text)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            tags = data.get("tags") or ()
+            if not isinstance(tags, list | tuple):
+                raise ValueError("tags must be a list")
+            yield _record(
+                line,
+                data.get("title"),
+                data.get("description"),
+                _parse_iso(data.get("start_at"), tz),
+                _parse_iso(data.get("end_at"), tz),
+                data.get("project"),
+                tags,
+            )
+        except ValueError as e:
+            yield RejectedRow(line, str(e))
+
+
+def _read_csv(stream: TextIO, tz: tzinfo) -> Iterator[ImportItem]:
+    reader = csv.DictReader(stream)
+    header = set(reader.fieldnames or ())
+    dialect = next((d for d, columns in _DIALECT_COLUMNS.items() if columns <= header), None)
+    if dialect is None:
+        raise ImportFormatError(
+            "Unrecognized CSV header; expected a jikan, Toggl or Clockify export"
+        )
+
+    parse = _CSV_PARSERS[dialect]
+    for line, row in enumerate(reader, start=1):
+        try:
+            yield parse(line, row, tz)
+        except ValueError as e:
+            yield RejectedRow(line, str(e))
+
+
+def _jikan_row(line: int, row: dict[str, str], tz: tzinfo) -> ImportRecord:
+    return _record(
+        line,
+        row.get("title"),
+        row.get("description"),
+        _parse_iso(row["start_at"], tz),
+        _parse_iso(row["end_at"], tz),
+        row.get("project"),
+        _split_tags(row.get("tags"), CSV_TAG_SEPARATOR),
+    )
+
+
+def _toggl_row(line: int, row: dict[str, str], tz: tzinfo) -> ImportRecord:
+    return _record(
+        line,
+        row.get("Description"),
+        None,
+        _parse_local(row["Start date"], row["Start time"], tz),
+        _parse_local(row["End date"], row["End time"], tz),
+        row.get("Project"),
+        _split_tags(row.get("Tags"), _EXTERNAL_TAG_SEPARATOR),
+    )
+
+
+def _clockify_row(line: int, row: dict[str, str], tz: tzinfo) -> ImportRecord:
+    return _record(
+        line,
+        row.get("Description"),
+        None,
+        _parse_local(row["Start Date"], row["Start Time"], tz),
+        _parse_local(row["End Date"], row["End Time"], tz),
+        row.get("Project"),
+        _split_tags(row.get("Tags"), _EXTERNAL_TAG_SEPARATOR),
+    )
+
+
+_CSV_PARSERS: dict[ImportDialect, Callable[[int, dict[str, str], tzinfo], ImportRecord]] = {
+    ImportDialect.jikan: _jikan_row,
+    ImportDialect.toggl: _toggl_row,
+    ImportDialect.clockify: _clockify_row,
+}
+
+
+def _record(
+    line: int,
+    title: Any,
+    description: Any,
+    start_at: datetime | None,
+    end_at: datetime | None,
+    project: Any,
+    tags: Iterable[Any],
+) -> ImportRecord:
+    if start_at is None:
+        raise ValueError("missing start time")
+    if end_at is None:
+        raise ValueError("missing end time; running entries cannot be imported")
+    if end_at < start_at:
+        raise ValueError("end time is before start time")
+    names = dict.fromkeys(str(tag).strip() for tag in tags)
+    return ImportRecord(
+        line=line,
+        title=_text(title),
+        description=_text(description),
+        start_at=start_at,
+        end_at=end_at,
+        project=_text(project),
+        tags=tuple(name for name in names if name),
+    )
+
+
+def _text(value: Any) -> str | None:
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _split_tags(value: str | None, separator: str) -> list[str]:
+    return value.split(separator) if value else []
+
+
+def _parse_iso(value: Any, tz: tzinfo) -> datetime | None:
+    if value in (None, ""):
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError as e:
+        raise ValueError(f"invalid timestamp {value!r}") from e
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tz)
+    return ensure_utc_aware(parsed)
+
+
+def _parse_local(date: str | None, time: str | None, tz: tzinfo) -> datetime | None:
+    if not date or not time:
+        return None
+    for date_format in _DATE_FORMATS:
+        for time_format in _TIME_FORMATS:
+            try:
+                parsed = datetime.strptime(f"{date} {time}", f"{date_format} {time_format}")
+            except ValueError:
+                continue
+            return ensure_utc_aware(parsed.replace(tzinfo=tz))
+    raise ValueError(f"invalid date or time {date!r} {time!r}")
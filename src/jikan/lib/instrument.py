@@ -0,0 +1,162 @@
+"""Instrumentation behind the --profile, --trace-sql and --profile-output options.
+
+This module is imported, and its SQLAlchemy listeners installed, only when one of the
+options is given, so commands run without it pay nothing.
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from typer import echo
+
+# Statements listed by --trace-sql.
+SLOWEST_STATEMENTS = 5
+# Longer statements and parameter lists are cut in the report.
+MAX_SQL_LENGTH = 200
+MAX_PARAMETERS_LENGTH = 200
+
+
+class Statement(NamedTuple):
+    seconds: float
+    sql: str
+    parameters: Any
+
+
+class Instrumentation:
+    """Measure one command from start() to stop() and report on stderr.
+
+    Phases are `import`, from `started_at` (the CLI entry point, when known) to start();
+    `engine init`, creating the engine and opening database connections; `query`, time
+    spent executing SQL statements; and `render`, the rest of the command.
+    """
+
+    def __init__(
+        self,
+        started_at: float | None,
+        phases: bool = False,
+        sql: bool = False,
+        output: Path | None = None,
+    ) -> None:
+        self.started_at = started_at
+        self.phases = phases
+        self.sql = sql
+        self.output = output
+        self.statements: list[Statement] = []
+        self.query_seconds = 0.0
+        self.engine_seconds = 0.0
+        self._connecting_at: float | None = None
+        self._listeners: list[tuple[Any, str, Any]] = []
+
+    def start(self) -> None:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        from sqlalchemy.pool import Pool
+
+        import jikan.models as models
+
+        self.command_at = time.perf_counter()
+        # Class-level listeners also apply to engines created later in the command.
+        self._listeners = [
+            (Engine, "before_cursor_execute", self._before_execute),
+            (Engine, "after_cursor_execute", self._after_execute),
+            (Engine, "do_connect", self._connect),
+            (Pool, "checkout", self._checkout),
+        ]
+        for target, name, listener in self._listeners:
+            event.listen(target, name, listener)
+
+        # get_engine() is cached and inspected by configure_engine(), so the creation it
+        # makes is timed instead.
+        self._create_engine = models.create_sqlite_engine
+        models.create_sqlite_engine = self._timed_create_engine
+
+        self._profiler = None
+        if self.output is not None:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        from sqlalchemy import event
+
+        import jikan.models as models
+
+        ended_at = time.perf_counter()
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.output)
+        models.create_sqlite_engine = self._create_engine
+        for target, name, listener in self._listeners:
+            event.remove(target, name, listener)
+
+        if self.phases:
+            self._report_phases(ended_at)
+        if self.sql:
+            self._report_sql()
+        if self.output is not None:
+            echo(f"cProfile stats written to {self.output}", err=True)
+
+    def _timed_create_engine(self, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return self._create_engine(*args, **kwargs)
+        finally:
+            self.engine_seconds += time.perf_counter() - started
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("jikan_started_at", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        seconds = time.perf_counter() - conn.info["jikan_started_at"].pop()
+        self.query_seconds += seconds
+        self.statements.append(Statement(seconds, statement, parameters))
+
+    def _connect(self, dialect, conn_rec, cargs, cparams) -> None:
+        self._connecting_at = time.perf_counter()
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        # The first checkout after connecting follows the connect listeners, e.g. pragmas.
+        if self._connecting_at is not None:
+            self.engine_seconds += time.perf_counter() - self._connecting_at
+            self._connecting_at = None
+
+    def _report_phases(self, ended_at: float) -> None:
+        command = ended_at - self.command_at
+        phases = []
+        if self.started_at is not None:
+            phases.append(("import", self.command_at - self.started_at))
+        phases += [
+            ("engine init", self.engine_seconds),
+            ("query", self.query_seconds),
+            ("render", max(command - self.engine_seconds - self.query_seconds, 0)),
+            ("total", ended_at - (self.started_at or self.command_at)),
+        ]
+        echo("Profile:", err=True)
+        for name, seconds in phases:
+            echo(f"  {name:<12}{seconds * 1000:>10.1f} ms", err=True)
+
+    def _report_sql(self) -> None:
+        echo(
+            f"SQL: {len(self.statements)} statements in {self.query_seconds * 1000:.1f} ms",
+            err=True,
+        )
+        slowest = sorted(self.statements, key=lambda s: s.seconds, reverse=True)
+        for statement in slowest[:SLOWEST_STATEMENTS]:
+            echo(f"  {statement.seconds * 1000:>8.1f} ms  {_shorten(statement.sql)}", err=True)
+            if statement.parameters:
+                parameters = repr(statement.parameters)[:MAX_PARAMETERS_LENGTH]
+                echo(f"{'':>14}{parameters}", err=True)
+
+
+def _shorten(sql: str) -> str:
+    sql = " ".join(sql.split())
+    return sql if len(sql) <= MAX_SQL_LENGTH else sql[: MAX_SQL_LENGTH - 3] + "..."
+
+
+def started_at() -> float | None:
+    """When the CLI entry point started, if the command was run through it."""
+    cli = sys.modules.get("jikan.cli")
+    return getattr(cli, "STARTED_AT", None)
@@ -0,0 +1,83 @@
+"""Machine-readable output of the list commands, selected with `jikan --output-format`.
+
+Rows are written as they come off the cursor: unlike a rich table, nothing is measured
+or held back, so the first row is out before the last one is read.
+"""
+
+import json
+from collections.abc import Iterable, Sequence
+from enum import StrEnum
+from typing import TextIO
+
+import click
+
+from jikan.lib.export import open_export_stream
+
+# Tags are a single ,-separated field in TSV and plain output and a list in JSON.
+TAG_SEPARATOR = ","
+
+_TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_PLAIN_SPACES = str.maketrans({"\t": " ", "\n": " ", "\r": " "})
+
+
+class OutputFormat(StrEnum):
+    rich = "rich"
+    json = "json"
+    tsv = "tsv"
+    plain = "plain"
+
+
+def output_format() -> OutputFormat:
+    """The --output-format given to the running jikan command, rich if none was."""
+    ctx = click.get_current_context(silent=True)
+    value = ctx.find_root().params.get("output_format") if ctx is not None else None
+    return OutputFormat(value) if value is not None else OutputFormat.rich
+
+
+def write_rows(format: OutputFormat, fields: Sequence[str], rows: Iterable[tuple]) -> None:
+    """Write rows to stdout in `format`, which must not be rich."""
+    with open_export_stream(None, compress=False) as stream:
+        WRITERS[format](fields, rows, stream)
+
+
+def write_json(fields: Sequence[str], rows: Iterable[tuple], stream: TextIO) -> None:
+    """Write rows as a JSON array of objects, one per line."""
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    separator = "[\n"
+    for row in rows:
+        stream.write(separator + encode(dict(zip(fields, row, strict=True))))
+        separator = ",\n"
+    stream.write("[]\n" if separator == "[\n" else "\n]\n")
+
+
+def write_tsv(fields: Sequence[str], rows: Iterable[tuple], stream: TextIO) -> None:
+    """Write a header and rows as tab-separated values.
+
+    Backslashes, tabs and line breaks in values are escaped as \\\\, \\t, \\n and \\r, and
+    None is written as an empty field.
+    """
+    stream.write("\t".join(fields) + "\n")
+    stream.writelines(
+        "\t".join("" if value is None else str(value).translate(_TSV_ESCAPES) for value in row)
+        + "\n"
+        for row in rows
+    )
+
+
+def write_plain(fields: Sequence[str], rows: Iterable[tuple], stream: TextIO) -> None:
+    """Write rows as tab-separated values without a header, one line each, for grep and cut.
+
+    Tabs and line breaks in values become spaces.
+    """
+    stream.writelines(
+        "\t".join("" if value is None else str(value).translate(_PLAIN_SPACES) for value in row)
+        + "\n"
+        for row in rows
+    )
+
+
+WRITERS = {
+    OutputFormat.json: write_json,
+    OutputFormat.tsv: write_tsv,
+    OutputFormat.plain: write_plain,
+}
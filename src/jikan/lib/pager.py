@@ -0,0 +1,224 @@
+"""Paged rendering of `jikan list --pager`.
+
+Entries are read a page at a time with keyset pagination and each page is written on its
+own, so memory use and the time to the first row do not grow with the history. Column
+widths are fixed up front from cheap estimates, so consecutive pages line up and a row is
+laid out without measuring any other.
+"""
+
+import os
+import shlex
+import subprocess
+from collections.abc import Callable, Iterable, Sequence
+from contextlib import suppress
+from typing import TYPE_CHECKING
+
+import click
+from rich import box
+from rich.cells import cell_len, set_cell_size
+from rich.console import Console
+from rich.table import Table
+
+from jikan.lib.datetime import format_datetime
+
+if TYPE_CHECKING:
+    from jikan.models import Entry
+
+COLUMNS = (
+    "ID",
+    "Title",
+    "Description",
+    "Start at",
+    "End at",
+    "Created at",
+    "Updated at",
+    "Project",
+    "Tags",
+)
+# Rows when not writing to a terminal, where there is no screen to fill.
+PAGE_SIZE = 500
+PROMPT = "-- More -- Enter: next page, q: quit"
+QUIT_KEYS = ("q", "Q", "\x1b")
+
+_DATETIME_WIDTH = len("2024-01-01 00:00:00")
+# Title, Description and Tags share what the other columns leave, in these proportions.
+_RATIOS = {"Title": 4, "Description": 5, "Tags": 3}
+# Columns of free text, which wrap in `jikan list` rather than being cut short.
+TEXT_COLUMNS = (*_RATIOS, "Project")
+# Dropped in this order while the terminal is too narrow for the rest.
+_OPTIONAL = ("Created at", "Updated at", "Description", "Tags")
+_MAX_PROJECT_WIDTH = 20
+# Screen lines of a page that are not rows: the header, its rule and the prompt.
+_RESERVED_LINES = 3
+_SPACES = str.maketrans({"\t": " ", "\n": " ", "\r": " "})
+
+
+def entry_cells(entry: "Entry") -> tuple[str, ...]:
+    """The cells of `entry` in a row of COLUMNS."""
+    return (
+        str(entry.id),
+        entry.title or "",
+        entry.description or "",
+        format_datetime(entry.start_at),
+        format_datetime(entry.end_at) if entry.end_at is not None else "None",
+        format_datetime(entry.created_at),
+        format_datetime(entry.updated_at),
+        entry.project.name if entry.project is not None else "",
+        ", ".join(tag.name for tag in entry.tags),
+    )
+
+
+def column_widths(total: int, id_width: int, project_width: int) -> dict[str, int]:
+    """Widths of the columns that fit in `total` characters, in COLUMNS order.
+
+    Only the widest id and project name are needed: timestamps have a fixed width, and
+    Title, Description and Tags share the rest, cut short with an ellipsis. Columns are
+    dropped, see _OPTIONAL, while even the narrowest layout does not fit.
+    """
+    minimum = dict.fromkeys(COLUMNS, _DATETIME_WIDTH)
+    minimum.update(
+        {
+            "ID": max(id_width, len("ID")),
+            "Title": 8,
+            "Description": len("Description"),
+            "Project": min(max(project_width, len("Project")), _MAX_PROJECT_WIDTH),
+            "Tags": 6,
+        }
+    )
+    names = list(COLUMNS)
+    for optional in (None, *_OPTIONAL):
+        if optional is not None:
+            names.remove(optional)
+        room = total - _table_width(minimum[name] for name in names)
+        if room >= 0:
+            break
+    room = max(room, 0)
+
+    widths = {name: minimum[name] for name in names}
+    flexible = [name for name in names if name in _RATIOS]
+    ratios = sum(_RATIOS[name] for name in flexible)
+    for name in flexible:
+        widths[name] += room * _RATIOS[name] // ratios
+    # What rounding left over goes to the first of them, the title.
+    widths[flexible[0]] += max(total - _table_width(widths.values()), 0)
+    return widths
+
+
+def format_row(cells: Iterable[str], widths: Iterable[int]) -> str:
+    """Lay out a row as a rich table with these column widths would, on a single line."""
+    return " " + "   ".join(map(_fit, cells, widths)) + " \n"
+
+
+def page_entries(
+    pages: Callable[[int], Iterable[Sequence["Entry"]]], id_width: int, project_width: int
+) -> None:
+    """Show the entries of `pages(page_size)` a page at a time.
+
+    On a terminal, pages fill the screen and go to $PAGER when it is set, or else to a
+    built-in pager that fetches each page at a key press. Otherwise every page is printed.
+    """
+    console = Console()
+    widths = column_widths(console.width, id_width, project_width)
+    header = _header(console, widths)
+    if not console.is_terminal:
+        try:
+            console.file.write(header)
+            for page in pages(PAGE_SIZE):
+                console.file.write(_rows(page, widths))
+        except BrokenPipeError:
+            # Closed early, e.g. by head: exit quietly, as rich does.
+            console.on_broken_pipe()
+        return
+    page_size = max(console.height - _RESERVED_LINES, 1)
+    command = os.environ.get("PAGER")
+    if command:
+        _external(command, header, pages(page_size), widths)
+    else:
+        _builtin(console, header, pages(page_size), widths, page_size)
+
+
+def _table_width(widths: Iterable[int]) -> int:
+    # Each column is padded by a space on both sides and separated from the next by another.
+    widths = list(widths)
+    return sum(widths) + 3 * len(widths) - 1
+
+
+def _fit(text: str, width: int) -> str:
+    text = text.translate(_SPACES)
+    if text.isascii():
+        return text.ljust(width) if len(text) <= width else text[: width - 1] + "…"
+    if cell_len(text) > width:
+        return set_cell_size(text, width - 1) + "…"
+    return set_cell_size(text, width)
+
+
+def _header(console: Console, widths: dict[str, int]) -> str:
+    table = Table(box=box.SIMPLE_HEAD, show_edge=False)
+    for name, width in widths.items():
+        table.add_column(name, width=width, no_wrap=True, overflow="ellipsis")
+    with console.capture() as capture:
+        console.print(table)
+    return capture.get()
+
+
+def _rows(page: Iterable["Entry"], widths: dict[str, int]) -> str:
+    # Columns dropped for lack of room are left out of the rows too.
+    shown = [COLUMNS.index(name) for name in widths]
+    sizes = list(widths.values())
+    rows = []
+    for entry in page:
+        cells = entry_cells(entry)
+        rows.append(format_row([cells[index] for index in shown], sizes))
+    return "".join(rows)
+
+
+def _external(
+    command: str, header: str, pages: Iterable[Sequence["Entry"]], widths: dict[str, int]
+) -> None:
+    # As git does, let less quit on a single screen and pass colours through, unless told
+    # otherwise.
+    env = {"LESS": "FRX", **os.environ}
+    process = subprocess.Popen(
+        shlex.split(command), stdin=subprocess.PIPE, env=env, encoding="utf-8"
+    )
+    assert process.stdin is not None
+    try:
+        process.stdin.write(header)
+        for page in pages:
+            # Writes block while the pager has enough to show, so later pages are only
+            # read as the user scrolls.
+            process.stdin.write(_rows(page, widths))
+    except BrokenPipeError:
+        # The pager was quit before the last page.
+        pass
+    finally:
+        with suppress(BrokenPipeError):
+            process.stdin.close()
+        process.wait()
+
+
+def _builtin(
+    console: Console,
+    header: str,
+    pages: Iterable[Sequence["Entry"]],
+    widths: dict[str, int],
+    page_size: int,
+) -> None:
+    console.file.write(header)
+    for page in pages:
+        console.file.write(_rows(page, widths))
+        # The next page is fetched only after the key press.
+        if len(page) < page_size or not _more(console):
+            return
+
+
+def _more(console: Console) -> bool:
+    console.print(PROMPT, style="reverse", end="", markup=False, highlight=False)
+    try:
+        key = click.getchar()
+    except (KeyboardInterrupt, EOFError):
+        key = "q"
+    # Erase the prompt, so the next page continues the table.
+    console.file.write("\r\x1b[K")
+    console.file.flush()
+    return key not in QUIT_KEYS
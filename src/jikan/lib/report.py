@@ -0,0 +1,17 @@
+from enum import StrEnum
+from typing import NamedTuple
+
+
+class ReportGroup(StrEnum):
+    project = "project"
+    tag = "tag"
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class ReportRow(NamedTuple):
+    key: str | None
+    label: str
+    seconds: int
+    entries: int
@@ -0,0 +1,93 @@
+"""A small file describing the running entry, so that shell prompts need not open SQLite.
+
+The file lives next to the database and is rewritten by every change to the running entry
+just before it commits, while the transaction holds SQLite's write lock, so overlapping
+writers leave it in the order they committed. It records which database file it
+describes; when that no longer matches, or the file is missing or unreadable, readers fall
+back to the database and rewrite it.
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import suppress
+from datetime import timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+STATE_FILE_NAME = "running.json"
+STATE_VERSION = 1
+
+
+class RunningState(NamedTuple):
+    id: int
+    title: str | None
+    description: str | None
+    project: str | None
+    start_at: float  # Unix timestamp
+
+    def elapsed(self) -> timedelta:
+        return timedelta(seconds=max(time.time() - self.start_at, 0))
+
+
+class StateUnavailableError(Exception):
+    pass
+
+
+def state_path(db_path: Path) -> Path:
+    return db_path.with_name(STATE_FILE_NAME)
+
+
+def read_running_state(db_path: Path) -> RunningState | None:
+    """Return the running entry recorded for the database at `db_path`, or None if idle.
+
+    Raises StateUnavailableError when the file cannot be trusted.
+    """
+    try:
+        data = json.loads(state_path(db_path).read_bytes())
+        if data["version"] != STATE_VERSION or data["db"] != _db_identity(db_path):
+            raise StateUnavailableError("state file is stale")
+        running = data["running"]
+        return None if running is None else RunningState(**running)
+    except StateUnavailableError:
+        raise
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise StateUnavailableError(str(e)) from e
+
+
+def write_running_state(db_path: Path, state: RunningState | None) -> None:
+    """Atomically replace the state file.
+
+    Failures are not raised: the file is only a cache, so it is removed instead and readers
+    fall back to the database.
+    """
+    path = state_path(db_path)
+    try:
+        data = {
+            "version": STATE_VERSION,
+            "db": _db_identity(db_path),
+            "running": None if state is None else state._asdict(),
+        }
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{STATE_FILE_NAME}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        clear_running_state(db_path)
+
+
+def clear_running_state(db_path: Path) -> None:
+    """Remove the state file, e.g. after a change that affects what it shows."""
+    with suppress(OSError):
+        state_path(db_path).unlink(missing_ok=True)
+
+
+def _db_identity(db_path: Path) -> list[int]:
+    # A recreated or restored database is a different file, even at the same path.
+    stat = db_path.stat()
+    return [stat.st_dev, stat.st_ino]
@@ -1,42 +1,99 @@
+# Heavy dependencies (rich, sqlmodel and the jikan.core modules) are imported inside the
+# commands that need them so that starting the CLI stays cheap.
+from datetime import datetime
+from pathlib import Path
 from typing import Annotated
 
 import typer
-from rich import print
-from rich.console import Console
-from rich.table import Table
-from typer import Typer
-
-from jikan.commands import project, tag
-from jikan.core.entry import (
-    EntryAlreadyRunningError,
-    EntryNotFoundError,
-    EntryNotRunningError,
-    delete_entry,
-    edit_entry,
-    get_entry,
-    get_running_entry,
-    list_time_entry,
-    running_time,
-    start_time_entry,
-    stop_time_entry,
-)
-from jikan.core.project import ProjectNotFoundError
-from jikan.lib.datetime import format_datetime, format_timedelta, parse_dt
+from typer import Typer, echo
+
+from jikan.commands import daemon, db, dev, project, tag
+from jikan.lib.config import get_sqlite_path
+from jikan.lib.datetime import format_datetime, format_timedelta, parse_date_or_dt, parse_dt
+from jikan.lib.export import ExportFormat
+from jikan.lib.output import TAG_SEPARATOR, OutputFormat, output_format, write_rows
 from jikan.lib.print import error, success, warn
-from jikan.models import create_db_and_tables
+from jikan.lib.report import ReportGroup
+from jikan.lib.state import RunningState, StateUnavailableError, read_running_state
 
-console = Console()
+LIST_BATCH_SIZE = 500
+REJECTS_SHOWN = 10
+PROMPT_FORMAT = "{title} {elapsed}"
 
 app = Typer()
 
+# Filters shared by the commands that read entries.
+SinceOption = Annotated[str | None, typer.Option(help="Only entries started at or after this time")]
+UntilOption = Annotated[str | None, typer.Option(help="Only entries started before this time")]
+ProjectFilterOption = Annotated[
+    list[int] | None, typer.Option(help="ID of project to filter by. Can be repeated")
+]
+TagFilterOption = Annotated[
+    list[int] | None, typer.Option(help="ID of tag to filter by. Can be repeated")
+]
+TagOption = Annotated[list[int] | None, typer.Option(help="ID of tag to attach. Can be repeated")]
+SearchTermsArgument = Annotated[
+    list[str],
+    typer.Argument(
+        help="Words to look for in titles and descriptions. End one with * to match a prefix"
+    ),
+]
+
+
+def parse_range(since: str | None, until: str | None) -> tuple[datetime | None, datetime | None]:
+    try:
+        since_at = parse_date_or_dt(since) if since is not None else None
+        until_at = parse_date_or_dt(until) if until is not None else None
+    except typer.BadParameter as e:
+        error(f"Invalid --since/--until value: {e}")
+        raise typer.Exit(code=1) from e
+    return since_at, until_at
+
+
+@app.callback()
+def callback(
+    ctx: typer.Context,
+    profile: Annotated[
+        bool, typer.Option("--profile", help="Report time spent per phase on stderr")
+    ] = False,
+    trace_sql: Annotated[
+        bool,
+        typer.Option("--trace-sql", help="Report SQL statements and the slowest ones on stderr"),
+    ] = False,
+    profile_output: Annotated[
+        Path | None, typer.Option(help="Write cProfile stats of the command to this file")
+    ] = None,
+    output_format: Annotated[
+        OutputFormat,
+        typer.Option(
+            "--output-format",
+            help="Output of the list commands: a table, or json, tsv or plain rows",
+        ),
+    ] = OutputFormat.rich,
+):
+    """Jikan brings effortless time management right to your CLI!"""
+    if not (profile or trace_sql or profile_output):
+        return
+
+    from jikan.lib.instrument import Instrumentation, started_at
+
+    instrumentation = Instrumentation(started_at(), profile, trace_sql, profile_output)
+    instrumentation.start()
+    ctx.call_on_close(instrumentation.stop)
+
 
 @app.command()
 def init():
+    from jikan.models import create_db_and_tables
+
     create_db_and_tables()
 
 
 app.add_typer(project.app, name="project")
 app.add_typer(tag.app, name="tag")
+app.add_typer(db.app, name="db", help="Manage the database")
+app.add_typer(daemon.app, name="daemon", help="Manage the background daemon")
+app.add_typer(dev.app, name="dev", help="Tools for developing jikan")
 
 
 @app.command()
@@ -46,13 +103,20 @@ def start(
     description: Annotated[
         str, typer.Option("--description", "-d", help="Description of time entry")
     ] = "",
+    tag: TagOption = None,
 ):
+    from jikan.core.entry import EntryAlreadyRunningError, start_time_entry
+    from jikan.core.tag import TagNotFoundError
+
     try:
-        new_entry = start_time_entry(id, title, description)
+        new_entry = start_time_entry(id, title, description, tag or [])
         success(f"Time entry started at {new_entry.start_at}")
     except EntryAlreadyRunningError as e:
         error("Time entry is already running")
         raise typer.Exit(code=1) from e
+    except TagNotFoundError as e:
+        error("Tag not found")
+        raise typer.Exit(code=1) from e
     except Exception as e:
         error(f"Failed to start. {e}")
         raise typer.Exit(code=1) from e
@@ -60,6 +124,8 @@ def start(
 
 @app.command()
 def stop():
+    from jikan.core.entry import EntryNotRunningError, stop_time_entry
+
     try:
         entry = stop_time_entry()
         success(f"Time entry stopped at {entry.end_at}")
@@ -72,45 +138,236 @@ def stop():
 
 
 @app.command()
-def switch():
-    warn("Not implemented.")
+def switch(
+    id: Annotated[int | None, typer.Option(help="ID of associated project")] = None,
+    title: Annotated[str, typer.Option("--title", "-t", help="Title of time entry")] = "",
+    description: Annotated[
+        str, typer.Option("--description", "-d", help="Description of time entry")
+    ] = "",
+    tag: TagOption = None,
+):
+    """Stop the running time entry and start a new one"""
+    from jikan.core.entry import switch_time_entry
+    from jikan.core.tag import TagNotFoundError
+
+    try:
+        stopped_entry, new_entry = switch_time_entry(id, title, description, tag or [])
+        if stopped_entry is not None:
+            success(f"Time entry stopped at {stopped_entry.end_at}")
+        success(f"Time entry started at {new_entry.start_at}")
+    except TagNotFoundError as e:
+        error("Tag not found")
+        raise typer.Exit(code=1) from e
+    except Exception as e:
+        error(f"Failed to switch. {e}")
+        raise typer.Exit(code=1) from e
+
+
+def running_state() -> RunningState | None:
+    """The running entry from the state file, or from the database if the file is unusable."""
+    try:
+        return read_running_state(get_sqlite_path())
+    except StateUnavailableError:
+        pass
+
+    from jikan.core.entry import load_running_state
+
+    try:
+        return load_running_state()
+    except Exception as e:
+        error(f"Failed to get status. {e}")
+        raise typer.Exit(code=1) from e
 
 
 @app.command()
 def status():
-    running_entry = get_running_entry()
-
-    if len(running_entry) == 0:
-        print("No time entry running.")
+    state = running_state()
+    if state is None:
+        echo("No time entry running.")
         raise typer.Exit()
-    elif len(running_entry) > 1:
-        error("Multiple time entries running")
-        raise typer.Exit(code=1)
 
-    print(f"ID: {running_entry[0].id}")
-    print(f"Title: {running_entry[0].title}")
-    print(f"Description: {running_entry[0].description}")
-    print(f"Time entry running: {format_timedelta(running_time(running_entry[0]))}")
+    echo(f"ID: {state.id}")
+    echo(f"Title: {state.title}")
+    echo(f"Description: {state.description}")
+    echo(f"Time entry running: {format_timedelta(state.elapsed())}")
 
 
 @app.command()
-def list():
-    time_entries = list_time_entry()
-    table = Table(
-        "ID", "Title", "Description", "Start at", "End at", "Created at", "Updated at", "Project"
+def dashboard(
+    recent: Annotated[int, typer.Option(min=1, help="Number of recent entries to show")] = 10,
+    interval: Annotated[float, typer.Option(min=0.1, help="Seconds between updates")] = 1.0,
+):
+    """Show the running entry, today's totals and recent entries, updated live
+
+    Only entries that changed are read again, and the running timer ticks without queries.
+    """
+    from jikan.core.dashboard import DashboardView
+    from jikan.lib.dashboard import run
+
+    view = DashboardView(recent)
+    try:
+        view.load()
+    except Exception as e:
+        error(f"Failed to load dashboard: {e}")
+        raise typer.Exit(code=1) from e
+    try:
+        run(view, interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        view.close()
+
+
+@app.command()
+def prompt(
+    format: Annotated[
+        str,
+        typer.Option(
+            "--format",
+            "-f",
+            help="Template with {id}, {title}, {description}, {project}, {start} and {elapsed}",
+        ),
+    ] = PROMPT_FORMAT,
+    idle: Annotated[str, typer.Option(help="Text to print when no entry is running")] = "",
+):
+    """Print the running time entry in a short form for shell prompts
+
+    Reads a small state file instead of the database whenever it can.
+    """
+    state = running_state()
+    if state is None:
+        if idle:
+            echo(idle)
+        return
+
+    seconds = int(state.elapsed().total_seconds())
+    try:
+        text = format.format(
+            id=state.id,
+            title=state.title or "",
+            description=state.description or "",
+            project=state.project or "",
+            start=datetime.fromtimestamp(state.start_at).strftime("%H:%M"),
+            elapsed=f"{seconds // 3600}:{seconds // 60 % 60:02}",
+        )
+    except (KeyError, IndexError, ValueError) as e:
+        error(f"Invalid format: {e}")
+        raise typer.Exit(code=1) from e
+    echo(text)
+
+
+@app.command()
+def list(
+    since: SinceOption = None,
+    until: UntilOption = None,
+    project: ProjectFilterOption = None,
+    tag: TagFilterOption = None,
+    limit: Annotated[int | None, typer.Option(help="Maximum number of entries to show")] = None,
+    pager: Annotated[
+        bool,
+        typer.Option("--pager", help="Show a screen at a time, through $PAGER or a built-in pager"),
+    ] = False,
+):
+    since_at, until_at = parse_range(since, until)
+    format = output_format()
+    if format is not OutputFormat.rich:
+        from jikan.core.entry import ENTRY_ROW_FIELDS, iter_entry_rows
+
+        tag_separator = None if format is OutputFormat.json else TAG_SEPARATOR
+        rows = iter_entry_rows(
+            since_at, until_at, project or [], tag or [], tag_separator=tag_separator, limit=limit
+        )
+        write_rows(format, ENTRY_ROW_FIELDS, rows)
+        return
+    if pager:
+        from jikan.core.entry import iter_entry_pages, list_widths
+        from jikan.lib.pager import page_entries
+
+        try:
+            page_entries(
+                lambda page_size: iter_entry_pages(
+                    since_at, until_at, project or [], tag or [], page_size, limit
+                ),
+                *list_widths(),
+            )
+        except OSError as e:
+            error(f"Failed to page entries: {e}")
+            raise typer.Exit(code=1) from e
+        return
+
+    from rich import box
+    from rich.console import Console
+    from rich.table import Table
+
+    from jikan.core.entry import iter_time_entry, list_widths
+    from jikan.lib.pager import COLUMNS, TEXT_COLUMNS, column_widths, entry_cells
+
+    console = Console()
+    # The id, times and project keep their full width and the text columns share what is
+    # left, with columns dropped when the console is too narrow, as in the pager. Widths
+    # depend only on the console and the data, so consecutive batches line up.
+    widths = column_widths(console.width, *list_widths())
+    shown = [COLUMNS.index(name) for name in widths]
+
+    def new_table(show_header: bool) -> Table:
+        table = Table(box=box.SIMPLE_HEAD, show_edge=False, show_header=show_header)
+        for name, width in widths.items():
+            if name in TEXT_COLUMNS:
+                table.add_column(name, width=width, overflow="fold")
+            else:
+                table.add_column(name, width=width, no_wrap=True)
+        return table
+
+    table = new_table(show_header=True)
+    time_entries = iter_time_entry(
+        since_at, until_at, project or [], tag or [], limit=limit, batch_size=LIST_BATCH_SIZE
     )
     for entry in time_entries:
+        cells = entry_cells(entry)
+        table.add_row(*(cells[index] for index in shown))
+        if table.row_count == LIST_BATCH_SIZE:
+            console.print(table)
+            table = new_table(show_header=False)
+    if table.row_count or table.show_header:
+        console.print(table)
+
+
+@app.command()
+def search(
+    terms: SearchTermsArgument,
+    since: SinceOption = None,
+    until: UntilOption = None,
+    project: ProjectFilterOption = None,
+    tag: TagFilterOption = None,
+    limit: Annotated[int, typer.Option(help="Maximum number of entries to show")] = 20,
+):
+    """Search time entries, most relevant first"""
+    from rich.console import Console
+    from rich.table import Table
+
+    from jikan.core.entry import search_time_entry
+
+    since_at, until_at = parse_range(since, until)
+    try:
+        entries = search_time_entry(
+            " ".join(terms), since_at, until_at, project or [], tag or [], limit
+        )
+    except Exception as e:
+        error(f"Failed to search: {e}")
+        raise typer.Exit(code=1) from e
+
+    table = Table("ID", "Title", "Description", "Start at", "End at", "Project", "Tags")
+    for entry in entries:
         table.add_row(
             str(entry.id),
             entry.title,
             entry.description,
             format_datetime(entry.start_at),
             format_datetime(entry.end_at) if entry.end_at is not None else "None",
-            format_datetime(entry.created_at),
-            format_datetime(entry.updated_at),
-            str(entry.project_id),
+            entry.project.name if entry.project is not None else "",
+            ", ".join(tag.name for tag in entry.tags),
         )
-    console.print(table)
+    Console().print(table)
 
 
 @app.command()
@@ -123,11 +380,17 @@ def edit(
     start: Annotated[str | None, typer.Option(help="Start time of time entry")] = None,
     end: Annotated[str | None, typer.Option(help="End time of time entry")] = None,
     project: Annotated[int | None, typer.Option(help="ID of associated project")] = None,
+    tag: TagOption = None,
 ):
-    if title is None and description is None and start is None and end is None and project is None:
-        error("Either title, description, start, end or project must be specified")
+    options = (title, description, start, end, project)
+    if all(option is None for option in options) and not tag:
+        error("Either title, description, start, end, project or tag must be specified")
         raise typer.Exit(code=1) from None
 
+    from jikan.core.entry import EntryNotFoundError, edit_entry
+    from jikan.core.project import ProjectNotFoundError
+    from jikan.core.tag import TagNotFoundError
+
     start_at = None
     if start is not None:
         try:
@@ -145,8 +408,7 @@ def edit(
             raise typer.Exit(code=1) from e
 
     try:
-        entry = get_entry(id)
-        edit_entry(entry, title, description, start_at, end_at, project)
+        edit_entry(id, title, description, start_at, end_at, project, tag or [])
         success("Entry edited")
     except EntryNotFoundError as e:
         error("Entry not found")
@@ -154,6 +416,9 @@ def edit(
     except ProjectNotFoundError as e:
         error("Project not found")
         raise typer.Exit(code=1) from e
+    except TagNotFoundError as e:
+        error("Tag not found")
+        raise typer.Exit(code=1) from e
     except Exception as e:
         error(f"Failed to edit entry: {e}")
         raise typer.Exit(code=1) from e
@@ -161,11 +426,13 @@ def edit(
 
 @app.command()
 def delete(id: Annotated[int, typer.Argument(help="ID of entry to be deleted")]):
+    from jikan.core.entry import EntryNotFoundError, delete_entry, get_entry
+
     try:
         entry = get_entry(id)
-        print(str(entry))
+        echo(str(entry))
         _ = typer.confirm("Are you sure you want to delete it?", abort=True)
-        delete_entry(entry)
+        delete_entry(id)
         success("Entry deleted")
     except typer.Abort as e:
         raise typer.Exit(code=1) from e
@@ -178,10 +445,200 @@ def delete(id: Annotated[int, typer.Argument(help="ID of entry to be deleted")])
 
 
 @app.command()
-def report():
-    warn("Not implemented.")
+def report(
+    by: Annotated[ReportGroup, typer.Option("--by", "-b", help="How to group tracked time")] = (
+        ReportGroup.project
+    ),
+    since: SinceOption = None,
+    until: UntilOption = None,
+    project: ProjectFilterOption = None,
+    tag: TagFilterOption = None,
+    snapshot: Annotated[
+        bool, typer.Option("--snapshot", help="Compute from the saved columnar snapshot")
+    ] = False,
+):
+    """Show tracked time per project, tag, day, week or month"""
+    from datetime import timedelta
+
+    from rich.console import Console
+    from rich.table import Table
+
+    from jikan.core.report import report as build_report
+
+    since_at, until_at = parse_range(since, until)
+
+    if snapshot:
+        try:
+            from jikan.core import analytics
+        except ImportError as e:
+            error("--snapshot requires numpy: pip install 'jikan[analytics]'")
+            raise typer.Exit(code=1) from e
+
+    try:
+        if snapshot:
+            rows = analytics.report(
+                analytics.load_snapshot(), by, since_at, until_at, project or [], tag or []
+            )
+        else:
+            rows = build_report(by, since_at, until_at, project or [], tag or [])
+    except Exception as e:
+        error(f"Failed to build report: {e}")
+        raise typer.Exit(code=1) from e
+
+    # An entry with several tags is counted once per tag, so a tag total would overcount.
+    show_total = by is not ReportGroup.tag
+    table = Table(by.value.capitalize(), "Entries", "Time", show_footer=show_total)
+    for row in rows:
+        table.add_row(row.label, str(row.entries), format_timedelta(timedelta(seconds=row.seconds)))
+    if show_total:
+        table.columns[0].footer = "Total"
+        table.columns[1].footer = str(sum(row.entries for row in rows))
+        table.columns[2].footer = format_timedelta(
+            timedelta(seconds=sum(row.seconds for row in rows))
+        )
+    Console().print(table)
 
 
 @app.command()
-def export():
-    warn("Not implemented.")
+def export(
+    format: Annotated[ExportFormat, typer.Option("--format", "-f", help="Output format")] = (
+        ExportFormat.csv
+    ),
+    output: Annotated[
+        Path | None, typer.Option("--output", "-o", help="File to write. Defaults to stdout")
+    ] = None,
+    compress: Annotated[bool, typer.Option("--gzip", help="Compress output with gzip")] = False,
+    since: SinceOption = None,
+    until: UntilOption = None,
+    project: ProjectFilterOption = None,
+    tag: TagFilterOption = None,
+):
+    """Export time entries"""
+    from jikan.core.entry import ENTRY_ROW_FIELDS, iter_entry_rows
+    from jikan.lib.export import CSV_TAG_SEPARATOR, WRITERS, open_export_stream
+
+    since_at, until_at = parse_range(since, until)
+    tag_separator = CSV_TAG_SEPARATOR if format is ExportFormat.csv else None
+
+    try:
+        rows = iter_entry_rows(
+            since_at, until_at, project or [], tag or [], tag_separator=tag_separator
+        )
+        with open_export_stream(output, compress) as stream:
+            count = WRITERS[format](ENTRY_ROW_FIELDS, rows, stream)
+    except Exception as e:
+        error(f"Failed to export: {e}")
+        raise typer.Exit(code=1) from e
+
+    if output is not None:
+        success(f"Exported {count} entries to {output}")
+
+
+@app.command("import")
+def import_(
+    path: Annotated[
+        Path,
+        typer.Argument(help="CSV or JSONL file, optionally gzipped", exists=True, dir_okay=False),
+    ],
+    format: Annotated[
+        ExportFormat | None,
+        typer.Option("--format", "-f", help="Input format. Guessed from the file name by default"),
+    ] = None,
+    timezone: Annotated[
+        str, typer.Option(help="Time zone of timestamps without an offset, e.g. Europe/Berlin")
+    ] = "UTC",
+    rejects: Annotated[
+        Path | None, typer.Option(help="Write rejected rows and the reason to this CSV file")
+    ] = None,
+    restart: Annotated[
+        bool, typer.Option("--restart", help="Import again from the start, even if already done")
+    ] = False,
+):
+    """Import finished time entries from a jikan, Toggl or Clockify export
+
+    An interrupted import resumes where it stopped when run again on the same file.
+    """
+    import csv
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
+    from jikan.core.importer import ImportAlreadyDoneError, import_entries
+    from jikan.lib.importer import file_digest, guess_format, open_import_stream, read_records
+
+    try:
+        tz = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        error(f"Unknown time zone: {timezone}")
+        raise typer.Exit(code=1) from e
+
+    try:
+        input_format = format or guess_format(path)
+        with (
+            open_import_stream(path) as stream,
+            Progress(SpinnerColumn(), TextColumn("{task.description}"), transient=True) as bar,
+        ):
+            task = bar.add_task("Importing")
+            summary = import_entries(
+                read_records(stream, input_format, tz),
+                digest=file_digest(path),
+                source=path.name,
+                restart=restart,
+                progress=lambda job: bar.update(
+                    task, description=f"Imported {job.imported}, rejected {job.rejected}"
+                ),
+            )
+    except ImportAlreadyDoneError as e:
+        error(f"{e}. Pass --restart to import it again")
+        raise typer.Exit(code=1) from e
+    except Exception as e:
+        error(f"Failed to import: {e}")
+        raise typer.Exit(code=1) from e
+
+    if summary.skipped:
+        echo(f"Resumed after {summary.skipped} rows processed by an earlier run")
+    success(f"Imported {summary.imported} entries from {path}")
+    if not summary.rejected:
+        return
+    warn(f"Rejected {len(summary.rejected)} rows")
+    if rejects is not None:
+        with rejects.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(("line", "reason"))
+            writer.writerows(summary.rejected)
+        echo(f"Rejected rows written to {rejects}")
+    else:
+        for row in summary.rejected[:REJECTS_SHOWN]:
+            echo(f"  row {row.line}: {row.reason}")
+        if len(summary.rejected) > REJECTS_SHOWN:
+            echo(
+                f"  ... and {len(summary.rejected) - REJECTS_SHOWN} more; use --rejects to save all"
+            )
+
+
+@app.command()
+def serve(
+    host: Annotated[str, typer.Option(help="Address to listen on")] = "127.0.0.1",
+    port: Annotated[int, typer.Option(help="Port to listen on")] = 7355,
+    workers: Annotated[
+        int, typer.Option(min=1, help="Threads, and database connections, for requests")
+    ] = 4,
+):
+    """Serve a local HTTP/JSON API for editor plugins and other integrations"""
+    import asyncio
+
+    from jikan.models import configure_engine
+
+    # One pooled connection per worker thread; a request never waits on a connection.
+    configure_engine(pool_size=workers, max_overflow=0)
+
+    from jikan.server import serve as serve_api
+
+    echo(f"Serving on http://{host}:{port}")
+    try:
+        asyncio.run(serve_api(host, port, get_sqlite_path(), workers))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        error(f"Failed to serve: {e}")
+        raise typer.Exit(code=1) from e
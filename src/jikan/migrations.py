@@ -0,0 +1,164 @@
+"""Schema migrations, tracked in SQLite's `PRAGMA user_version`.
+
+Each migration takes the schema from the previous version to its own and runs in one
+transaction together with the version bump, so a failed step leaves the database as it was.
+Steps that create tables or indexes skip the ones that already exist, which lets databases
+set up before versioning was introduced start at version 0.
+
+Append new migrations to MIGRATIONS; never change or reorder released ones.
+"""
+
+import secrets
+from collections.abc import Callable, Sequence
+from typing import NamedTuple
+
+from sqlalchemy import Table, insert, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex
+from sqlmodel import Session, SQLModel
+
+from jikan.models import (
+    CHANGE_COUNTER_DDL,
+    ENTRY_CHANGE_DDL,
+    ChangeCounter,
+    ChangeReader,
+    DailyRollup,
+    Entry,
+    EntryChange,
+    EntryTagLink,
+    ImportJob,
+    Project,
+    Tag,
+    create_entry_fts,
+    entry_change_bound_ddl,
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def _create_tables(*models: type[SQLModel]) -> Callable[[Connection], None]:
+    def apply(connection: Connection) -> None:
+        tables: list[Table] = [model.__table__ for model in models]  # type: ignore[misc]
+        SQLModel.metadata.create_all(connection, tables=tables)
+
+    return apply
+
+
+def _create_indexes(*names: str) -> Callable[[Connection], None]:
+    def apply(connection: Connection) -> None:
+        indexes = {
+            index.name: index for t in SQLModel.metadata.tables.values() for index in t.indexes
+        }
+        for name in names:
+            # IF NOT EXISTS, as reflection cannot tell whether an expression index exists.
+            connection.execute(CreateIndex(indexes[name], if_not_exists=True))
+
+    return apply
+
+
+def _create_daily_rollup(connection: Connection) -> None:
+    from jikan.core import rollup
+
+    _create_tables(DailyRollup)(connection)
+    with Session(bind=connection) as session:
+        rollup.rebuild(session)
+
+
+def _create_entry_fts(connection: Connection) -> None:
+    # New databases got it along with the entry table in version 1.
+    if not inspect(connection).has_table("entry_fts"):
+        create_entry_fts(connection)
+
+
+def _create_entry_change_log(connection: Connection) -> None:
+    _create_tables(EntryChange, ChangeReader)(connection)
+    for statement in ENTRY_CHANGE_DDL:
+        connection.exec_driver_sql(statement)
+
+
+def _create_change_counter(connection: Connection) -> None:
+    _create_tables(ChangeCounter)(connection)
+    connection.execute(
+        insert(ChangeCounter)
+        .values(id=1, database_id=secrets.token_hex(8))
+        .prefix_with("OR IGNORE")
+    )
+    for statement in CHANGE_COUNTER_DDL:
+        connection.exec_driver_sql(statement)
+
+
+def _bound_reader_lag(connection: Connection) -> None:
+    connection.exec_driver_sql(entry_change_bound_ddl())
+
+
+MIGRATIONS = (
+    Migration(
+        1,
+        "Create projects, tags, entries and their links",
+        _create_tables(Project, Tag, Entry, EntryTagLink),
+    ),
+    Migration(
+        2,
+        "Index running entries and entries by start time",
+        _create_indexes("ix_entry_running", "ix_entry_start_at_id"),
+    ),
+    Migration(3, "Add the daily rollup used by reports", _create_daily_rollup),
+    Migration(4, "Track progress of bulk imports", _create_tables(ImportJob)),
+    Migration(5, "Add full-text search of entries", _create_entry_fts),
+    Migration(
+        6,
+        "Index entries by project and by tag, and active projects",
+        _create_indexes(
+            "ix_entry_project_id_start_at", "ix_entrytaglink_tag_id_entry_id", "ix_project_active"
+        ),
+    ),
+    Migration(7, "Log entry changes for derived data", _create_entry_change_log),
+    Migration(8, "Count writes for caching results", _create_change_counter),
+    Migration(9, "Bound how far change readers can lag", _bound_reader_lag),
+)
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(connection: Connection) -> int:
+    """The database's schema version, read without starting a transaction."""
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute("PRAGMA user_version")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def pending_migrations(connection: Connection) -> Sequence[Migration]:
+    version = schema_version(connection)
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def migrate(connection: Connection) -> Sequence[Migration]:
+    """Apply the pending migrations and return them.
+
+    When the schema is up to date this costs a single pragma read. Each migration runs in a
+    BEGIN IMMEDIATE transaction that checks the version again, so processes starting at the
+    same time apply every migration once.
+    """
+    if not pending_migrations(connection):
+        return []
+
+    applied = []
+    begin_mode = connection.get_execution_options().get("sqlite_begin", "DEFERRED")
+    connection.execution_options(sqlite_begin="IMMEDIATE")
+    try:
+        for migration in MIGRATIONS:
+            with connection.begin():
+                if schema_version(connection) >= migration.version:
+                    continue
+                migration.apply(connection)
+                connection.exec_driver_sql(f"PRAGMA user_version = {migration.version}")
+            applied.append(migration)
+    finally:
+        connection.execution_options(sqlite_begin=begin_mode)
+    return applied
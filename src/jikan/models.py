@@ -1,17 +1,157 @@
+import json
+from collections.abc import Iterable
 from datetime import datetime, timedelta
+from functools import cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from sqlmodel import Field, Relationship, Session, SQLModel, create_engine, inspect
+from sqlalchemy import ColumnElement, Index, column, event, func, select, table
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql.selectable import TableValuedAlias
+from sqlmodel import Field, Relationship, Session, SQLModel, col, create_engine
 
+from jikan.lib.config import get_sqlite_path
 from jikan.lib.datetime import utc_now
 
-SQLITE_FILE_NAME = "database.db"
-APP_DIR = Path.home() / ".jikan"
-APP_DIR.mkdir(parents=True, exist_ok=True)
-SQLITE_PATH = APP_DIR / SQLITE_FILE_NAME
-SQLITE_URL = f"sqlite:///{SQLITE_PATH}"
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
-engine = create_engine(SQLITE_URL)
+# Applied to every new DBAPI connection. WAL lets readers run alongside a writer and,
+# together with synchronous=NORMAL, turns each commit into a single append to the log.
+SQLITE_PRAGMAS: dict[str, str | int] = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,  # ms to wait for a lock instead of failing with "database is locked"
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # negative values are KiB, i.e. 64 MiB
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+def create_sqlite_engine(url: str, **kwargs: Any) -> Engine:
+    """Create an engine whose connections are configured with SQLITE_PRAGMAS.
+
+    Transactions are started by the engine rather than by the sqlite3 driver, so that
+    `immediate()` can ask for BEGIN IMMEDIATE.
+    """
+    engine = create_engine(url, **kwargs)
+    _configure_sqlite(engine)
+    return engine
+
+
+def create_async_sqlite_engine(url: str, **kwargs: Any) -> "AsyncEngine":
+    """Async counterpart of create_sqlite_engine() for a `sqlite+aiosqlite://` URL."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(url, **kwargs)
+    _configure_sqlite(engine.sync_engine)
+    return engine
+
+
+def _configure_sqlite(engine: Engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn: Connection) -> None:
+        mode = conn.get_execution_options().get("sqlite_begin", "DEFERRED")
+        conn.exec_driver_sql(f"BEGIN {mode}")
+
+
+def database_path(engine: "Engine | AsyncEngine") -> Path | None:
+    """Path of the SQLite file behind `engine`, or None for an in-memory database."""
+    database = engine.url.database
+    if not database or database == ":memory:":
+        return None
+    return Path(database)
+
+
+def immediate[E: (Engine, "AsyncEngine")](engine: E) -> E:
+    """Return a view of `engine` whose transactions start with BEGIN IMMEDIATE.
+
+    The write lock is taken before the first read, so a check-then-write done in one
+    session cannot interleave with another writer.
+    """
+    return engine.execution_options(sqlite_begin="IMMEDIATE")
+
+
+def id_values(ids: Iterable[int]) -> TableValuedAlias:
+    """A table with one `value` column holding `ids`, bound as a single JSON parameter.
+
+    Unlike a plain IN list this needs one bound variable for any number of ids, so
+    statements over thousands of rows neither hit SQLite's variable limit nor recompile.
+    """
+    return func.json_each(json.dumps(sorted(set(ids)))).table_valued("value")
+
+
+def in_ids(column: Any, ids: Iterable[int]) -> ColumnElement[bool]:
+    """`column IN ids`, see id_values()."""
+    return column.in_(select(id_values(ids).c.value))
+
+
+# Extra create_engine() arguments for the application engine, see configure_engine().
+_engine_options: dict[str, Any] = {}
+
+
+def configure_engine(**kwargs: Any) -> None:
+    """Set create_engine() arguments, e.g. pool sizes, for the application engine.
+
+    Must be called before the engine is first used.
+    """
+    if get_engine.cache_info().currsize:
+        raise RuntimeError("The engine has already been created")
+    _engine_options.update(kwargs)
+
+
+@cache
+def get_engine() -> Engine:
+    """Create the application engine on first use.
+
+    Its first connection brings the schema up to date, see jikan.migrations.
+    """
+    sqlite_path = get_sqlite_path()
+    sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+    engine = create_sqlite_engine(f"sqlite:///{sqlite_path}", **_engine_options)
+    event.listen(engine, "engine_connect", _migrate, once=True)
+    return engine
+
+
+@cache
+def get_async_engine() -> "AsyncEngine":
+    """Create the async application engine, on the same database file, on first use.
+
+    Requires the optional aiosqlite dependency.
+    """
+    sqlite_path = get_sqlite_path()
+    sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+    engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{sqlite_path}")
+    event.listen(engine.sync_engine, "engine_connect", _migrate, once=True)
+    return engine
+
+
+def _migrate(connection: Connection) -> None:
+    # Applies pending migrations on the first connection of an application engine. It is
+    # deferred until then so that migrations can use modules that import the engine.
+    from jikan.migrations import migrate
+
+    migrate(connection)
+
+
+def __getattr__(name: str) -> Any:
+    # Engines are resolved lazily so that importing the models does not touch the filesystem.
+    # Look them up as models.engine when needed: importing the name would create the engine.
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class EntryTagLink(SQLModel, table=True):
@@ -62,47 +202,273 @@ class Entry(SQLModel, table=True):
         return f"Entry(id={self.id}, title={self.title})"
 
 
+class DailyRollup(SQLModel, table=True):
+    """Tracked time of finished entries per UTC day of start_at, project and tag.
+
+    Derived from `entry` and kept up to date by jikan.core.rollup.
+    """
+
+    __tablename__ = "daily_rollup"  # type: ignore[assignment]
+
+    day: str = Field(primary_key=True)
+    project_id: int = Field(primary_key=True)
+    tag_id: int = Field(primary_key=True)
+    seconds: float = Field(default=0)
+    entries: int = Field(default=0)
+
+
+class ImportJob(SQLModel, table=True):
+    """Progress of importing one source file, committed with each imported chunk."""
+
+    __tablename__ = "import_job"  # type: ignore[assignment]
+
+    id: int | None = Field(default=None, primary_key=True)
+    digest: str = Field(unique=True)  # SHA-256 of the source file
+    source: str
+    position: int = Field(default=0)  # records of the source consumed so far
+    imported: int = Field(default=0)
+    rejected: int = Field(default=0)
+    finished_at: datetime | None = Field(default=None)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
+
+
+class EntryChange(SQLModel, table=True):
+    """An entry that was added, changed, retagged or deleted.
+
+    Written by triggers, see ENTRY_CHANGE_DDL, only while a ChangeReader exists.
+    """
+
+    __tablename__ = "entry_change"  # type: ignore[assignment]
+    # AUTOINCREMENT: a seq is never reused, even after the log is pruned.
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: int | None = Field(default=None, primary_key=True)
+    entry_id: int
+
+
+class ChangeReader(SQLModel, table=True):
+    """A consumer of entry_change, e.g. a derived cache, and the last seq it has applied.
+
+    Dropped by a trigger once it lags more than MAX_READER_LAG changes behind.
+    """
+
+    __tablename__ = "change_reader"  # type: ignore[assignment]
+
+    name: str = Field(primary_key=True)
+    seq: int = Field(default=0)
+
+
+class ChangeCounter(SQLModel, table=True):
+    """A single row counting writes to the tables reports and lists are built from.
+
+    Bumped by triggers, see CHANGE_COUNTER_DDL. With database_id, which is random per
+    database, it identifies a state of the data across processes.
+    """
+
+    __tablename__ = "change_counter"  # type: ignore[assignment]
+
+    id: int = Field(default=1, primary_key=True)
+    database_id: str
+    value: int = Field(default=0)
+
+
+# At most one entry may be running. Every running row indexes the same value, so a second
+# one violates uniqueness; finished entries are not in the index at all.
+Index(
+    "ix_entry_running",
+    col(Entry.end_at).is_(None),
+    unique=True,
+    sqlite_where=col(Entry.end_at).is_(None),
+)
+# Listing order and keyset pagination.
+Index("ix_entry_start_at_id", col(Entry.start_at), col(Entry.id))
+# Entries of given projects, in time order or within a time range.
+Index("ix_entry_project_id_start_at", col(Entry.project_id), col(Entry.start_at))
+# Entries with given tags. The primary key leads with entry_id, so it cannot serve these; this
+# index covers them without touching the table.
+Index("ix_entrytaglink_tag_id_entry_id", col(EntryTagLink.tag_id), col(EntryTagLink.entry_id))
+# Active projects, in id order. The condition must match list_project_statement() exactly for
+# SQLite to use the index.
+Index(
+    "ix_project_active",
+    col(Project.id),
+    sqlite_where=col(Project.archived) == False,  # noqa: E712
+)
+
+# Full-text index over entry titles and descriptions. It is an external-content FTS5 table:
+# the text is stored only in `entry`, and the triggers keep the index in step with it.
+# `entry_fts` is the hidden column to MATCH against and `rank` orders by relevance.
+entry_fts = table("entry_fts", column("rowid"), column("entry_fts"), column("rank"))
+ENTRY_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE entry_fts USING fts5(
+        title, description, content='entry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    # A match in the title counts twice as much as one in the description.
+    "INSERT INTO entry_fts(entry_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0)')",
+    """
+    CREATE TRIGGER entry_fts_insert AFTER INSERT ON entry BEGIN
+        INSERT INTO entry_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER entry_fts_delete AFTER DELETE ON entry BEGIN
+        INSERT INTO entry_fts(entry_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    # Only text changes touch the index; stopping an entry does not.
+    """
+    CREATE TRIGGER entry_fts_update AFTER UPDATE OF title, description ON entry BEGIN
+        INSERT INTO entry_fts(entry_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO entry_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+)
+
+
+# Log changes to entries into entry_change. Nothing is logged, and the log cannot grow, unless
+# some reader has registered in change_reader.
+_LOG_WHEN = "WHEN EXISTS (SELECT 1 FROM change_reader)"
+ENTRY_CHANGE_DDL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS entry_change_insert AFTER INSERT ON entry {_LOG_WHEN} BEGIN
+        INSERT INTO entry_change(entry_id) VALUES (new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS entry_change_update AFTER UPDATE ON entry {_LOG_WHEN} BEGIN
+        INSERT INTO entry_change(entry_id) VALUES (new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS entry_change_delete AFTER DELETE ON entry {_LOG_WHEN} BEGIN
+        INSERT INTO entry_change(entry_id) VALUES (old.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS entry_change_link AFTER INSERT ON entrytaglink {_LOG_WHEN} BEGIN
+        INSERT INTO entry_change(entry_id) VALUES (new.entry_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS entry_change_unlink AFTER DELETE ON entrytaglink {_LOG_WHEN} BEGIN
+        INSERT INTO entry_change(entry_id) VALUES (old.entry_id);
+    END
+    """,
+)
+
+
+# How many changes a reader may fall behind before it is dropped, so a reader that stopped
+# reading cannot make the log grow without limit. A dropped reader finds itself gone, see
+# changes.reader_seq, and rebuilds what it derives.
+MAX_READER_LAG = 100_000
+
+
+def entry_change_bound_ddl(max_lag: int = MAX_READER_LAG) -> str:
+    """The trigger dropping readers more than `max_lag` changes behind, and what only they kept."""
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS entry_change_bound AFTER INSERT ON entry_change
+    WHEN (SELECT min(seq) FROM change_reader) < new.seq - {max_lag} BEGIN
+        DELETE FROM change_reader WHERE seq < new.seq - {max_lag};
+        DELETE FROM entry_change
+        WHERE seq <= coalesce((SELECT min(seq) FROM change_reader), new.seq);
+    END
+    """
+
+
+# Tables whose writes bump change_counter, and the writes that can change them.
+_COUNTED_WRITES = {
+    "entry": ("INSERT", "UPDATE", "DELETE"),
+    "entrytaglink": ("INSERT", "DELETE"),
+    "project": ("INSERT", "UPDATE", "DELETE"),
+    "tag": ("INSERT", "UPDATE", "DELETE"),
+    "daily_rollup": ("INSERT", "UPDATE", "DELETE"),
+}
+CHANGE_COUNTER_DDL = tuple(
+    f"""
+    CREATE TRIGGER IF NOT EXISTS change_counter_{table}_{write.lower()}
+    AFTER {write} ON {table} BEGIN
+        UPDATE change_counter SET value = value + 1;
+    END
+    """
+    for table, writes in _COUNTED_WRITES.items()
+    for write in writes
+)
+
+
+def create_entry_fts(connection: Connection) -> None:
+    """Create the full-text index of entries and fill it from the existing rows."""
+    for statement in ENTRY_FTS_DDL:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql("INSERT INTO entry_fts(entry_fts) VALUES ('rebuild')")
+
+
+@event.listens_for(Entry.__table__, "after_create")
+def _create_entry_fts(target, connection: Connection, **kwargs: Any) -> None:
+    create_entry_fts(connection)
+
+
+@event.listens_for(Entry.__table__, "before_drop")
+def _drop_entry_fts(target, connection: Connection, **kwargs: Any) -> None:
+    connection.exec_driver_sql("DROP TABLE IF EXISTS entry_fts")
+
+
 def create_db_and_tables() -> None:
-    inspector = inspect(engine)
-    if inspector.has_table("project"):
-        print("Table project exist.")
-        return
-    else:
-        SQLModel.metadata.create_all(engine)
-
-        project = Project(
-            name="Learn about jikan",
-            description="Learn about jikan to manage your time effectively!",
-            archived=False,
-        )
-        with Session(engine) as session:
-            session.add(project)
-            session.commit()
-            session.refresh(project)
-
-        tag1 = Tag(name="Read docs")
-        tag2 = Tag(name="Use jikan")
-        with Session(engine) as session:
-            session.add(tag1)
-            session.add(tag2)
-            session.commit()
-            session.refresh(tag1)
-            session.refresh(tag2)
-
-        assert project.id is not None
-        entry = Entry(
-            title="Install jikan and give it a try",
-            description="Dive in jikan to explore what it's all about!",
-            project=project,
-            tags=[tag1, tag2],
-        )
-        inbox_entry = Entry(
-            title="Inbox",
-            tags=[tag1, tag2],
-        )
-        entry.end_at = utc_now() + timedelta(seconds=10)
-        inbox_entry.end_at = utc_now() + timedelta(seconds=10)
-        with Session(engine) as session:
-            session.add(entry)
-            session.add(inbox_entry)
-            session.commit()
+    """Bring the schema up to date and add sample data to a database that has none."""
+    from jikan.migrations import migrate
+
+    engine = get_engine()
+    with engine.connect() as connection:
+        # Normally a no-op, as get_engine() migrates on the first connection.
+        migrate(connection)
+    with Session(engine) as session:
+        if session.exec(select(Project.id).union_all(select(Entry.id))).first() is not None:
+            return
+
+    project = Project(
+        name="Learn about jikan",
+        description="Learn about jikan to manage your time effectively!",
+        archived=False,
+    )
+    with Session(engine) as session:
+        session.add(project)
+        session.commit()
+        session.refresh(project)
+
+    tag1 = Tag(name="Read docs")
+    tag2 = Tag(name="Use jikan")
+    with Session(engine) as session:
+        session.add(tag1)
+        session.add(tag2)
+        session.commit()
+        session.refresh(tag1)
+        session.refresh(tag2)
+
+    assert project.id is not None
+    entry = Entry(
+        title="Install jikan and give it a try",
+        description="Dive in jikan to explore what it's all about!",
+        project=project,
+        tags=[tag1, tag2],
+    )
+    inbox_entry = Entry(
+        title="Inbox",
+        tags=[tag1, tag2],
+    )
+    entry.end_at = utc_now() + timedelta(seconds=10)
+    inbox_entry.end_at = utc_now() + timedelta(seconds=10)
+    with Session(engine) as session:
+        session.add(entry)
+        session.add(inbox_entry)
+        session.commit()
+
+    from jikan.core.rollup import rebuild_rollups
+
+    rebuild_rollups()
@@ -0,0 +1,452 @@
+"""Local HTTP/JSON API for editor plugins, menubar widgets and dashboards.
+
+An asyncio server parses requests and answers conditional GETs on the event loop; the
+core functions run in a bounded pool of worker threads, each with at most one pooled
+database connection.
+
+Every response to a GET carries an ETag derived from SQLite's data_version, which changes
+whenever any connection, in this process or another, commits. A client that polls with
+If-None-Match gets 304 Not Modified without touching the worker pool.
+
+POST bodies must be sent as application/json, and browsers may only send them from the
+API's own origin, so that other web pages cannot start or stop timers.
+
+    GET  /entries?since=&until=&project=&tag=&after=&limit=
+    GET  /entries/running
+    POST /entries/start   {"project_id": 1, "title": "", "description": "", "tags": [1]}
+    POST /entries/stop
+    POST /entries/switch  {"project_id": 1, "title": "", "description": "", "tags": [1]}
+    GET  /projects
+    GET  /tags
+    GET  /report?by=project&since=&until=&project=&tag=
+"""
+
+import asyncio
+import json
+import secrets
+import sqlite3
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import datetime
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+from jikan.lib.datetime import ensure_utc_aware
+from jikan.lib.report import ReportGroup
+
+# Bounds on what a client may send.
+MAX_HEADER_LINES = 100
+MAX_BODY_SIZE = 64 * 1024
+LIST_LIMIT = 100
+MAX_LIST_LIMIT = 1000
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    headers: dict[str, str]
+    body: bytes
+
+    def json(self) -> dict[str, Any]:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON") from e
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        return data
+
+    def param(self, name: str) -> str | None:
+        values = self.query.get(name)
+        return values[-1] if values else None
+
+    def ids(self, name: str) -> list[int]:
+        try:
+            return [int(value) for value in self.query.get(name, [])]
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer") from e
+
+    def datetime(self, name: str) -> datetime | None:
+        value = self.param(name)
+        if value is None:
+            return None
+        try:
+            return ensure_utc_aware(datetime.fromisoformat(value))
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be an ISO 8601 time") from e
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+Handler = Callable[[Request], tuple[HTTPStatus, Any]]
+
+
+def _int_field(data: dict[str, Any], name: str) -> int | None:
+    value = data.get(name)
+    if value is not None and not _is_int(value):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer or null")
+    return value
+
+
+def _ids_field(data: dict[str, Any], name: str) -> list[int]:
+    value = data.get(name, [])
+    if not isinstance(value, list) or not all(_is_int(id) for id in value):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be a list of integers")
+    return value
+
+
+def _str_field(data: dict[str, Any], name: str) -> str:
+    value = data.get(name, "")
+    if not isinstance(value, str):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be a string")
+    return value
+
+
+def _is_int(value: Any) -> bool:
+    # JSON true and false load as bools, which are ints too.
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    if value is None:
+        return None
+    return ensure_utc_aware(value).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _entry(entry: Any) -> dict[str, Any] | None:
+    if entry is None:
+        return None
+    return {
+        "id": entry.id,
+        "title": entry.title,
+        "description": entry.description,
+        "start_at": _isoformat(entry.start_at),
+        "end_at": _isoformat(entry.end_at),
+        "project_id": entry.project_id,
+    }
+
+
+def _listed_entry(entry: Any) -> dict[str, Any]:
+    # Entries from list_time_entry come with their project and tags loaded.
+    return {
+        **(_entry(entry) or {}),
+        "project": entry.project.name if entry.project is not None else None,
+        "tags": [tag.name for tag in entry.tags],
+    }
+
+
+def list_entries(request: Request) -> tuple[HTTPStatus, Any]:
+    from jikan.core.entry import entry_cursor, list_time_entry
+
+    limit = request.ids("limit")[-1] if "limit" in request.query else LIST_LIMIT
+    if not 0 < limit <= MAX_LIST_LIMIT:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"limit must be between 1 and {MAX_LIST_LIMIT}")
+    after = None
+    if (cursor := request.param("after")) is not None:
+        try:
+            start_at, id = cursor.rsplit(",", 1)
+            after = (datetime.fromisoformat(start_at).replace(tzinfo=None), int(id))
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "after must be a next cursor") from e
+
+    entries = list_time_entry(
+        request.datetime("since"),
+        request.datetime("until"),
+        request.ids("project"),
+        request.ids("tag"),
+        after,
+        limit,
+    )
+    next_cursor = None
+    if len(entries) == limit:
+        start_at, id = entry_cursor(entries[-1])
+        next_cursor = f"{start_at.isoformat()},{id}"
+    return HTTPStatus.OK, {"entries": [_listed_entry(e) for e in entries], "next": next_cursor}
+
+
+def running_entry(request: Request) -> tuple[HTTPStatus, Any]:
+    from jikan.core.entry import get_running_entry
+
+    running = get_running_entry()
+    return HTTPStatus.OK, {"entry": _entry(running[0]) if running else None}
+
+
+def start_entry(request: Request) -> tuple[HTTPStatus, Any]:
+    from jikan.core.entry import EntryAlreadyRunningError, start_time_entry
+    from jikan.core.tag import TagNotFoundError
+
+    data = request.json()
+    try:
+        entry = start_time_entry(
+            _int_field(data, "project_id"),
+            _str_field(data, "title"),
+            _str_field(data, "description"),
+            _ids_field(data, "tags"),
+        )
+    except EntryAlreadyRunningError as e:
+        raise HTTPError(HTTPStatus.CONFLICT, "Time entry is already running") from e
+    except TagNotFoundError as e:
+        raise HTTPError(HTTPStatus.NOT_FOUND, "Tag not found") from e
+    return HTTPStatus.CREATED, {"entry": _entry(entry)}
+
+
+def stop_entry(request: Request) -> tuple[HTTPStatus, Any]:
+    from jikan.core.entry import EntryNotRunningError, stop_time_entry
+
+    try:
+        entry = stop_time_entry()
+    except EntryNotRunningError as e:
+        raise HTTPError(HTTPStatus.CONFLICT, "No time entry running") from e
+    return HTTPStatus.OK, {"entry": _entry(entry)}
+
+
+def switch_entry(request: Request) -> tuple[HTTPStatus, Any]:
+    from jikan.core.entry import switch_time_entry
+    from jikan.core.tag import TagNotFoundError
+
+    data = request.json()
+    try:
+        stopped, started = switch_time_entry(
+            _int_field(data, "project_id"),
+            _str_field(data, "title"),
+            _str_field(data, "description"),
+            _ids_field(data, "tags"),
+        )
+    except TagNotFoundError as e:
+        raise HTTPError(HTTPStatus.NOT_FOUND, "Tag not found") from e
+    return HTTPStatus.CREATED, {"stopped": _entry(stopped), "started": _entry(started)}
+
+
+def list_projects(request: Request) -> tuple[HTTPStatus, Any]:
+    from jikan.core.project import list_project
+
+    projects = [{"id": p.id, "name": p.name, "description": p.description} for p in list_project()]
+    return HTTPStatus.OK, {"projects": projects}
+
+
+def list_tags(request: Request) -> tuple[HTTPStatus, Any]:
+    from jikan.core.tag import list_tag
+
+    return HTTPStatus.OK, {"tags": [{"id": t.id, "name": t.name} for t in list_tag()]}
+
+
+def build_report(request: Request) -> tuple[HTTPStatus, Any]:
+    from jikan.core.report import report
+
+    try:
+        by = ReportGroup(request.param("by") or ReportGroup.project)
+    except ValueError as e:
+        groups = ", ".join(ReportGroup)
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"by must be one of {groups}") from e
+    rows = report(
+        by,
+        request.datetime("since"),
+        request.datetime("until"),
+        request.ids("project"),
+        request.ids("tag"),
+    )
+    return HTTPStatus.OK, {"by": by.value, "rows": [row._asdict() for row in rows]}
+
+
+ROUTES: dict[tuple[str, str], Handler] = {
+    ("GET", "/entries"): list_entries,
+    ("GET", "/entries/running"): running_entry,
+    ("POST", "/entries/start"): start_entry,
+    ("POST", "/entries/stop"): stop_entry,
+    ("POST", "/entries/switch"): switch_entry,
+    ("GET", "/projects"): list_projects,
+    ("GET", "/tags"): list_tags,
+    ("GET", "/report"): build_report,
+}
+# Responses that include the elapsed time of the running entry, which changes without a commit.
+LIVE_ROUTES = {"/report"}
+
+
+class ApiServer:
+    def __init__(self, db_path: Path, workers: int) -> None:
+        self.db_path = db_path
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="jikan-api")
+        # Distinguishes ETags across restarts, since data_version starts over per connection.
+        self.instance = secrets.token_hex(4)
+        self._version_db: sqlite3.Connection | None = None
+        self._running: tuple[int, bool] | None = None
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        if self._version_db is not None:
+            self._version_db.close()
+
+    def data_version(self) -> int:
+        # This connection never writes, so its data_version changes on every commit made
+        # through any other connection. Reading it does not touch the database file.
+        if self._version_db is None:
+            self._version_db = sqlite3.connect(self.db_path)
+        return self._version_db.execute("PRAGMA data_version").fetchone()[0]
+
+    async def etag(self, path: str) -> str:
+        version = self.data_version()
+        tag = f"{self.instance}-{version}"
+        if path in LIVE_ROUTES and await self._is_running(version):
+            tag += f"-{int(time.time())}"
+        return f'W/"{tag}"'
+
+    async def _is_running(self, version: int) -> bool:
+        if self._running is None or self._running[0] != version:
+            from jikan.core.entry import get_running_entry
+
+            running = await self.run(lambda: bool(get_running_entry()))
+            self._running = (version, running)
+        return self._running[1]
+
+    async def run[T](self, function: Callable[[], T]) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function)
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    await _write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                status, payload, headers = await self.respond(request)
+                await _write_response(writer, status, payload, headers, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def respond(self, request: Request) -> tuple[HTTPStatus, Any, dict[str, str]]:
+        handler = ROUTES.get((request.method, request.path))
+        if handler is None:
+            if any(path == request.path for _, path in ROUTES):
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Method not allowed"}, {}
+            return HTTPStatus.NOT_FOUND, {"error": "Not found"}, {}
+
+        if request.method == "POST":
+            # A web page can send a form POST to localhost without a preflight, but not one
+            # with a JSON content type, and browsers send its Origin.
+            content_type = request.headers.get("content-type", "").partition(";")[0]
+            if content_type.strip().lower() != "application/json":
+                return (
+                    HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                    {"error": "Content-Type must be application/json"},
+                    {},
+                )
+            if not _same_origin(request):
+                return HTTPStatus.FORBIDDEN, {"error": "Cross-origin request"}, {}
+
+        headers: dict[str, str] = {}
+        if request.method == "GET":
+            etag = headers["ETag"] = await self.etag(request.path)
+            if etag in _parse_etags(request.headers.get("if-none-match", "")):
+                return HTTPStatus.NOT_MODIFIED, None, headers
+        try:
+            status, payload = await self.run(lambda: handler(request))
+        except HTTPError as e:
+            return e.status, {"error": str(e)}, {}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}, {}
+        return status, payload, headers
+
+
+def _same_origin(request: Request) -> bool:
+    # Clients other than browsers send no Origin.
+    origin = request.headers.get("origin")
+    return origin is None or urlsplit(origin).netloc == request.headers.get("host")
+
+
+def _parse_etags(value: str) -> set[str]:
+    return {tag.strip() for tag in value.split(",") if tag.strip()}
+
+
+async def _read_line(reader: asyncio.StreamReader, status: HTTPStatus, message: str) -> str:
+    # Lines longer than the reader's limit are refused rather than buffered.
+    try:
+        line = await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        line = e.partial
+    except asyncio.LimitOverrunError as e:
+        raise HTTPError(status, message) from e
+    return line.decode("latin-1")
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Request | None:
+    line = await _read_line(reader, HTTPStatus.BAD_REQUEST, "Request line too long")
+    if not line:
+        return None
+    try:
+        method, target, _ = line.split()
+    except ValueError as e:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line") from e
+
+    headers: dict[str, str] = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await _read_line(
+            reader, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Header line too long"
+        )
+        header = line.strip()
+        if not header:
+            break
+        name, _, value = header.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers")
+
+    content_length = headers.get("content-length") or "0"
+    if not (content_length.isascii() and content_length.isdigit()):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length must be a non-negative integer")
+    length = int(content_length)
+    if length > MAX_BODY_SIZE:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    return Request(method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query), headers, body)
+
+
+async def _write_response(
+    writer: asyncio.StreamWriter,
+    status: HTTPStatus,
+    payload: Any,
+    headers: dict[str, str] | None = None,
+    keep_alive: bool = True,
+) -> None:
+    body = b"" if payload is None else json.dumps(payload).encode()
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    if payload is not None:
+        lines.append("Content-Type: application/json")
+    lines.append(f"Content-Length: {len(body)}")
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(host: str, port: int, db_path: Path, workers: int) -> None:
+    api = ApiServer(db_path, workers)
+    server = await asyncio.start_server(api.handle_connection, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        api.close()
@@ -1,32 +1,66 @@
 from collections.abc import Generator
+from datetime import timedelta
+from pathlib import Path
 
 import pytest
 from pytest_mock import MockerFixture
 from sqlalchemy.engine import Engine
-from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
-
-import jikan.core.entry as entry_core
-import jikan.core.project as project_core
-import jikan.core.tag as tag_core
-from jikan.models import Entry, Project, Tag
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session
+
+import jikan.models
+from jikan.lib.datetime import utc_now
+from jikan.migrations import migrate
+from jikan.models import (
+    Entry,
+    Project,
+    Tag,
+    create_async_sqlite_engine,
+    create_sqlite_engine,
+    get_async_engine,
+    get_engine,
+)
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Generator[Path, None, None]:
+    # Keep commands that fall back to the default data directory away from the real one. The
+    # engines are created on first use, so they are dropped to pick up the new directory.
+    monkeypatch.setenv("JIKAN_DATA_DIR", str(tmp_path / "data"))
+    _clear_engines()
+    yield tmp_path / "data"
+    _clear_engines()
+
+
+def _clear_engines() -> None:
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+    get_engine.cache_clear()
+    get_async_engine.cache_clear()
 
 
 @pytest.fixture()
-def test_engine() -> Generator[Engine, None, None]:
-    engine = create_engine(
-        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
-    )
-    SQLModel.metadata.create_all(engine)
+def test_engine(tmp_path: Path) -> Generator[Engine, None, None]:
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.connect() as connection:
+        migrate(connection)
     yield engine
-    SQLModel.metadata.drop_all(engine)
+    engine.dispose()
 
 
 @pytest.fixture()
 def use_test_engine(mocker: MockerFixture, test_engine: Engine) -> None:
-    core_modules = (project_core, tag_core, entry_core)
-    for module in core_modules:
-        mocker.patch.object(module, "engine", test_engine)
+    # Core modules look up jikan.models.engine when they run, which finds this first.
+    mocker.patch.object(jikan.models, "engine", test_engine, create=True)
+
+
+@pytest.fixture()
+def use_async_test_engine(mocker: MockerFixture, tmp_path: Path, test_engine: Engine) -> None:
+    # Same database file as test_engine. NullPool: each test call runs its own event loop.
+    engine = create_async_sqlite_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool
+    )
+    mocker.patch.object(jikan.models, "async_engine", engine, create=True)
 
 
 @pytest.fixture()
@@ -37,7 +71,7 @@ def seed_projects(use_test_engine: None) -> None:
         Project(id=3, name="archived-1", description="x1", archived=True),
     ]
 
-    with Session(project_core.engine) as session:
+    with Session(jikan.models.engine) as session:
         session.add_all(projects)
         session.commit()
 
@@ -49,7 +83,7 @@ def seed_tags(use_test_engine: None) -> None:
         Tag(id=2, name="tag-2"),
     ]
 
-    with Session(tag_core.engine) as session:
+    with Session(jikan.models.engine) as session:
         session.add_all(tags)
         session.commit()
 
@@ -60,7 +94,7 @@ def seed_active_entry(use_test_engine: None) -> None:
 
     entry = Entry(id=1, project_id=project.id, title="Entry 1", description="Entry 1")
 
-    with Session(entry_core.engine) as session:
+    with Session(jikan.models.engine) as session:
         session.add(project)
         session.add(entry)
         session.commit()
@@ -75,6 +109,8 @@ def seed_entries(use_test_engine: None) -> None:
             project_id=project.id,
             title="entry-1",
             description="entry 1",
+            start_at=utc_now() - timedelta(hours=1),
+            end_at=utc_now(),
         ),
         Entry(
             id=2,
@@ -84,7 +120,7 @@ def seed_entries(use_test_engine: None) -> None:
         ),
     ]
 
-    with Session(tag_core.engine) as session:
+    with Session(jikan.models.engine) as session:
         session.add(project)
         session.add_all(entries)
         session.commit()
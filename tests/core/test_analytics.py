@@ -0,0 +1,222 @@
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+from pytest_mock import MockFixture
+from sqlalchemy import text
+from sqlmodel import Session, func, select
+
+import jikan.core.analytics as analytics_core
+import jikan.core.entry as entry_core
+import jikan.core.report as report_core
+import jikan.models
+from jikan.core.analytics import (
+    build_snapshot,
+    load_snapshot,
+    read_snapshot,
+    refresh_snapshot,
+    report,
+    snapshot_dir,
+)
+from jikan.core.seed import seed_history
+from jikan.lib.report import ReportGroup
+from jikan.models import (
+    ChangeReader,
+    Entry,
+    EntryChange,
+    EntryTagLink,
+    Project,
+    Tag,
+    entry_change_bound_ddl,
+)
+
+NOW = datetime(2024, 1, 10, 12, 0, 0, tzinfo=UTC)
+
+FILTERS = [
+    {},
+    {"since": datetime(2024, 1, 1, tzinfo=UTC)},
+    {"since": datetime(2024, 1, 1, 10, tzinfo=UTC), "until": datetime(2024, 1, 9, tzinfo=UTC)},
+    {"project_ids": [1]},
+    {"tag_ids": [2]},
+    {"tag_ids": [1, 2], "project_ids": [1, 2]},
+]
+
+
+@pytest.fixture()
+def history(use_test_engine: None, mocker: MockFixture) -> None:
+    mocker.patch("jikan.core.report.utc_now", return_value=NOW)
+
+    def entry(id: int, start: datetime, hours: float | None, project_id: int | None) -> Entry:
+        end_at = None if hours is None else start + timedelta(hours=hours)
+        return Entry(
+            id=id, title=f"entry-{id}", start_at=start, end_at=end_at, project_id=project_id
+        )
+
+    with Session(jikan.models.engine) as session:
+        session.add_all([Project(id=1, name="alpha"), Project(id=2, name="beta")])
+        session.add_all([Tag(id=1, name="focus"), Tag(id=2, name="meeting")])
+        session.add_all(
+            [
+                entry(1, datetime(2023, 12, 31, 9, tzinfo=UTC), 2, 1),
+                entry(2, datetime(2024, 1, 1, 9, tzinfo=UTC), 1, 1),
+                entry(3, datetime(2024, 1, 1, 13, tzinfo=UTC), 0.5, 2),
+                entry(4, datetime(2024, 1, 8, 9, tzinfo=UTC), 3, None),
+                # Project 9 does not exist, so it is reported as no project.
+                entry(6, datetime(2024, 1, 9, 9, tzinfo=UTC), 1, 9),
+                entry(5, datetime(2024, 1, 10, 10, 30, tzinfo=UTC), None, 2),
+            ]
+        )
+        session.add_all(
+            [
+                EntryTagLink(entry_id=1, tag_id=1),
+                EntryTagLink(entry_id=2, tag_id=1),
+                EntryTagLink(entry_id=2, tag_id=2),
+                EntryTagLink(entry_id=3, tag_id=2),
+                EntryTagLink(entry_id=6, tag_id=9),
+            ]
+        )
+        session.commit()
+
+
+def assert_same_reports(snapshot: analytics_core.Snapshot) -> None:
+    for group_by in ReportGroup:
+        for filters in FILTERS:
+            expected = report_core.report(group_by, use_rollup=False, **filters)
+            assert report(snapshot, group_by, now=NOW, **filters) == expected, (group_by, filters)
+
+
+class TestSnapshot:
+    def test_columns(self, history: None):
+        snapshot = build_snapshot()
+
+        assert snapshot.ids.tolist() == [1, 2, 3, 4, 5, 6]
+        assert snapshot.project.tolist() == [1, 1, 2, 0, 2, 9]
+        assert snapshot.end[4] == analytics_core.RUNNING
+        assert (snapshot.end[:4] - snapshot.start[:4]).tolist() == [
+            h * 3_600_000_000 for h in (2, 1, 0.5, 3)
+        ]
+        assert snapshot.tag_offsets.tolist() == [0, 1, 3, 4, 4, 4, 5]
+        assert snapshot.tag_ids.tolist() == [1, 1, 2, 2, 9]
+
+    def test_report_matches_sql(self, history: None):
+        assert_same_reports(build_snapshot())
+
+    def test_report_matches_sql_on_seeded_history(self, use_test_engine: None):
+        seed_history(500, users=2, projects=4, tags=5, end=NOW)
+
+        assert_same_reports(build_snapshot())
+
+    def test_empty_database(self, use_test_engine: None):
+        snapshot = build_snapshot()
+
+        assert len(snapshot.ids) == 0
+        assert report(snapshot, ReportGroup.tag) == []
+
+
+class TestRefresh:
+    def test_unchanged(self, history: None):
+        snapshot = build_snapshot()
+
+        assert refresh_snapshot(snapshot) is snapshot
+
+    def test_applies_changes(self, history: None):
+        snapshot = build_snapshot()
+        entry_core.edit_entry(2, project_id=2, end_at=datetime(2024, 1, 1, 12))
+        entry_core.delete_entry(3)
+        entry_core.attach_tags([1], [2])
+        entry_core.detach_tags([2], [1])
+        with Session(jikan.models.engine) as session:
+            start = datetime(2024, 1, 3, 9, tzinfo=UTC)
+            session.add(Entry(id=7, title="new", start_at=start, end_at=start + timedelta(hours=1)))
+            session.commit()
+
+        refreshed = refresh_snapshot(snapshot)
+
+        assert refreshed.seq > snapshot.seq
+        assert refreshed.ids.tolist() == [1, 2, 4, 5, 6, 7]
+        assert_same_reports(refreshed)
+
+    def test_prunes_applied_changes(self, history: None):
+        snapshot = build_snapshot()
+        entry_core.delete_entry(3)
+
+        refresh_snapshot(snapshot)
+
+        with Session(jikan.models.engine) as session:
+            assert session.exec(select(func.count(EntryChange.seq))).one() == 0
+
+    def test_rebuilds_when_reader_is_gone(self, history: None):
+        snapshot = build_snapshot()
+        with Session(jikan.models.engine) as session:
+            session.delete(session.get(ChangeReader, analytics_core.READER))
+            session.commit()
+        entry_core.delete_entry(3)
+
+        refreshed = refresh_snapshot(snapshot)
+
+        assert refreshed.ids.tolist() == [1, 2, 4, 5, 6]
+
+    def test_rebuilds_when_reader_moves_meanwhile(self, history: None, mocker: MockFixture):
+        snapshot = build_snapshot()
+        entry_core.delete_entry(3)
+        # Another process refreshes between the first check and the write transaction.
+        mocker.patch.object(
+            analytics_core.changes, "reader_seq", side_effect=[snapshot.seq, snapshot.seq + 1]
+        )
+        rebuild = mocker.spy(analytics_core, "build_snapshot")
+
+        refreshed = refresh_snapshot(snapshot)
+
+        rebuild.assert_called_once()
+        assert refreshed.ids.tolist() == [1, 2, 4, 5, 6]
+
+    def test_log_stays_bounded(self, history: None):
+        with Session(jikan.models.engine) as session:
+            session.exec(text("DROP TRIGGER entry_change_bound"))
+            session.exec(text(entry_change_bound_ddl(max_lag=5)))
+            session.commit()
+        snapshot = build_snapshot()
+
+        for i in range(20):
+            entry_core.edit_entry(1 + i % 6, title=f"edit-{i}")
+
+        with Session(jikan.models.engine) as session:
+            assert session.exec(select(func.count()).select_from(EntryChange)).one() <= 5
+            assert session.get(ChangeReader, analytics_core.READER) is None
+        refreshed = refresh_snapshot(snapshot)
+        assert refreshed is not snapshot
+        with Session(jikan.models.engine) as session:
+            assert session.get(ChangeReader, analytics_core.READER) is not None
+        assert_same_reports(refreshed)
+
+
+class TestPersistence:
+    def test_saved_next_to_database(self, history: None, tmp_path: Path):
+        assert snapshot_dir() == tmp_path / "analytics"
+
+        load_snapshot()
+
+        saved = read_snapshot(tmp_path / "analytics")
+        assert saved is not None
+        assert saved.ids.tolist() == [1, 2, 3, 4, 5, 6]
+
+    def test_reloaded_memory_mapped_and_refreshed(self, history: None, tmp_path: Path):
+        load_snapshot(tmp_path / "snapshot")
+        entry_core.delete_entry(1)
+
+        snapshot = load_snapshot(tmp_path / "snapshot")
+        reloaded = load_snapshot(tmp_path / "snapshot")
+
+        assert snapshot.ids.tolist() == reloaded.ids.tolist() == [2, 3, 4, 5, 6]
+        assert isinstance(reloaded.ids, np.memmap)
+        # Only the latest arrays are kept.
+        assert len([p for p in (tmp_path / "snapshot").iterdir() if p.is_dir()]) == 1
+
+    def test_unreadable_snapshot_is_rebuilt(self, history: None, tmp_path: Path):
+        directory = tmp_path / "snapshot"
+        directory.mkdir()
+        (directory / "meta.json").write_text("{not json")
+
+        assert read_snapshot(directory) is None
+        assert load_snapshot(directory).ids.tolist() == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,198 @@
+"""The sync and async core APIs, run through the same tests."""
+
+import asyncio
+import functools
+from collections.abc import Callable
+from datetime import timedelta
+from types import ModuleType, SimpleNamespace
+from typing import Any
+
+import pytest
+from sqlmodel import Session, select
+
+import jikan.core.aio.entry as async_entry_core
+import jikan.core.aio.project as async_project_core
+import jikan.core.aio.tag as async_tag_core
+import jikan.core.entry as entry_core
+import jikan.core.project as project_core
+import jikan.core.tag as tag_core
+import jikan.models
+from jikan.core.entry import EntryAlreadyRunningError, EntryNotFoundError, EntryNotRunningError
+from jikan.core.project import ProjectNotFoundError
+from jikan.core.tag import TagNotFoundError
+from jikan.lib.datetime import utc_now
+from jikan.lib.state import read_running_state
+from jikan.models import DailyRollup, database_path
+
+
+def _run_async(function: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(function)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        return asyncio.run(function(*args, **kwargs))
+
+    return run
+
+
+def _namespace(*modules: ModuleType, wrap: Callable[[Callable], Callable]) -> SimpleNamespace:
+    names = {}
+    for module in modules:
+        for name in dir(module):
+            value = getattr(module, name)
+            if getattr(value, "__module__", None) == module.__name__ and callable(value):
+                names[name] = wrap(value)
+    return SimpleNamespace(**names)
+
+
+@pytest.fixture(params=["sync", "async"])
+def core(
+    request: pytest.FixtureRequest, use_test_engine: None, use_async_test_engine: None
+) -> SimpleNamespace:
+    if request.param == "sync":
+        return _namespace(entry_core, project_core, tag_core, wrap=lambda f: f)
+    return _namespace(async_entry_core, async_project_core, async_tag_core, wrap=_run_async)
+
+
+def rollup_rows() -> list[tuple]:
+    with Session(jikan.models.engine) as session:
+        rows = session.exec(select(DailyRollup)).all()
+        return sorted((r.project_id, r.tag_id, r.entries) for r in rows)
+
+
+class TestEntries:
+    def test_start_stop(self, core: SimpleNamespace):
+        started = core.start_time_entry(None, "title", "description")
+        assert started.end_at is None
+        with pytest.raises(EntryAlreadyRunningError):
+            core.start_time_entry(None, "again", "")
+
+        stopped = core.stop_time_entry()
+
+        assert stopped.id == started.id
+        assert stopped.end_at is not None
+        assert rollup_rows() == [(0, -1, 1), (0, 0, 1)]
+        with pytest.raises(EntryNotRunningError):
+            core.stop_time_entry()
+
+    def test_switch_with_tags(self, core: SimpleNamespace, seed_tags: None):
+        core.start_time_entry(None, "first", "")
+
+        stopped, started = core.switch_time_entry(None, "second", "", [2, 1, 2])
+
+        assert stopped is not None and stopped.end_at == started.start_at
+        with Session(jikan.models.engine) as session:
+            assert sorted(t.id for t in session.get(type(started), started.id).tags) == [1, 2]
+
+    def test_switch_tag_not_found(self, core: SimpleNamespace):
+        with pytest.raises(TagNotFoundError):
+            core.switch_time_entry(None, "", "", [9])
+        assert core.get_running_entry() == []
+
+    def test_running_state_file(self, core: SimpleNamespace, seed_projects: None):
+        core.start_time_entry(1, "work", "")
+
+        state = read_running_state(database_path(jikan.models.engine))
+
+        assert state is not None
+        assert (state.title, state.project) == ("work", "active-1")
+
+    def test_edit_moves_rollup(self, core: SimpleNamespace, seed_entries: None):
+        core.add_project("other", "")
+        entry = core.get_entry(1)
+
+        edited = core.edit_entry(entry.id, title="edited", project_id=2)
+
+        assert (edited.title, edited.project_id) == ("edited", 2)
+        assert rollup_rows() == [(2, -1, 1), (2, 0, 1)]
+
+    def test_edit_rejects_end_before_start(self, core: SimpleNamespace, seed_entries: None):
+        entry = core.get_entry(1)
+        with pytest.raises(ValueError):
+            core.edit_entry(entry.id, end_at=entry.start_at - timedelta(hours=1))
+
+    def test_edit_project_not_found(self, core: SimpleNamespace, seed_entries: None):
+        with pytest.raises(ProjectNotFoundError):
+            core.edit_entry(1, project_id=9)
+
+    def test_delete(self, core: SimpleNamespace, seed_entries: None):
+        core.delete_entry(1)
+
+        with pytest.raises(EntryNotFoundError):
+            core.get_entry(1)
+        assert rollup_rows() == []
+
+    def test_attach_and_detach_tags(self, core: SimpleNamespace, seed_entries: None):
+        core.add_tag("a")
+        core.add_tag("b")
+
+        assert core.attach_tags([1, 2], [1, 2]) == 4
+        assert core.detach_tags([1], [1, 2]) == 2
+        assert [[t.name for t in e.tags] for e in core.list_time_entry()] == [[], ["a", "b"]]
+        assert rollup_rows() == [(1, -1, 1), (1, 0, 1)]
+
+    def test_list_pages(self, core: SimpleNamespace, use_test_engine: None):
+        now = utc_now()
+        with Session(jikan.models.engine) as session:
+            for i in range(5):
+                entry = entry_core.new_entry(None, f"e{i}", "", now + timedelta(minutes=i))
+                entry.end_at = entry.start_at
+                session.add(entry)
+            session.commit()
+
+        first = core.list_time_entry(limit=3)
+        second = core.list_time_entry(after=entry_core.entry_cursor(first[-1]), limit=3)
+
+        assert [e.title for e in first] == ["e0", "e1", "e2"]
+        assert [e.title for e in second] == ["e3", "e4"]
+
+
+class TestProjectsAndTags:
+    def test_project_lifecycle(self, core: SimpleNamespace):
+        project = core.add_project("p", "d")
+        project = core.edit_project(project.id, "renamed", None)
+        assert [p.name for p in core.list_project()] == ["renamed"]
+
+        core.set_project_archived(project.id, True)
+        assert core.list_project() == []
+
+        core.delete_project(project.id)
+        with pytest.raises(ProjectNotFoundError):
+            core.get_project(project.id)
+
+    def test_tag_lifecycle(self, core: SimpleNamespace):
+        tag = core.add_tag("t")
+        tag = core.edit_tag(tag.id, "renamed")
+        assert [t.name for t in core.list_tag()] == ["renamed"]
+
+        core.delete_tag(tag.id)
+        with pytest.raises(TagNotFoundError):
+            core.get_tag(tag.id)
+
+    def test_empty_names(self, core: SimpleNamespace):
+        with pytest.raises(ValueError):
+            core.add_project("", "")
+        with pytest.raises(ValueError):
+            core.add_tag("")
+
+
+class TestAsync:
+    def test_concurrent_reads(self, seed_entries: None, use_async_test_engine: None):
+        async def read() -> list:
+            return await asyncio.gather(
+                async_entry_core.list_time_entry(),
+                async_entry_core.get_running_entry(),
+                async_project_core.list_project(),
+                async_tag_core.list_tag(),
+            )
+
+        entries, running, projects, tags = asyncio.run(read())
+
+        assert [e.id for e in entries] == [1, 2]
+        assert [e.id for e in running] == [2]
+        assert [p.name for p in projects] == ["project-1"]
+        assert tags == []
+
+    def test_iter_time_entry(self, seed_entries: None, use_async_test_engine: None):
+        async def collect() -> list[int]:
+            return [e.id async for e in async_entry_core.iter_time_entry(batch_size=1)]
+
+        assert asyncio.run(collect()) == [1, 2]
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockFixture
+from sqlmodel import Session
+
+import jikan.core.cache as cache_core
+import jikan.core.entry as entry_core
+import jikan.core.report as report_core
+import jikan.models
+from jikan.core.cache import ResultCache, data_version
+from jikan.lib.report import ReportGroup
+from jikan.models import ChangeCounter, Entry, Project
+
+
+def add_project(id: int) -> None:
+    with Session(jikan.models.engine) as session:
+        session.add(Project(id=id, name=f"project-{id}"))
+        session.commit()
+
+
+class TestDataVersion:
+    def test_counts_writes(self, use_test_engine: None):
+        database_id, value = data_version()
+        add_project(1)
+
+        assert data_version() == (database_id, value + 1)
+
+    def test_none_without_counter(self, use_test_engine: None):
+        with Session(jikan.models.engine) as session:
+            session.delete(session.get(ChangeCounter, 1))
+            session.commit()
+
+        assert data_version() is None
+
+
+class TestResultCache:
+    def test_hit_until_data_changes(self, use_test_engine: None, mocker: MockFixture):
+        cache = ResultCache()
+        compute = mocker.Mock(side_effect=[1, 2])
+
+        assert cache.get("key", compute) == 1
+        assert cache.get("key", compute) == 1
+        add_project(1)
+        assert cache.get("key", compute) == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_least_recently_used_dropped(self, use_test_engine: None, mocker: MockFixture):
+        cache = ResultCache(max_entries=2)
+        cache.get("a", lambda: "a")
+        cache.get("b", lambda: "b")
+        cache.get("a", lambda: "a")
+        cache.get("c", lambda: "c")
+
+        compute = mocker.Mock(return_value="again")
+        assert cache.get("a", compute) == "a"
+        assert cache.get("b", compute) == "again"
+
+    def test_not_cached_without_counter(self, use_test_engine: None, mocker: MockFixture):
+        mocker.patch.object(cache_core, "data_version", return_value=None)
+        cache = ResultCache()
+        compute = mocker.Mock(side_effect=[1, 2])
+
+        assert cache.get("key", compute) == 1
+        assert cache.get("key", compute) == 2
+
+    def test_disk_shared_between_caches(
+        self, use_test_engine: None, mocker: MockFixture, tmp_path: Path
+    ):
+        ResultCache(directory=tmp_path / "cache").get(("report", 1), lambda: [1, 2])
+        compute = mocker.Mock()
+
+        assert ResultCache(directory=tmp_path / "cache").get(("report", 1), compute) == [1, 2]
+        compute.assert_not_called()
+
+    def test_disk_bounded(self, use_test_engine: None, tmp_path: Path):
+        cache = ResultCache(directory=tmp_path / "cache", max_files=2)
+        for key in range(4):
+            cache.get(key, lambda: "value")
+
+        assert len(list((tmp_path / "cache").glob("*.pickle"))) == 2
+
+    def test_damaged_file_recomputed(self, use_test_engine: None, tmp_path: Path):
+        cache = ResultCache(directory=tmp_path / "cache")
+        cache.get("key", lambda: 1)
+        for path in (tmp_path / "cache").glob("*.pickle"):
+            path.write_bytes(b"damaged")
+
+        assert ResultCache(directory=tmp_path / "cache").get("key", lambda: 2) == 2
+
+
+@pytest.fixture()
+def entries(use_test_engine: None) -> None:
+    start = datetime(2024, 1, 1, 9)
+    with Session(jikan.models.engine) as session:
+        session.add(Project(id=1, name="alpha"))
+        session.add_all(
+            [
+                Entry(id=1, title="a", start_at=start, end_at=start + timedelta(hours=1)),
+                Entry(id=2, title="b", start_at=start + timedelta(hours=2), project_id=1),
+            ]
+        )
+        session.commit()
+
+
+class TestCachedCoreFunctions:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, mocker: MockFixture) -> None:
+        mocker.patch.object(report_core, "result_cache", return_value=ResultCache())
+        mocker.patch.object(entry_core, "result_cache", return_value=ResultCache())
+
+    def test_report_aggregates_finished_entries_once(self, entries: None, mocker: MockFixture):
+        aggregate = mocker.spy(report_core, "_rollup_report")
+        first = report_core.report(ReportGroup.project)
+        mocker.patch("jikan.core.report.utc_now", return_value=datetime.now() + timedelta(hours=1))
+        second = report_core.report(ReportGroup.project)
+
+        assert aggregate.call_count == 1
+        # The running entry is still counted up to now.
+        assert second[0].label == "alpha"
+        assert second[0].seconds > first[0].seconds
+
+    def test_report_recomputed_after_write(self, entries: None, mocker: MockFixture):
+        report_core.report(ReportGroup.project)
+        entry_core.delete_entry(1)
+
+        rows = report_core.report(ReportGroup.project)
+
+        assert [row.label for row in rows] == ["alpha"]
+
+    def test_list_page(self, entries: None, mocker: MockFixture):
+        iterate = mocker.spy(entry_core, "iter_time_entry")
+        entry_core.list_time_entry(limit=10)
+        entries = entry_core.list_time_entry(limit=10)
+
+        assert [entry.id for entry in entries] == [1, 2]
+        assert iterate.call_count == 1
+
+        entry_core.edit_entry(1, title="edited")
+        assert entry_core.list_time_entry(limit=10)[0].title == "edited"
+
+    def test_list_without_limit_not_cached(self, entries: None, mocker: MockFixture):
+        iterate = mocker.spy(entry_core, "iter_time_entry")
+        entry_core.list_time_entry()
+        entry_core.list_time_entry()
+
+        assert iterate.call_count == 2
@@ -0,0 +1,137 @@
+from collections.abc import Generator
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from pytest_mock import MockFixture
+from sqlmodel import Session, select
+
+import jikan.core.dashboard as dashboard_core
+import jikan.core.entry as entry_core
+import jikan.core.project as project_core
+import jikan.models
+from jikan.core.dashboard import DashboardView, ProjectTotal
+from jikan.models import ChangeReader, Entry, EntryChange, Project
+
+NOW = datetime(2024, 1, 10, 12, 0, 0, tzinfo=UTC)
+TODAY = datetime(2024, 1, 10)
+
+
+@pytest.fixture()
+def history(use_test_engine: None, mocker: MockFixture) -> None:
+    mocker.patch("jikan.core.dashboard.utc_now", return_value=NOW)
+    with Session(jikan.models.engine) as session:
+        session.add(Project(id=1, name="alpha"))
+        # Two a day, at 9:00 and 10:00, from four days ago to today.
+        for id in range(1, 11):
+            start_at = TODAY - timedelta(days=(10 - id) // 2) + timedelta(hours=10 - id % 2)
+            session.add(
+                Entry(
+                    id=id,
+                    title=f"entry-{id}",
+                    start_at=start_at,
+                    end_at=start_at + timedelta(minutes=30),
+                    project_id=1 if id % 2 else None,
+                )
+            )
+        # Running since 11:00 today.
+        session.add(Entry(id=11, title="running", start_at=TODAY + timedelta(hours=11)))
+        session.commit()
+
+
+@pytest.fixture()
+def view(history: None) -> Generator[DashboardView, None, None]:
+    view = DashboardView(recent=3)
+    view.load()
+    yield view
+    view.close()
+
+
+def ids(entries) -> list[int]:
+    return [entry.id for entry in entries]
+
+
+class TestLoad:
+    def test_view(self, view: DashboardView):
+        assert ids(view.latest()) == [11, 10, 9]
+        assert view.running().id == 11
+        assert sorted(view.entries) == [9, 10, 11]
+
+    def test_today(self, view: DashboardView):
+        assert view.today(NOW) == [
+            ProjectTotal("(no project)", 1.5 * 3600, 2),
+            ProjectTotal("alpha", 0.5 * 3600, 1),
+        ]
+
+    def test_registers_reader(self, view: DashboardView):
+        with Session(jikan.models.engine) as session:
+            assert session.get(ChangeReader, view.reader) is not None
+
+    def test_removes_readers_of_dead_processes(self, history: None, mocker: MockFixture):
+        with Session(jikan.models.engine) as session:
+            session.add(ChangeReader(name="dashboard-999999999", seq=0))
+            session.commit()
+        mocker.patch("jikan.core.dashboard._alive", return_value=False)
+
+        view = DashboardView()
+        view.load()
+        view.close()
+
+        with Session(jikan.models.engine) as session:
+            assert session.exec(select(ChangeReader.name)).all() == []
+
+
+class TestRefresh:
+    def test_idle(self, view: DashboardView, mocker: MockFixture):
+        changed = mocker.spy(dashboard_core.changes, "changed_entries")
+
+        assert view.refresh() is False
+        assert view.refresh() is False
+        changed.assert_not_called()
+
+    def test_fetches_changed_entries_only(self, view: DashboardView):
+        view.refresh()
+        unchanged = view.entries[9]
+        entry_core.stop_time_entry()
+        entry_core.edit_entry(10, title="edited")
+
+        assert view.refresh() is True
+        assert view.entries[10].title == "edited"
+        assert view.running() is None
+        assert view.entries[9] is unchanged
+
+    def test_new_entry(self, view: DashboardView):
+        entry_core.stop_time_entry()
+        entry_core.start_time_entry(None, "new", "")
+
+        view.refresh()
+
+        assert view.running().title == "new"
+        assert ids(view.latest())[1:] == [11, 10]
+
+    def test_deleted_entries_make_room_for_older_ones(self, view: DashboardView):
+        entry_core.delete_entry(10)
+        entry_core.delete_entry(9)
+
+        view.refresh()
+
+        assert ids(view.latest()) == [11, 8, 7]
+
+    def test_renamed_project(self, view: DashboardView):
+        project_core.edit_project(1, "renamed", None)
+
+        view.refresh()
+
+        assert view.entries[9].project.name == "renamed"
+
+    def test_new_day(self, view: DashboardView, mocker: MockFixture):
+        mocker.patch("jikan.core.dashboard.utc_now", return_value=NOW + timedelta(days=1))
+
+        assert view.refresh() is True
+        assert view.today(NOW + timedelta(days=1)) == []
+
+    def test_close_stops_logging(self, view: DashboardView):
+        view.close()
+        entry_core.edit_entry(10, title="edited")
+
+        with Session(jikan.models.engine) as session:
+            assert session.exec(select(EntryChange)).all() == []
@@ -1,23 +1,51 @@
+import multiprocessing
+import sqlite3
+from collections.abc import Generator, Sequence
+from contextlib import closing
 from datetime import datetime, timedelta
+from pathlib import Path
 
 import pytest
 from pytest_mock import MockFixture
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, select
 
+import jikan.core.entry as entry_core
+import jikan.models
 from jikan.core.entry import (
+    ENTRY_ROW_FIELDS,
     EntryAlreadyRunningError,
     EntryNotFoundError,
     EntryNotRunningError,
+    attach_tags,
     delete_entry,
+    detach_tags,
     edit_entry,
+    entry_cursor,
     get_entry,
     get_running_entry,
+    iter_entry_pages,
+    iter_entry_rows,
+    iter_time_entry,
     list_time_entry,
+    list_widths,
+    load_running_state,
+    search_time_entry,
     start_time_entry,
     stop_time_entry,
+    switch_time_entry,
 )
-from jikan.core.project import ProjectNotFoundError
-from jikan.lib.datetime import utc_now
-from jikan.models import Entry, Project
+from jikan.core.project import ProjectNotFoundError, edit_project
+from jikan.core.tag import TagNotFoundError
+from jikan.lib.datetime import ensure_utc_aware, utc_now
+from jikan.lib.state import (
+    RunningState,
+    StateUnavailableError,
+    read_running_state,
+    write_running_state,
+)
+from jikan.models import Entry, EntryTagLink, Project, Tag, create_sqlite_engine, database_path
 
 
 class TestGetEntry:
@@ -34,7 +62,7 @@ class TestEditEntry:
     def test_success(self, seed_entries: None):
         now = datetime.now()  # TO BE FIXED
         entry = get_entry(1)
-        edit_entry(entry, "Edited", "Edited", now, now, 1)
+        edit_entry(entry.id, "Edited", "Edited", now, now, 1)
         entry = get_entry(1)
 
         assert entry.title == "Edited"
@@ -45,7 +73,7 @@ class TestEditEntry:
 
     def test_options_are_none(self, seed_entries: None):
         entry_before = get_entry(1)
-        edit_entry(entry_before, None, None)
+        edit_entry(entry_before.id, None, None)
         entry_after = get_entry(1)
 
         assert entry_after.title is not None
@@ -55,7 +83,7 @@ class TestEditEntry:
 
     def test_description_is_empty(self, seed_entries: None):
         entry_before = get_entry(1)
-        edit_entry(entry_before, "Edited", "")
+        edit_entry(entry_before.id, "Edited", "")
         entry_after = get_entry(1)
 
         assert entry_after.title == "Edited"
@@ -66,27 +94,27 @@ class TestEditEntry:
             id=1000, project_id=1000, title="entry", description="entry", start_at=datetime.now()
         )
         with pytest.raises(EntryNotFoundError):
-            edit_entry(not_exist_entry, "edited", "edited")
+            edit_entry(not_exist_entry.id, "edited", "edited")
 
     def test_associated_project_not_found(self, seed_entries: None):
         project = Project(id=1000, name="Not exist")
         entry = get_entry(1)
         with pytest.raises(ProjectNotFoundError):
-            edit_entry(entry, "Edited", "Edited", project_id=project.id)
+            edit_entry(entry.id, "Edited", "Edited", project_id=project.id)
 
     def test_end_is_later_than_start(self, seed_entries: None):
         entry = get_entry(1)
         now = datetime.now()
         future = now + timedelta(seconds=10)
         with pytest.raises(ValueError):
-            edit_entry(entry, "Edited", "Edited", future, now)
+            edit_entry(entry.id, "Edited", "Edited", future, now)
 
 
 class TestEntryDelete:
     def test_success(self, seed_entries: None):
         entries_before = list_time_entry()
         entry = get_entry(1)
-        delete_entry(entry)
+        delete_entry(entry.id)
         entries_after = list_time_entry()
 
         assert len(entries_before) - 1 == len(entries_after)
@@ -100,7 +128,7 @@ class TestEntryDelete:
             start_at=datetime.now(),
         )
         with pytest.raises(EntryNotFoundError):
-            delete_entry(not_exist_entry)
+            delete_entry(not_exist_entry.id)
 
 
 class TestStartTimeEntry:
@@ -137,6 +165,16 @@ class TestStartTimeEntry:
         with pytest.raises(EntryAlreadyRunningError):
             start_time_entry(1, "Test", "Test")
 
+    def test_with_tags(self, seed_tags: None):
+        entry = start_time_entry(None, "Test", "", [1, 2])
+
+        assert [tag.name for tag in get_entry(entry.id).tags] == ["tag-1", "tag-2"]
+
+    def test_tag_not_found(self, seed_tags: None):
+        with pytest.raises(TagNotFoundError):
+            start_time_entry(None, "Test", "", [1, 9])
+        assert get_running_entry() == []
+
 
 class TestStopTimeEntry:
     def test_success(self, seed_active_entry: None):
@@ -159,6 +197,91 @@ class TestStopTimeEntry:
             stop_time_entry()
 
 
+class TestSwitchTimeEntry:
+    def test_success(self, seed_active_entry: None):
+        stopped, started = switch_time_entry(1, "Next", "Next")
+
+        assert stopped is not None
+        assert stopped.id == 1
+        assert stopped.end_at == started.start_at
+        assert started.title == "Next"
+        assert started.end_at is None
+        assert [entry.id for entry in get_running_entry()] == [started.id]
+
+    def test_no_entry_running(self, use_test_engine: None):
+        stopped, started = switch_time_entry(None, "First", "")
+
+        assert stopped is None
+        assert [entry.id for entry in get_running_entry()] == [started.id]
+
+    def test_with_tags(self, seed_tags: None):
+        _, started = switch_time_entry(None, "Tagged", "", [1, 2, 2])
+
+        with Session(jikan.models.engine) as session:
+            links = session.exec(
+                select(EntryTagLink).where(EntryTagLink.entry_id == started.id)
+            ).all()
+        assert sorted(link.tag_id for link in links) == [1, 2]
+
+    def test_tag_not_found(self, seed_active_entry: None):
+        with pytest.raises(TagNotFoundError):
+            switch_time_entry(None, "Next", "", [1000])
+
+        # Nothing changed: the original entry is still running.
+        assert [entry.id for entry in get_running_entry()] == [1]
+
+    def test_time_should_be_later_than_start(self, seed_active_entry: None, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.utc_now", return_value=utc_now() - timedelta(days=1))
+        with pytest.raises(RuntimeError):
+            switch_time_entry(None, "Next", "")
+
+
+_start_signal = None
+
+
+def _init_start_worker(url: str, start_signal) -> None:
+    global _start_signal
+    _start_signal = start_signal
+    jikan.models.engine = create_sqlite_engine(url)
+
+
+def _try_start(i: int) -> bool:
+    _start_signal.wait()
+    try:
+        start_time_entry(None, f"entry-{i}", "")
+        return True
+    except EntryAlreadyRunningError:
+        return False
+
+
+class TestRunningEntryInvariant:
+    def test_second_running_entry_is_rejected_by_index(self, seed_active_entry: None):
+        with Session(jikan.models.engine) as session:
+            session.add(Entry(id=2, title="Entry 2"))
+            with pytest.raises(IntegrityError):
+                session.commit()
+
+    def test_concurrent_starts_only_one_wins(self, tmp_path: Path):
+        url = f"sqlite:///{tmp_path / 'stress.db'}"
+        engine = create_sqlite_engine(url)
+        SQLModel.metadata.create_all(engine)
+        engine.dispose()
+
+        ctx = multiprocessing.get_context("spawn")
+        start_signal = ctx.Event()
+        with ctx.Pool(4, initializer=_init_start_worker, initargs=(url, start_signal)) as pool:
+            pending = pool.map_async(_try_start, range(200))
+            start_signal.set()
+            results = pending.get(timeout=120)
+
+        assert results.count(True) == 1
+
+        engine = create_sqlite_engine(url)
+        with Session(engine) as session:
+            assert len(session.exec(entry_core.running_entry_statement()).all()) == 1
+        engine.dispose()
+
+
 class TestGetRunningEntry:
     def test_success(self, seed_active_entry: None):
         entries = get_running_entry()
@@ -169,6 +292,164 @@ class TestGetRunningEntry:
         assert entries == []
 
 
+class TestAttachDetachTags:
+    @pytest.fixture()
+    def entries(self, seed_tags: None) -> None:
+        now = utc_now()
+        with Session(jikan.models.engine) as session:
+            session.add_all(Entry(id=i, start_at=now, end_at=now) for i in range(1, 4))
+            session.add(EntryTagLink(entry_id=1, tag_id=1))
+            session.commit()
+
+    def tag_ids(self) -> dict[int, list[int]]:
+        return {e.id: sorted(t.id for t in e.tags) for e in list_time_entry()}
+
+    def test_attach_skips_existing_links(self, entries: None):
+        assert attach_tags([1, 2, 3], [1, 2]) == 5
+        assert self.tag_ids() == {1: [1, 2], 2: [1, 2], 3: [1, 2]}
+
+        assert attach_tags([1, 2, 3], [1, 2]) == 0
+
+    def test_detach(self, entries: None):
+        attach_tags([1, 2], [1, 2])
+
+        assert detach_tags([1, 2, 3], [1]) == 2
+        assert self.tag_ids() == {1: [2], 2: [2], 3: []}
+
+    def test_entry_not_found(self, entries: None):
+        with pytest.raises(EntryNotFoundError, match="7, 8"):
+            attach_tags([1, 7, 8], [1])
+        with pytest.raises(EntryNotFoundError):
+            detach_tags([9], [1])
+        assert self.tag_ids() == {1: [1], 2: [], 3: []}
+
+    def test_tag_not_found(self, entries: None):
+        with pytest.raises(TagNotFoundError, match="9"):
+            attach_tags([1, 2], [1, 9])
+        assert self.tag_ids() == {1: [1], 2: [], 3: []}
+
+    def test_edit_attaches_tags(self, entries: None):
+        edit_entry(1, tag_ids=[2])
+
+        assert self.tag_ids()[1] == [1, 2]
+
+
+class TestSearchTimeEntry:
+    @pytest.fixture()
+    def entries(self, seed_projects: None, seed_tags: None) -> None:
+        now = utc_now()
+        with Session(jikan.models.engine) as session:
+            session.add_all(
+                [
+                    Entry(id=1, title="Weekly sync", description="vendor contract", end_at=now),
+                    Entry(
+                        id=2,
+                        title="Vendor meeting",
+                        description="March",
+                        project_id=1,
+                        start_at=now - timedelta(days=30),
+                        end_at=now,
+                    ),
+                    Entry(id=3, title="Lunch", description="Café", end_at=now),
+                ]
+            )
+            session.add(EntryTagLink(entry_id=1, tag_id=2))
+            session.commit()
+
+    def ids(self, entries: Sequence[Entry]) -> list[int]:
+        return [entry.id for entry in entries if entry.id is not None]
+
+    def test_title_ranks_above_description(self, entries: None):
+        assert self.ids(search_time_entry("vendor")) == [2, 1]
+
+    def test_all_terms_must_match(self, entries: None):
+        assert self.ids(search_time_entry("vendor march")) == [2]
+
+    def test_prefix(self, entries: None):
+        assert self.ids(search_time_entry("vend")) == []
+        assert self.ids(search_time_entry("vend*")) == [2, 1]
+
+    def test_ignores_case_and_diacritics(self, entries: None):
+        assert self.ids(search_time_entry("CAFE")) == [3]
+
+    def test_punctuation_is_literal(self, entries: None):
+        assert self.ids(search_time_entry('vendor-meeting "')) == [2]
+
+    def test_filters(self, entries: None):
+        assert self.ids(search_time_entry("vendor", project_ids=[1])) == [2]
+        assert self.ids(search_time_entry("vendor", tag_ids=[2])) == [1]
+        assert self.ids(search_time_entry("vendor", since=utc_now() - timedelta(days=1))) == [1]
+        assert self.ids(search_time_entry("vendor", limit=1)) == [2]
+
+    def test_empty_query(self, entries: None):
+        assert search_time_entry(" * ") == []
+
+
+class TestRunningStateFile:
+    def state(self):
+        return read_running_state(database_path(jikan.models.engine))
+
+    def test_follows_start_edit_switch_stop(self, seed_projects: None):
+        entry = start_time_entry(1, "first", "")
+        assert self.state() == (entry.id, "first", "", "active-1", self.timestamp(entry))
+
+        edit_entry(entry.id, title="renamed")
+        assert self.state().title == "renamed"
+
+        _, new_entry = switch_time_entry(None, "second", "")
+        assert self.state() == (new_entry.id, "second", "", None, self.timestamp(new_entry))
+
+        stop_time_entry()
+        assert self.state() is None
+
+    def test_delete_running_entry(self, seed_active_entry: None):
+        load_running_state()
+        assert self.state().id == 1
+
+        delete_entry(1)
+        assert self.state() is None
+
+    def test_project_change_invalidates(self, seed_active_entry: None):
+        load_running_state()
+        edit_project(1, "renamed", None)
+
+        with pytest.raises(StateUnavailableError):
+            self.state()
+        assert load_running_state().project == "renamed"
+
+    def test_written_before_the_commit(self, use_test_engine: None, mocker: MockFixture):
+        committed = []
+
+        def write(db_path: Path, state: RunningState | None) -> None:
+            # Another connection only sees what was committed.
+            with closing(sqlite3.connect(db_path)) as conn:
+                committed.append(conn.execute("SELECT count(*) FROM entry").fetchone()[0])
+            write_running_state(db_path, state)
+
+        mocker.patch.object(entry_core, "write_running_state", side_effect=write)
+
+        start_time_entry(None, "first", "")
+
+        assert committed == [0]
+        assert self.state().title == "first"
+
+    def test_failed_commit_removes_file(self, seed_active_entry: None, mocker: MockFixture):
+        load_running_state()
+        commit = mocker.patch.object(Session, "commit", side_effect=RuntimeError("disk full"))
+
+        with pytest.raises(RuntimeError):
+            stop_time_entry()
+
+        mocker.stop(commit)
+        with pytest.raises(StateUnavailableError):
+            self.state()
+        assert load_running_state().id == 1
+
+    @staticmethod
+    def timestamp(entry: Entry) -> float:
+        return ensure_utc_aware(entry.start_at).timestamp()
+
+
 class TestListTimeEntry:
     def test_success(self, use_test_engine: None):
         start_time_entry(1, "Test1", "Test1")
@@ -182,3 +463,162 @@ class TestListTimeEntry:
     def test_no_entry(self, use_test_engine: None):
         entries = list_time_entry()
         assert entries == []
+
+
+class TestIterTimeEntry:
+    @pytest.fixture()
+    def history(self, seed_tags: None) -> None:
+        base = datetime(2024, 1, 1, 9, 0, 0)
+        with Session(jikan.models.engine) as session:
+            session.add_all(
+                Entry(
+                    id=i,
+                    title=f"entry-{i}",
+                    project_id=1 if i % 2 else 2,
+                    start_at=base + timedelta(days=i // 2),
+                    end_at=base + timedelta(days=i // 2, hours=1),
+                )
+                for i in range(1, 11)
+            )
+            session.add_all(EntryTagLink(entry_id=i, tag_id=1) for i in (2, 3, 5))
+            session.commit()
+
+    def test_ordered_by_start_and_id(self, history: None):
+        entries = list(iter_time_entry(batch_size=3))
+
+        assert [entry.id for entry in entries] == list(range(1, 11))
+
+    def test_since_and_until(self, history: None):
+        entries = iter_time_entry(since=datetime(2024, 1, 2), until=datetime(2024, 1, 4))
+
+        assert [entry.id for entry in entries] == [2, 3, 4, 5]
+
+    def test_project_and_tag(self, history: None):
+        assert [e.id for e in iter_time_entry(project_ids=[2])] == [2, 4, 6, 8, 10]
+        assert [e.id for e in iter_time_entry(tag_ids=[1])] == [2, 3, 5]
+        assert [e.id for e in iter_time_entry(project_ids=[1], tag_ids=[1, 2])] == [3, 5]
+
+    def test_keyset_pages(self, history: None):
+        pages = []
+        after = None
+        while page := list_time_entry(after=after, limit=4):
+            pages.append([entry.id for entry in page])
+            after = entry_cursor(page[-1])
+
+        assert pages == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10]]
+
+    def test_entry_pages(self, history: None):
+        pages = iter_entry_pages(project_ids=[1], page_size=2, limit=4)
+
+        assert [[entry.id for entry in page] for page in pages] == [[1, 3], [5, 7]]
+        assert [len(page) for page in iter_entry_pages(page_size=5)] == [5, 5]
+
+    def test_entry_pages_fetched_as_consumed(self, history: None, mocker: MockFixture):
+        list_page = mocker.spy(entry_core, "list_time_entry")
+        pages = iter_entry_pages(page_size=3)
+
+        next(pages)
+        next(pages)
+
+        assert list_page.call_count == 2
+
+    def test_list_widths(self, history: None):
+        with Session(jikan.models.engine) as session:
+            session.add(Project(id=3, name="a-long-project-name"))
+            session.commit()
+
+        assert list_widths() == (2, len("a-long-project-name"))
+
+
+class TestQueryCounts:
+    @pytest.fixture()
+    def statements(self, use_test_engine: None) -> Generator[list[str], None, None]:
+        executed: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany) -> None:
+            executed.append(statement)
+
+        event.listen(jikan.models.engine, "before_cursor_execute", record)
+        yield executed
+        event.remove(jikan.models.engine, "before_cursor_execute", record)
+
+    def seed(self, count: int) -> None:
+        base = datetime(2024, 1, 1, 9, 0, 0)
+        with Session(jikan.models.engine) as session:
+            session.add_all(Project(id=i, name=f"project-{i}") for i in range(1, count + 1))
+            session.add_all(Tag(id=i, name=f"tag-{i}") for i in range(1, count + 1))
+            session.add_all(
+                Entry(id=i, project_id=i, start_at=base, end_at=base) for i in range(1, count + 1)
+            )
+            session.add_all(EntryTagLink(entry_id=i, tag_id=i) for i in range(1, count + 1))
+            session.commit()
+
+    @pytest.mark.parametrize("count", [2, 20])
+    def test_listing_loads_names_in_constant_queries(self, statements: list[str], count: int):
+        self.seed(count)
+        statements.clear()
+
+        entries = list_time_entry()
+
+        assert [e.project.name for e in entries] == [f"project-{i}" for i in range(1, count + 1)]
+        assert [[t.name for t in e.tags] for e in entries] == [
+            [f"tag-{i}"] for i in range(1, count + 1)
+        ]
+        assert len([s for s in statements if s.startswith("SELECT")]) == 3
+
+    def test_edit_is_one_transaction(self, statements: list[str]):
+        self.seed(2)
+        statements.clear()
+
+        edit_entry(1, title="edited", project_id=2)
+
+        assert [s for s in statements if s.startswith("BEGIN")] == ["BEGIN IMMEDIATE"]
+        assert get_entry(1).project.name == "project-2"
+
+
+class TestIterEntryRows:
+    def test_rows_are_flat_and_joined(self, seed_tags: None):
+        with Session(jikan.models.engine) as session:
+            session.add(Project(id=1, name="project-1"))
+            session.add(
+                Entry(
+                    id=1,
+                    title="done",
+                    project_id=1,
+                    start_at=datetime(2024, 1, 1, 9, 0, 0),
+                    end_at=datetime(2024, 1, 1, 10, 30, 0),
+                )
+            )
+            session.add(Entry(id=2, title="running", start_at=datetime(2024, 1, 2, 9, 0, 0)))
+            session.add_all(
+                [EntryTagLink(entry_id=1, tag_id=1), EntryTagLink(entry_id=1, tag_id=2)]
+            )
+            session.commit()
+
+        rows = [dict(zip(ENTRY_ROW_FIELDS, row, strict=True)) for row in iter_entry_rows()]
+
+        assert rows[0]["start_at"] == "2024-01-01T09:00:00Z"
+        assert rows[0]["end_at"] == "2024-01-01T10:30:00Z"
+        assert rows[0]["duration_seconds"] == 5400
+        assert rows[0]["project"] == "project-1"
+        assert sorted(rows[0]["tags"]) == ["tag-1", "tag-2"]
+        assert rows[1]["end_at"] is None
+        assert rows[1]["duration_seconds"] is None
+        assert rows[1]["project"] is None
+        assert rows[1]["tags"] == ()
+
+    def test_tag_separator(self, seed_tags: None):
+        with Session(jikan.models.engine) as session:
+            session.add(Entry(id=1, title="tagged"))
+            session.add_all(
+                [EntryTagLink(entry_id=1, tag_id=1), EntryTagLink(entry_id=1, tag_id=2)]
+            )
+            session.commit()
+
+        (row,) = iter_entry_rows(tag_separator=";")
+
+        assert sorted(row[-1].split(";")) == ["tag-1", "tag-2"]
+
+    def test_filters(self, seed_entries: None):
+        assert [row[0] for row in iter_entry_rows(project_ids=[1])] == [1, 2]
+        assert list(iter_entry_rows(project_ids=[1000])) == []
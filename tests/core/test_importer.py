@@ -0,0 +1,119 @@
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+import jikan.models
+from jikan.core.importer import ImportAlreadyDoneError, import_entries
+from jikan.core.report import report
+from jikan.core.rollup import rebuild_rollups
+from jikan.lib.importer import ImportItem, ImportRecord, RejectedRow
+from jikan.lib.report import ReportGroup
+from jikan.models import DailyRollup, Entry, EntryTagLink, ImportJob, Project, Tag
+
+START = datetime(2024, 1, 1, 9, tzinfo=UTC)
+
+
+def record(line: int, project: str | None = "alpha", tags: tuple[str, ...] = ()) -> ImportRecord:
+    start_at = START + timedelta(hours=line)
+    return ImportRecord(
+        line=line,
+        title=f"entry {line}",
+        description=None,
+        start_at=start_at,
+        end_at=start_at + timedelta(minutes=30),
+        project=project,
+        tags=tags,
+    )
+
+
+def source(count: int) -> list[ImportItem]:
+    items: list[ImportItem] = [
+        record(line, project=f"p{line % 3}", tags=(f"t{line % 2}",)) for line in range(1, count + 1)
+    ]
+    items[4] = RejectedRow(5, "bad row")
+    return items
+
+
+def counts() -> tuple[int, int, int, int]:
+    with Session(jikan.models.engine) as session:
+        return tuple(  # type: ignore[return-value]
+            len(session.exec(select(model)).all()) for model in (Entry, EntryTagLink, Project, Tag)
+        )
+
+
+def rollup_rows() -> list[tuple]:
+    with Session(jikan.models.engine) as session:
+        rows = session.exec(select(DailyRollup)).all()
+    return sorted((r.day, r.project_id, r.tag_id, round(r.seconds, 3), r.entries) for r in rows)
+
+
+class TestImportEntries:
+    def test_imports_in_chunks(self, use_test_engine: None):
+        progress: list[int] = []
+        summary = import_entries(
+            source(12),
+            "digest",
+            "file.csv",
+            chunk_size=5,
+            progress=lambda job: progress.append(job.position),
+        )
+
+        assert (summary.imported, summary.skipped, summary.rejected) == (
+            11,
+            0,
+            [RejectedRow(5, "bad row")],
+        )
+        assert progress == [5, 10, 12]
+        assert counts() == (11, 11, 3, 2)
+        assert summary.job.finished_at is not None
+        assert (summary.job.imported, summary.job.rejected) == (11, 1)
+
+    def test_uses_existing_projects_and_tags(self, seed_projects: None, seed_tags: None):
+        import_entries([record(1, "active-1", ("tag-2", "new")), record(2, None)], "digest", "f")
+
+        with Session(jikan.models.engine) as session:
+            entries = session.exec(select(Entry).order_by(Entry.id)).all()
+            assert [e.project_id for e in entries] == [1, None]
+            assert sorted(t.name for t in entries[0].tags) == ["new", "tag-2"]
+            assert len(session.exec(select(Project)).all()) == 3
+
+    def test_rollup_matches_rebuild(self, use_test_engine: None):
+        import_entries(source(30), "digest", "f", chunk_size=7)
+
+        incremental = rollup_rows()
+        rebuild_rollups()
+        assert incremental == rollup_rows()
+        [alpha] = [row for row in report(ReportGroup.project) if row.label == "p1"]
+        assert (alpha.entries, alpha.seconds) == (10, 10 * 1800)
+
+    def test_resumes_after_failure(self, use_test_engine: None):
+        def failing() -> Iterator[ImportItem]:
+            for item in source(12):
+                if item.line == 8:
+                    raise OSError("disk gone")
+                yield item
+
+        with pytest.raises(OSError):
+            import_entries(failing(), "digest", "f", chunk_size=5)
+        assert counts()[0] == 4  # the first chunk, minus the rejected row
+
+        summary = import_entries(source(12), "digest", "f", chunk_size=5)
+
+        assert (summary.skipped, summary.imported) == (5, 7)
+        with Session(jikan.models.engine) as session:
+            titles = session.exec(select(Entry.title).order_by(Entry.id)).all()
+            job = session.exec(select(ImportJob)).one()
+        assert titles == [f"entry {line}" for line in range(1, 13) if line != 5]
+        assert (job.position, job.imported, job.rejected) == (12, 11, 1)
+
+    def test_finished_import_is_not_repeated(self, use_test_engine: None):
+        import_entries(source(6), "digest", "f")
+
+        with pytest.raises(ImportAlreadyDoneError):
+            import_entries(source(6), "digest", "f")
+
+        summary = import_entries(source(6), "digest", "f", restart=True)
+        assert summary.imported == 5
+        assert counts()[0] == 10
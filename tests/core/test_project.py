@@ -24,7 +24,7 @@ class TestProjectList:
 
     def test_only_archived_project(self, use_test_engine: None):
         archived_project = add_project(name="Archived", description="")
-        set_project_archived(archived_project, True)
+        set_project_archived(archived_project.id, True)
         projects = list_project()
         assert projects == []
 
@@ -72,7 +72,7 @@ class TestProjectDelete:
     def test_success(self, seed_projects: None):
         projects_before = list_project()
         project_to_be_deleted = get_project(2)
-        delete_project(project_to_be_deleted)
+        delete_project(project_to_be_deleted.id)
         projects_after = list_project()
         assert len(projects_before) - 1 == len(projects_after)
 
@@ -82,33 +82,33 @@ class TestProjectDelete:
     def test_project_not_found(self, seed_projects: None):
         not_exist_project = Project(id=1000, name="hoge")
         with pytest.raises(ProjectNotFoundError):
-            delete_project(not_exist_project)
+            delete_project(not_exist_project.id)
 
 
 class TestProjectEdit:
     def test_success(self, seed_projects: None):
         project_to_be_edited = get_project(1)
-        edit_project(project_to_be_edited, "edited-active-1", "edited a1")
+        edit_project(project_to_be_edited.id, "edited-active-1", "edited a1")
         project = get_project(1)
         assert project.name == "edited-active-1"
         assert project.description == "edited a1"
 
     def test_returned_project_updated(self, seed_projects: None):
         project_to_be_edited = get_project(1)
-        project = edit_project(project_to_be_edited, "edited-active-1", "edited a1")
+        project = edit_project(project_to_be_edited.id, "edited-active-1", "edited a1")
         assert project.name == "edited-active-1"
         assert project.description == "edited a1"
 
     def test_only_name_update(self, seed_projects: None):
         project_to_be_edited = get_project(1)
-        edit_project(project_to_be_edited, None, "edited a1")
+        edit_project(project_to_be_edited.id, None, "edited a1")
         project = get_project(1)
         assert project.name == project_to_be_edited.name
         assert project.description == "edited a1"
 
     def test_only_description_update(self, seed_projects: None):
         project_to_be_edited = get_project(1)
-        edit_project(project_to_be_edited, "edited-active-1", None)
+        edit_project(project_to_be_edited.id, "edited-active-1", None)
         project = get_project(1)
         assert project.name == "edited-active-1"
         assert project.description == project_to_be_edited.description
@@ -116,7 +116,7 @@ class TestProjectEdit:
     def test_project_not_found(self, seed_projects: None):
         not_exist_project = Project(id=1000, name="hoge")
         with pytest.raises(ProjectNotFoundError):
-            edit_project(not_exist_project, "huga", "piyo")
+            edit_project(not_exist_project.id, "huga", "piyo")
 
 
 class TestProjectSetArchived:
@@ -124,7 +124,7 @@ class TestProjectSetArchived:
         projects_before = list_project()
         project_to_be_archived = get_project(1)
         assert project_to_be_archived in projects_before
-        set_project_archived(project_to_be_archived, True)
+        set_project_archived(project_to_be_archived.id, True)
         project = get_project(1)
         projects_after = list_project()
 
@@ -136,7 +136,7 @@ class TestProjectSetArchived:
         projects_before = list_project()
         project_to_be_archived = get_project(1)
         assert project_to_be_archived in projects_before
-        archived_project = set_project_archived(project_to_be_archived, True)
+        archived_project = set_project_archived(project_to_be_archived.id, True)
 
         assert archived_project.archived
 
@@ -144,7 +144,7 @@ class TestProjectSetArchived:
         projects_before = list_project()
         project_to_be_unarchived = get_project(3)
         assert project_to_be_unarchived.archived
-        set_project_archived(project_to_be_unarchived, False)
+        set_project_archived(project_to_be_unarchived.id, False)
         project = get_project(3)
         projects_after = list_project()
 
@@ -155,4 +155,4 @@ class TestProjectSetArchived:
     def test_project_not_found(self, seed_projects: None):
         not_exist_project = Project(id=1000, name="hoge")
         with pytest.raises(ProjectNotFoundError):
-            set_project_archived(not_exist_project, True)
+            set_project_archived(not_exist_project.id, True)
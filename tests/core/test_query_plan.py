@@ -0,0 +1,75 @@
+"""Hot queries must be served by indexes: an EXPLAIN QUERY PLAN `SCAN <table>` without an
+index means a full table scan, which grows with the history."""
+
+import re
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import jikan.core.entry as entry_core
+import jikan.core.project as project_core
+import jikan.core.report as report_core
+import jikan.models
+from jikan.core.seed import seed_history
+from jikan.lib.report import ReportGroup
+
+END = datetime(2024, 3, 1, tzinfo=UTC)
+SINCE = datetime(2024, 1, 1, tzinfo=UTC)
+FULL_SCAN = re.compile(r"^SCAN (entry|entrytaglink|project|tag)$")
+
+HOT_QUERIES: dict[str, Callable[[], Any]] = {
+    "list_page": lambda: entry_core.list_time_entry(limit=100),
+    "list_range": lambda: entry_core.list_time_entry(since=SINCE, until=END),
+    "list_project": lambda: entry_core.list_time_entry(project_ids=[3], limit=100),
+    "list_tag": lambda: entry_core.list_time_entry(tag_ids=[3], limit=100),
+    "get_entry": lambda: entry_core.get_entry(10),
+    "get_running_entry": entry_core.get_running_entry,
+    "list_project_active": project_core.list_project,
+    "report_range": lambda: report_core.report(ReportGroup.project, since=SINCE, until=END),
+    "report_range_tags": lambda: report_core.report(
+        ReportGroup.project, since=SINCE, until=END, tag_ids=[2, 3]
+    ),
+    "report_project_entries": lambda: report_core.report(
+        ReportGroup.day, project_ids=[3], use_rollup=False
+    ),
+    "search_project": lambda: entry_core.search_time_entry("vendor", project_ids=[2]),
+}
+
+
+@pytest.fixture()
+def history(use_test_engine: None) -> None:
+    seed_history(500, end=END)
+
+
+def selects(engine: Engine, run: Callable[[], Any]) -> Iterator[tuple[str, Any]]:
+    captured: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return iter(captured)
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_indexes(history: None, name: str):
+    engine = jikan.models.engine
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in selects(engine, HOT_QUERIES[name]):
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            plans.append((statement, [row[3] for row in plan]))
+
+    assert plans
+    for statement, plan in plans:
+        scans = [step for step in plan if FULL_SCAN.match(step)]
+        assert not scans, f"{scans} in plan {plan} of {statement}"
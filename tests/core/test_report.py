@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+import pytest
+from pytest_mock import MockFixture
+from sqlmodel import Session
+
+import jikan.models
+from jikan.core.report import report
+from jikan.core.rollup import rebuild_rollups
+from jikan.lib.report import ReportGroup, ReportRow
+from jikan.models import Entry, EntryTagLink, Project, Tag
+
+NOW = datetime(2024, 1, 10, 12, 0, 0)
+
+
+@pytest.fixture()
+def history(use_test_engine: None, mocker: MockFixture) -> None:
+    mocker.patch("jikan.core.report.utc_now", return_value=NOW)
+
+    def entry(id: int, start: datetime, hours: float | None, project_id: int | None) -> Entry:
+        end_at = None if hours is None else start + timedelta(hours=hours)
+        return Entry(
+            id=id, title=f"entry-{id}", start_at=start, end_at=end_at, project_id=project_id
+        )
+
+    with Session(jikan.models.engine) as session:
+        session.add_all([Project(id=1, name="alpha"), Project(id=2, name="beta")])
+        session.add_all([Tag(id=1, name="focus"), Tag(id=2, name="meeting")])
+        session.add_all(
+            [
+                # Sunday of ISO week 2023-W52
+                entry(1, datetime(2023, 12, 31, 9), 2, 1),
+                # Monday of ISO week 2024-W01
+                entry(2, datetime(2024, 1, 1, 9), 1, 1),
+                entry(3, datetime(2024, 1, 1, 13), 0.5, 2),
+                entry(4, datetime(2024, 1, 8, 9), 3, None),
+                # Running for 1.5 hours at NOW
+                entry(5, datetime(2024, 1, 10, 10, 30), None, 2),
+            ]
+        )
+        session.add_all(
+            [
+                EntryTagLink(entry_id=1, tag_id=1),
+                EntryTagLink(entry_id=2, tag_id=1),
+                EntryTagLink(entry_id=2, tag_id=2),
+                EntryTagLink(entry_id=3, tag_id=2),
+            ]
+        )
+        session.commit()
+    rebuild_rollups()
+
+
+HOUR = 3600
+
+
+@pytest.fixture(params=[True, False], ids=["rollup", "entries"])
+def use_rollup(request: pytest.FixtureRequest) -> bool:
+    return request.param
+
+
+class TestReport:
+    def test_by_project(self, history: None, use_rollup: bool):
+        assert report(ReportGroup.project, use_rollup=use_rollup) == [
+            ReportRow(None, "(no project)", 3 * HOUR, 1),
+            ReportRow("1", "alpha", 3 * HOUR, 2),
+            ReportRow("2", "beta", 2 * HOUR, 2),
+        ]
+
+    def test_by_tag(self, history: None, use_rollup: bool):
+        assert report(ReportGroup.tag, use_rollup=use_rollup) == [
+            ReportRow(None, "(no tag)", int(4.5 * HOUR), 2),
+            ReportRow("1", "focus", 3 * HOUR, 2),
+            ReportRow("2", "meeting", int(1.5 * HOUR), 2),
+        ]
+
+    def test_by_day(self, history: None, use_rollup: bool):
+        rows = report(ReportGroup.day, use_rollup=use_rollup)
+
+        assert [(row.label, row.seconds) for row in rows] == [
+            ("2023-12-31", 2 * HOUR),
+            ("2024-01-01", int(1.5 * HOUR)),
+            ("2024-01-08", 3 * HOUR),
+            ("2024-01-10", int(1.5 * HOUR)),
+        ]
+
+    def test_by_iso_week(self, history: None, use_rollup: bool):
+        rows = report(ReportGroup.week, use_rollup=use_rollup)
+
+        assert [(row.label, row.seconds) for row in rows] == [
+            ("2023-W52", 2 * HOUR),
+            ("2024-W01", int(1.5 * HOUR)),
+            ("2024-W02", int(4.5 * HOUR)),
+        ]
+
+    def test_by_month(self, history: None, use_rollup: bool):
+        rows = report(ReportGroup.month, use_rollup=use_rollup)
+
+        assert [(row.label, row.entries) for row in rows] == [("2023-12", 1), ("2024-01", 4)]
+
+    def test_filters(self, history: None, use_rollup: bool):
+        rows = report(
+            ReportGroup.project, since=datetime(2024, 1, 1), tag_ids=[2], use_rollup=use_rollup
+        )
+
+        assert rows == [ReportRow("1", "alpha", HOUR, 1), ReportRow("2", "beta", HOUR // 2, 1)]
+
+    def test_partial_days_and_tag_sets(self, history: None):
+        since = datetime(2024, 1, 1, 12)
+        assert report(ReportGroup.day, since=since) == report(
+            ReportGroup.day, since=since, use_rollup=False
+        )
+        assert report(ReportGroup.project, tag_ids=[1, 2]) == [
+            ReportRow("1", "alpha", 3 * HOUR, 2),
+            ReportRow("2", "beta", HOUR // 2, 1),
+        ]
+
+    def test_no_entries(self, use_test_engine: None, use_rollup: bool):
+        assert report(ReportGroup.day, use_rollup=use_rollup) == []
@@ -0,0 +1,191 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from pytest_mock import MockFixture
+from sqlmodel import Session, select
+
+import jikan.models
+from jikan.core.entry import (
+    attach_tags,
+    delete_entry,
+    detach_tags,
+    edit_entry,
+    start_time_entry,
+    stop_time_entry,
+    switch_time_entry,
+)
+from jikan.core.project import delete_project
+from jikan.core.report import report
+from jikan.core.rollup import ALL_TAGS, NO_PROJECT, NO_TAG, rebuild_rollups
+from jikan.core.tag import delete_tag
+from jikan.lib.report import ReportGroup
+from jikan.models import DailyRollup, Entry, EntryTagLink, Project, Tag
+
+
+def rollup_rows() -> list[tuple]:
+    with Session(jikan.models.engine) as session:
+        rows = session.exec(select(DailyRollup)).all()
+    return sorted((r.day, r.project_id, r.tag_id, round(r.seconds, 3), r.entries) for r in rows)
+
+
+def assert_matches_rebuild() -> None:
+    incremental = rollup_rows()
+    rebuild_rollups()
+    assert incremental == rollup_rows()
+
+
+@pytest.fixture()
+def clock(mocker: MockFixture):
+    now = [datetime(2024, 3, 1, 9, 0, 0, tzinfo=UTC)]
+
+    def advance(**kwargs) -> None:
+        now[0] += timedelta(**kwargs)
+
+    mocker.patch("jikan.core.entry.utc_now", side_effect=lambda: now[0])
+    return advance
+
+
+@pytest.fixture()
+def catalog(use_test_engine: None) -> None:
+    with Session(jikan.models.engine) as session:
+        session.add_all([Project(id=1, name="alpha"), Project(id=2, name="beta")])
+        session.add_all([Tag(id=1, name="focus"), Tag(id=2, name="meeting")])
+        session.commit()
+
+
+class TestIncrementalRollup:
+    def test_stop_adds_entry(self, catalog: None, clock):
+        start_time_entry(1, "work", "")
+        clock(hours=2)
+        stop_time_entry()
+
+        assert rollup_rows() == [
+            ("2024-03-01", 1, NO_TAG, 7200.0, 1),
+            ("2024-03-01", 1, ALL_TAGS, 7200.0, 1),
+        ]
+        assert_matches_rebuild()
+
+    def test_running_entry_is_not_rolled_up(self, catalog: None, clock):
+        start_time_entry(1, "work", "")
+
+        assert rollup_rows() == []
+
+    def test_switch_adds_stopped_entry_with_tags(self, catalog: None, clock):
+        switch_time_entry(None, "first", "", [1, 2])
+        clock(minutes=30)
+        switch_time_entry(2, "second", "")
+
+        assert rollup_rows() == [
+            ("2024-03-01", NO_PROJECT, ALL_TAGS, 1800.0, 1),
+            ("2024-03-01", NO_PROJECT, 1, 1800.0, 1),
+            ("2024-03-01", NO_PROJECT, 2, 1800.0, 1),
+        ]
+        assert_matches_rebuild()
+
+    def test_edit_moves_time(self, catalog: None, clock):
+        start_time_entry(1, "work", "")
+        clock(hours=1)
+        stop_time_entry()
+
+        edit_entry(
+            1,
+            start_at=datetime(2024, 2, 29, 22, 0, 0),
+            end_at=datetime(2024, 2, 29, 23, 30, 0),
+            project_id=2,
+        )
+
+        assert rollup_rows() == [
+            ("2024-02-29", 2, NO_TAG, 5400.0, 1),
+            ("2024-02-29", 2, ALL_TAGS, 5400.0, 1),
+        ]
+        assert_matches_rebuild()
+
+    def test_delete_entry(self, catalog: None, clock):
+        for title in ("first", "second"):
+            start_time_entry(1, title, "")
+            clock(hours=1)
+            stop_time_entry()
+
+        delete_entry(1)
+
+        assert rollup_rows() == [
+            ("2024-03-01", 1, NO_TAG, 3600.0, 1),
+            ("2024-03-01", 1, ALL_TAGS, 3600.0, 1),
+        ]
+        assert_matches_rebuild()
+
+    def test_delete_project_and_tag(self, catalog: None, clock):
+        switch_time_entry(1, "alpha", "", [1])
+        clock(hours=1)
+        switch_time_entry(None, "none", "", [2])
+        clock(hours=1)
+        switch_time_entry(None, "both", "", [1, 2])
+        clock(hours=1)
+        stop_time_entry()
+
+        delete_project(1)
+        delete_tag(1)
+
+        # The entry that had both tags keeps the other one.
+        assert rollup_rows() == [
+            ("2024-03-01", NO_PROJECT, NO_TAG, 3600.0, 1),
+            ("2024-03-01", NO_PROJECT, ALL_TAGS, 10800.0, 3),
+            ("2024-03-01", NO_PROJECT, 2, 7200.0, 2),
+        ]
+        assert_matches_rebuild()
+        assert report(ReportGroup.tag, use_cache=False) == report(
+            ReportGroup.tag, use_rollup=False, use_cache=False
+        )
+
+
+class TestRebuildRollups:
+    def test_rebuild(self, catalog: None):
+        with Session(jikan.models.engine) as session:
+            session.add_all(
+                [
+                    Entry(
+                        id=1,
+                        project_id=1,
+                        start_at=datetime(2024, 1, 1, 9),
+                        end_at=datetime(2024, 1, 1, 10),
+                    ),
+                    Entry(id=2, start_at=datetime(2024, 1, 2, 9)),
+                ]
+            )
+            session.add(EntryTagLink(entry_id=1, tag_id=1))
+            session.commit()
+
+        assert rebuild_rollups() == 2
+        assert rollup_rows() == [
+            ("2024-01-01", 1, ALL_TAGS, 3600.0, 1),
+            ("2024-01-01", 1, 1, 3600.0, 1),
+        ]
+
+    def test_attach_and_detach_tags(self, catalog: None, clock):
+        switch_time_entry(1, "first", "", [1])
+        clock(hours=1)
+        switch_time_entry(2, "second", "")
+        clock(hours=1)
+        stop_time_entry()
+
+        attach_tags([1, 2], [1, 2])
+
+        assert rollup_rows() == [
+            ("2024-03-01", 1, ALL_TAGS, 3600.0, 1),
+            ("2024-03-01", 1, 1, 3600.0, 1),
+            ("2024-03-01", 1, 2, 3600.0, 1),
+            ("2024-03-01", 2, ALL_TAGS, 3600.0, 1),
+            ("2024-03-01", 2, 1, 3600.0, 1),
+            ("2024-03-01", 2, 2, 3600.0, 1),
+        ]
+        assert_matches_rebuild()
+
+        detach_tags([1, 2], [1, 2])
+
+        assert rollup_rows() == [
+            ("2024-03-01", 1, NO_TAG, 3600.0, 1),
+            ("2024-03-01", 1, ALL_TAGS, 3600.0, 1),
+            ("2024-03-01", 2, NO_TAG, 3600.0, 1),
+            ("2024-03-01", 2, ALL_TAGS, 3600.0, 1),
+        ]
+        assert_matches_rebuild()
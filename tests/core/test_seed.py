@@ -0,0 +1,62 @@
+from datetime import UTC, datetime
+
+from sqlmodel import Session, func, select
+
+import jikan.models
+from jikan.core.entry import list_time_entry, search_time_entry
+from jikan.core.rollup import rebuild_rollups
+from jikan.core.seed import seed_history
+from jikan.models import DailyRollup, Entry, EntryTagLink, Project, Tag
+
+END = datetime(2024, 3, 1, tzinfo=UTC)
+
+
+def rollup_rows() -> list[tuple]:
+    with Session(jikan.models.engine) as session:
+        rows = session.exec(select(DailyRollup)).all()
+    return sorted((r.day, r.project_id, r.tag_id, round(r.seconds, 3), r.entries) for r in rows)
+
+
+def count(model: type) -> int:
+    with Session(jikan.models.engine) as session:
+        return session.exec(select(func.count()).select_from(model)).one()
+
+
+class TestSeedHistory:
+    def test_counts(self, use_test_engine: None):
+        summary = seed_history(250, users=2, projects=3, tags=4, end=END, chunk_size=100)
+
+        assert summary.entries == count(Entry) == 250
+        assert summary.projects == count(Project) == 6
+        assert summary.tags == count(Tag) == 8
+        assert summary.links == count(EntryTagLink)
+
+    def test_entries_are_finished_and_before_end(self, use_test_engine: None):
+        seed_history(100, end=END)
+
+        entries = list_time_entry()
+        assert all(e.end_at is not None and e.start_at < e.end_at for e in entries)
+        assert max(e.end_at for e in entries if e.end_at is not None) < END.replace(tzinfo=None)
+
+    def test_same_seed_same_history(self, use_test_engine: None):
+        seed_history(50, seed=7, end=END)
+        seed_history(50, seed=7, end=END)
+
+        entries = list_time_entry()
+        first = [(e.title, e.start_at) for e in entries if e.id is not None and e.id <= 50]
+        second = [(e.title, e.start_at) for e in entries if e.id is not None and e.id > 50]
+        assert first == second
+
+    def test_adds_after_existing_rows(self, seed_entries: None):
+        seed_history(20, projects=2, tags=2, end=END)
+
+        assert count(Entry) == 22
+        assert count(Project) == 3
+
+    def test_rollup_and_search_are_up_to_date(self, use_test_engine: None):
+        seed_history(300, end=END, chunk_size=128)
+
+        assert search_time_entry("vendor")
+        incremental = rollup_rows()
+        rebuild_rollups()
+        assert incremental == rollup_rows()
@@ -52,26 +52,26 @@ class TestTagAdd:
 class TestTagEdit:
     def test_success(self, seed_tags: None):
         tag_to_be_edited = get_tag(1)
-        edit_tag(tag_to_be_edited, "edited-tag-1")
+        edit_tag(tag_to_be_edited.id, "edited-tag-1")
         tag = get_tag(1)
         assert tag.name == "edited-tag-1"
 
     def test_returned_tag_updated(self, seed_tags: None):
         tag_to_be_edited = get_tag(1)
-        tag = edit_tag(tag_to_be_edited, "edited-tag-1")
+        tag = edit_tag(tag_to_be_edited.id, "edited-tag-1")
         assert tag.name == "edited-tag-1"
 
     def test_tag_not_found(self, seed_tags: None):
         not_exist_tag = Tag(id=1000, name="hoge")
         with pytest.raises(TagNotFoundError):
-            edit_tag(not_exist_tag, "huga")
+            edit_tag(not_exist_tag.id, "huga")
 
 
 class TestTagDelete:
     def test_success(self, seed_tags: None):
         tags_before = list_tag()
         tag_to_be_deleted = get_tag(2)
-        delete_tag(tag_to_be_deleted)
+        delete_tag(tag_to_be_deleted.id)
         tags_after = list_tag()
         assert len(tags_before) - 1 == len(tags_after)
 
@@ -81,4 +81,4 @@ class TestTagDelete:
     def test_tag_not_found(self, seed_tags: None):
         not_exist_tag = Tag(id=1000, name="hoge")
         with pytest.raises(TagNotFoundError):
-            delete_tag(not_exist_tag)
+            delete_tag(not_exist_tag.id)
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import pytest
+
+from jikan.lib.config import get_app_dir
+
+
+@pytest.fixture()
+def config_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.delenv("JIKAN_DATA_DIR", raising=False)
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    return tmp_path / "config"
+
+
+class TestGetAppDir:
+    def test_default(self, config_home: Path, tmp_path: Path):
+        assert get_app_dir() == tmp_path / "home" / ".jikan"
+
+    def test_config_file(self, config_home: Path, tmp_path: Path):
+        (config_home / "jikan").mkdir(parents=True)
+        (config_home / "jikan" / "config.toml").write_text(f'data_dir = "{tmp_path / "fast"}"\n')
+
+        assert get_app_dir() == tmp_path / "fast"
+
+    def test_env_overrides_config_file(
+        self, config_home: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ):
+        (config_home / "jikan").mkdir(parents=True)
+        (config_home / "jikan" / "config.toml").write_text(f'data_dir = "{tmp_path / "fast"}"\n')
+        monkeypatch.setenv("JIKAN_DATA_DIR", str(tmp_path / "env"))
+
+        assert get_app_dir() == tmp_path / "env"
@@ -0,0 +1,93 @@
+from datetime import UTC, datetime
+
+import pytest
+from pytest_mock import MockFixture
+from rich.console import Console
+
+from jikan.core.dashboard import ProjectTotal
+from jikan.lib.dashboard import render, run
+from jikan.models import Entry, Project
+
+NOW = datetime(2024, 1, 10, 12, 0, 0, tzinfo=UTC)
+
+
+def text(view) -> str:
+    console = Console(width=120, record=True)
+    console.print(render(view, NOW))
+    return console.export_text()
+
+
+@pytest.fixture()
+def view(mocker: MockFixture):
+    running = Entry(
+        id=2, title="writing", start_at=datetime(2024, 1, 10, 10, 30), project=Project(name="docs")
+    )
+    finished = Entry(
+        id=1,
+        title="standup",
+        start_at=datetime(2024, 1, 10, 9),
+        end_at=datetime(2024, 1, 10, 9, 15),
+    )
+    view = mocker.Mock()
+    view.running.return_value = running
+    view.latest.return_value = [running, finished]
+    view.today.return_value = [ProjectTotal("docs", 5400, 1), ProjectTotal("(no project)", 900, 1)]
+    return view
+
+
+class TestRender:
+    def test_running(self, view):
+        output = text(view)
+
+        assert "01h 30m 00s  writing docs" in output
+        assert "Started 2024-01-10 10:30:00" in output
+
+    def test_today_and_latest(self, view):
+        output = text(view)
+
+        assert "Total" in output
+        assert "01h 45m 00s" in output
+        assert "standup" in output
+        assert "running" in output
+        assert "00h 15m 00s" in output
+
+    def test_brackets_are_not_markup(self, view):
+        running = view.running.return_value
+        running.title = "fix [/api] route"
+        running.project = Project(name="[bold]docs")
+        view.today.return_value = [ProjectTotal("[bold]docs", 5400, 1)]
+
+        output = text(view)
+
+        assert "fix [/api] route [bold]docs" in output
+        assert output.count("[bold]docs") == 3
+
+    def test_idle(self, view):
+        view.running.return_value = None
+        view.today.return_value = []
+
+        assert "No time entry running." in text(view)
+
+
+class TestRun:
+    @pytest.fixture()
+    def live(self, mocker: MockFixture):
+        mocker.patch("jikan.lib.dashboard.time.sleep", side_effect=[None, None, KeyboardInterrupt])
+        return mocker.patch("jikan.lib.dashboard.Live").return_value.__enter__.return_value
+
+    def test_redraws_on_change(self, view, live):
+        view.running.return_value = None
+        view.refresh.side_effect = [False, True]
+
+        with pytest.raises(KeyboardInterrupt):
+            run(view)
+
+        assert live.update.call_count == 1
+
+    def test_redraws_running_timer(self, view, live):
+        view.refresh.return_value = False
+
+        with pytest.raises(KeyboardInterrupt):
+            run(view)
+
+        assert live.update.call_count == 2
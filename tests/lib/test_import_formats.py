@@ -0,0 +1,125 @@
+import gzip
+import io
+from datetime import UTC, datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from jikan.lib.export import ExportFormat
+from jikan.lib.importer import (
+    ImportFormatError,
+    ImportRecord,
+    RejectedRow,
+    guess_format,
+    open_import_stream,
+    read_records,
+)
+
+
+def read(text: str, format: ExportFormat = ExportFormat.csv, tz=UTC) -> list:
+    return list(read_records(io.StringIO(text), format, tz))
+
+
+class TestReadRecords:
+    def test_jikan_jsonl(self):
+        text = (
+            '{"id": 7, "title": "Write", "description": "docs", "start_at": "2024-01-15T09:00:00Z",'
+            ' "end_at": "2024-01-15T10:00:00Z", "project": "Docs", "tags": ["a", "b", "a"]}\n'
+        )
+
+        assert read(text, ExportFormat.jsonl) == [
+            ImportRecord(
+                line=1,
+                title="Write",
+                description="docs",
+                start_at=datetime(2024, 1, 15, 9, tzinfo=UTC),
+                end_at=datetime(2024, 1, 15, 10, tzinfo=UTC),
+                project="Docs",
+                tags=("a", "b"),
+            )
+        ]
+
+    def test_jikan_csv(self):
+        text = (
+            "id,title,description,start_at,end_at,duration_seconds,project_id,project,tags\n"
+            "1,Write,,2024-01-15T09:00:00Z,2024-01-15T10:00:00Z,3600,,,a;b\n"
+        )
+
+        [record] = read(text)
+        assert (record.title, record.description, record.project, record.tags) == (
+            "Write",
+            None,
+            None,
+            ("a", "b"),
+        )
+
+    def test_toggl_csv_in_time_zone(self):
+        text = (
+            "User,Project,Description,Start date,Start time,End date,End time,Tags\n"
+            'A,Website,Fix header,2024-01-15,09:00:00,2024-01-15,10:30:00,"dev, urgent"\n'
+        )
+
+        [record] = read(text, tz=ZoneInfo("Europe/Berlin"))
+        assert record.start_at == datetime(2024, 1, 15, 8, tzinfo=UTC)
+        assert record.end_at == datetime(2024, 1, 15, 9, 30, tzinfo=UTC)
+        assert (record.title, record.project, record.tags) == (
+            "Fix header",
+            "Website",
+            ("dev", "urgent"),
+        )
+
+    def test_clockify_csv(self):
+        text = (
+            "Project,Description,Tags,Start Date,Start Time,End Date,End Time\n"
+            "Website,Review,,01/15/2024,09:00:00 PM,01/15/2024,10:00:00 PM\n"
+        )
+
+        [record] = read(text)
+        assert record.start_at == datetime(2024, 1, 15, 21, tzinfo=UTC)
+        assert record.tags == ()
+
+    def test_invalid_rows_are_rejected(self):
+        text = "\n".join(
+            [
+                "not json",
+                '{"start_at": "2024-01-15T09:00:00Z", "end_at": null}',
+                '{"start_at": "2024-01-15T09:00:00Z", "end_at": "2024-01-15T08:00:00Z"}',
+                '{"start_at": "yesterday", "end_at": "2024-01-15T08:00:00Z"}',
+                '{"start_at": "2024-01-15T09:00:00", "end_at": "2024-01-15T09:30:00"}',
+            ]
+        )
+
+        items = read(text, ExportFormat.jsonl)
+        assert [type(item) for item in items] == [RejectedRow] * 4 + [ImportRecord]
+        assert [item.line for item in items] == [1, 2, 3, 4, 5]
+        assert "running entries" in items[1].reason
+        assert "before start" in items[2].reason
+
+    def test_unknown_csv_header(self):
+        with pytest.raises(ImportFormatError):
+            read("a,b\n1,2\n")
+
+
+class TestFiles:
+    @pytest.mark.parametrize(
+        "name, expected",
+        [
+            ("entries.csv", ExportFormat.csv),
+            ("entries.jsonl.gz", ExportFormat.jsonl),
+            ("entries.NDJSON", ExportFormat.ndjson),
+        ],
+    )
+    def test_guess_format(self, name: str, expected: ExportFormat):
+        assert guess_format(Path(name)) is expected
+
+    def test_guess_format_unknown(self):
+        with pytest.raises(ImportFormatError):
+            guess_format(Path("entries.txt"))
+
+    def test_open_gzip(self, tmp_path: Path):
+        path = tmp_path / "entries.csv.gz"
+        path.write_bytes(gzip.compress("﻿a,b\n".encode()))
+
+        with open_import_stream(path) as stream:
+            assert stream.read() == "a,b\n"
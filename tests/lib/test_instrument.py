@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+import jikan.models
+from jikan.lib.instrument import Instrumentation
+from jikan.models import create_sqlite_engine
+
+
+@pytest.fixture()
+def engine(tmp_path: Path):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    yield engine
+    engine.dispose()
+
+
+class TestInstrumentation:
+    def test_reports_phases(self, engine: Engine, capsys: pytest.CaptureFixture[str]):
+        instrumentation = Instrumentation(started_at=None, phases=True)
+        instrumentation.start()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        instrumentation.stop()
+
+        err = capsys.readouterr().err
+        for phase in ("engine init", "query", "render", "total"):
+            assert phase in err
+        assert "import" not in err
+        assert instrumentation.engine_seconds > 0
+
+    def test_reports_slowest_statements(self, engine: Engine, capsys: pytest.CaptureFixture[str]):
+        instrumentation = Instrumentation(started_at=None, sql=True)
+        instrumentation.start()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT :value"), {"value": 42})
+            conn.execute(text("SELECT 2"))
+        instrumentation.stop()
+
+        err = capsys.readouterr().err
+        assert "SQL: 3 statements" in err  # with BEGIN
+        assert "SELECT ?" in err
+        assert "(42,)" in err
+        assert "Profile:" not in err
+
+    def test_writes_cprofile_stats(self, tmp_path: Path):
+        instrumentation = Instrumentation(started_at=None, output=tmp_path / "stats.prof")
+        instrumentation.start()
+        instrumentation.stop()
+
+        assert (tmp_path / "stats.prof").stat().st_size > 0
+
+    def test_stop_removes_instrumentation(self, engine: Engine):
+        create_engine = jikan.models.create_sqlite_engine
+        instrumentation = Instrumentation(started_at=None, sql=True)
+        instrumentation.start()
+        instrumentation.stop()
+
+        assert jikan.models.create_sqlite_engine is create_engine
+        assert not event.contains(Engine, "before_cursor_execute", instrumentation._before_execute)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert instrumentation.statements == []
@@ -0,0 +1,43 @@
+import io
+import json
+
+from jikan.lib.output import write_json, write_plain, write_tsv
+
+FIELDS = ("id", "title", "tags")
+ROWS = [(1, "tab\there", ("a", "b")), (2, "back\\slash\nnewline", ())]
+
+
+def test_json():
+    stream = io.StringIO()
+    write_json(FIELDS, iter(ROWS), stream)
+
+    assert json.loads(stream.getvalue()) == [
+        {"id": 1, "title": "tab\there", "tags": ["a", "b"]},
+        {"id": 2, "title": "back\\slash\nnewline", "tags": []},
+    ]
+    assert stream.getvalue().count("\n") == 4
+
+
+def test_json_without_rows():
+    stream = io.StringIO()
+    write_json(FIELDS, iter([]), stream)
+
+    assert json.loads(stream.getvalue()) == []
+
+
+def test_tsv_escapes_values():
+    stream = io.StringIO()
+    write_tsv(FIELDS, [(1, "tab\there", "a,b"), (2, "back\\slash\nnewline", None)], stream)
+
+    assert stream.getvalue().splitlines() == [
+        "id\ttitle\ttags",
+        "1\ttab\\there\ta,b",
+        "2\tback\\\\slash\\nnewline\t",
+    ]
+
+
+def test_plain_one_line_per_row():
+    stream = io.StringIO()
+    write_plain(FIELDS, [(1, "tab\there", "a,b"), (2, "two\nlines", None)], stream)
+
+    assert stream.getvalue() == "1\ttab here\ta,b\n2\ttwo lines\t\n"
@@ -0,0 +1,118 @@
+import io
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockFixture
+from rich.cells import cell_len
+from rich.console import Console
+
+from jikan.lib import pager
+from jikan.lib.pager import COLUMNS, column_widths, format_row
+from jikan.models import Entry
+
+
+def entries(count: int, start: int = 1) -> list[Entry]:
+    at = datetime(2024, 1, 1, 9)
+    return [
+        Entry(id=id, title=f"entry-{id}", start_at=at, created_at=at, updated_at=at)
+        for id in range(start, start + count)
+    ]
+
+
+class TestColumnWidths:
+    @pytest.mark.parametrize("total", [120, 150, 200])
+    def test_fills_the_width(self, total: int):
+        widths = column_widths(total, id_width=5, project_width=12)
+
+        assert widths["ID"] == 5
+        assert widths["Project"] == 12
+        assert cell_len(format_row(["x"] * len(widths), widths.values()).rstrip("\n")) == total
+
+    def test_every_column_when_wide(self):
+        assert list(column_widths(160, id_width=5, project_width=12)) == list(COLUMNS)
+
+    def test_drops_optional_columns_when_narrow(self):
+        widths = column_widths(80, id_width=3, project_width=7)
+
+        assert list(widths) == ["ID", "Title", "Start at", "End at", "Project", "Tags"]
+
+    def test_project_width_capped(self):
+        assert column_widths(200, 1, 100)["Project"] == 20
+
+
+class TestFormatRow:
+    def test_pads_and_cuts_cells(self):
+        assert format_row(["1", "a long title", "two\nlines"], [3, 6, 10]) == (
+            " 1     a lon…   two lines  \n"
+        )
+
+    def test_wide_characters(self):
+        row = format_row(["作業の記録", "時間"], [6, 4])
+
+        # The third character takes two cells, which leaves one for padding.
+        assert row == " 作業 …   時間 \n"
+
+
+class TestPageEntries:
+    def test_prints_every_page_without_terminal(self, mocker: MockFixture):
+        pages = mocker.Mock(return_value=iter([entries(2), entries(1, start=3)]))
+        stream = io.StringIO()
+        mocker.patch.object(pager, "Console", return_value=Console(file=stream, width=120))
+
+        pager.page_entries(pages, 1, 7)
+
+        lines = stream.getvalue().splitlines()
+        assert lines[0].split()[:2] == ["ID", "Title"]
+        assert [line.split()[1] for line in lines[2:]] == ["entry-1", "entry-2", "entry-3"]
+        pages.assert_called_once_with(pager.PAGE_SIZE)
+
+    def test_builtin_fetches_next_page_on_key(self, mocker: MockFixture):
+        fetched = []
+
+        def pages():
+            for page in ([entries(2)], [entries(2, start=3)], [entries(1, start=5)]):
+                fetched.append(page)
+                yield page[0]
+
+        getchar = mocker.patch("click.getchar", side_effect=["\r", "q"])
+        stream = io.StringIO()
+        console = Console(file=stream, width=120)
+        widths = column_widths(120, 1, 7)
+
+        pager._builtin(console, "header\n", pages(), widths, page_size=2)
+
+        assert getchar.call_count == 2
+        assert len(fetched) == 2
+        output = stream.getvalue()
+        assert "entry-4" in output
+        assert "entry-5" not in output
+
+    def test_builtin_stops_after_short_page(self, mocker: MockFixture):
+        getchar = mocker.patch("click.getchar")
+        console = Console(file=io.StringIO(), width=120)
+
+        pager._builtin(console, "", iter([entries(1)]), column_widths(120, 1, 7), page_size=2)
+
+        getchar.assert_not_called()
+
+    def test_external(self, tmp_path: Path):
+        path = tmp_path / "paged.txt"
+
+        pager._external(
+            f"sh -c 'cat > {path}'", "header\n", iter([entries(2)]), column_widths(120, 1, 7)
+        )
+
+        lines = path.read_text().splitlines()
+        assert lines[0] == "header"
+        assert [line.split()[1] for line in lines[1:]] == ["entry-1", "entry-2"]
+
+    def test_external_quit_early(self, mocker: MockFixture):
+        # Far more than a pipe holds, so writing fails once the pager is gone.
+        pages = (entries(1000) for _ in range(100))
+        popen = mocker.spy(subprocess, "Popen")
+
+        pager._external("true", "", pages, column_widths(120, 1, 7))
+
+        assert popen.spy_return.returncode == 0
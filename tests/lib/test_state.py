@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import pytest
+
+from jikan.lib.state import (
+    RunningState,
+    StateUnavailableError,
+    clear_running_state,
+    read_running_state,
+    state_path,
+    write_running_state,
+)
+
+STATE = RunningState(id=3, title="Write", description=None, project="Docs", start_at=1700000000.0)
+
+
+@pytest.fixture()
+def db_path(tmp_path: Path) -> Path:
+    path = tmp_path / "database.db"
+    path.touch()
+    return path
+
+
+class TestRunningState:
+    def test_round_trip(self, db_path: Path):
+        write_running_state(db_path, STATE)
+        assert read_running_state(db_path) == STATE
+
+        write_running_state(db_path, None)
+        assert read_running_state(db_path) is None
+
+    def test_missing(self, db_path: Path):
+        with pytest.raises(StateUnavailableError):
+            read_running_state(db_path)
+
+    def test_corrupt(self, db_path: Path):
+        state_path(db_path).write_text("{")
+        with pytest.raises(StateUnavailableError):
+            read_running_state(db_path)
+
+    def test_recreated_database_is_stale(self, db_path: Path):
+        write_running_state(db_path, STATE)
+        db_path.rename(db_path.with_suffix(".bak"))
+        db_path.touch()
+
+        with pytest.raises(StateUnavailableError):
+            read_running_state(db_path)
+
+    def test_write_failure_removes_file(self, db_path: Path):
+        write_running_state(db_path, STATE)
+        db_path.unlink()  # the identity of a missing database cannot be recorded
+        write_running_state(db_path, None)
+
+        assert not state_path(db_path).exists()
+
+    def test_clear(self, db_path: Path):
+        write_running_state(db_path, STATE)
+        clear_running_state(db_path)
+        clear_running_state(db_path)
+
+        assert not state_path(db_path).exists()
@@ -0,0 +1,215 @@
+import gzip
+import io
+import subprocess
+import sys
+import threading
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+import typer
+from pytest_mock import MockFixture
+from sqlmodel import Session, select
+from typer.testing import CliRunner
+
+import jikan.models
+from jikan.cli import GLOBAL_VALUE_OPTIONS, command_args, main
+from jikan.daemon import _Handler, create_server
+from jikan.lib.daemon import NO_DAEMON_ENV, DaemonUnavailableError, connect, control, forward
+from jikan.main import app
+from jikan.models import Entry
+
+runner = CliRunner()
+
+
+@pytest.fixture()
+def socket_path(tmp_path: Path) -> Generator[str, None, None]:
+    path = str(tmp_path / "jikan.sock")
+    server = create_server(path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def run(path: str, *argv: str, stdin: str = "") -> tuple[int, str, str]:
+    stdout, stderr = io.StringIO(), io.StringIO()
+    code = forward(list(argv), path, stdin=io.StringIO(stdin), stdout=stdout, stderr=stderr)
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+class TestForward:
+    def test_runs_command_in_daemon(self, socket_path: str, use_test_engine: None):
+        code, out, _ = run(socket_path, "start", "--title", "remote")
+
+        assert code == 0
+        assert "Time entry started" in out
+        with Session(jikan.models.engine) as session:
+            assert session.exec(select(Entry.title)).all() == ["remote"]
+
+    def test_exit_code(self, socket_path: str, use_test_engine: None):
+        code, out, _ = run(socket_path, "stop")
+
+        assert code == 1
+        assert "No time entry running" in out
+
+    def test_usage_error_goes_to_stderr(self, socket_path: str):
+        code, _, err = run(socket_path, "no-such-command")
+
+        assert code == 2
+        assert "No such command" in err
+
+    def test_reads_input_from_client(self, socket_path: str, seed_entries: None):
+        code, out, _ = run(socket_path, "delete", "1", stdin="y\n")
+
+        assert code == 0
+        assert "Are you sure" in out
+        with Session(jikan.models.engine) as session:
+            assert session.exec(select(Entry.id)).all() == [2]
+
+    def test_relative_paths_use_client_cwd(
+        self, socket_path: str, use_test_engine: None, tmp_path: Path, monkeypatch
+    ):
+        monkeypatch.chdir(tmp_path)
+        code, _, _ = run(socket_path, "export", "-o", "out.csv")
+
+        assert code == 0
+        assert (tmp_path / "out.csv").read_text().startswith("id,title")
+
+    def test_binary_output(self, socket_path: str, seed_entries: None, tmp_path: Path):
+        output = tmp_path / "out.csv.gz"
+        with output.open("w") as stdout:
+            code = forward(["export", "--gzip"], socket_path, stdout=stdout)
+
+        assert code == 0
+        assert gzip.decompress(output.read_bytes()).decode().count("\n") == 3
+
+    def test_unavailable(self, tmp_path: Path):
+        with pytest.raises(DaemonUnavailableError):
+            forward(["status"], str(tmp_path / "missing.sock"))
+
+
+class TestServer:
+    def test_ping(self, socket_path: str):
+        assert "pid" in control("ping", socket_path)
+
+    def test_drops_stalled_client(self, socket_path: str, monkeypatch):
+        monkeypatch.setattr(_Handler, "timeout", 0.2)
+        # Connects but never sends a request.
+        with connect(socket_path) as stalled:
+            stalled.settimeout(5)
+            assert stalled.recv(1) == b""
+            assert "pid" in control("ping", socket_path)
+
+    def test_refuses_second_daemon(self, socket_path: str):
+        with pytest.raises(RuntimeError):
+            create_server(socket_path)
+
+    def test_replaces_stale_socket(self, tmp_path: Path):
+        path = tmp_path / "jikan.sock"
+        path.touch()
+        create_server(str(path)).server_close()
+
+
+class TestMain:
+    def test_client_does_not_load_cli_dependencies(self):
+        code = (
+            "import sys, jikan.cli; "
+            "print(','.join(m for m in ('typer', 'click', 'sqlalchemy', 'jikan.main') "
+            "if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+
+        assert result.stdout.strip() == ""
+
+    @pytest.mark.parametrize(
+        ("argv", "args"),
+        [
+            (["list"], ["list"]),
+            (["--output-format", "json", "list", "--since", "x"], ["list", "--since", "x"]),
+            (["--output-format=tsv", "--trace-sql", "project", "list"], ["project", "list"]),
+            (["--profile-output", "out.prof"], []),
+        ],
+    )
+    def test_command_args(self, argv: list[str], args: list[str]):
+        assert command_args(argv) == args
+
+    def test_global_value_options_are_known(self):
+        root = typer.main.get_command(app)
+        options = {
+            opt
+            for param in root.params
+            if not getattr(param, "is_flag", True)
+            for opt in param.opts
+        }
+
+        assert options == set(GLOBAL_VALUE_OPTIONS)
+
+    def test_forwards_to_daemon(self, mocker: MockFixture):
+        mocker.patch("sys.argv", ["jikan", "status"])
+        forward = mocker.patch("jikan.cli.forward", return_value=3)
+
+        with pytest.raises(SystemExit) as e:
+            main()
+        assert e.value.code == 3
+        forward.assert_called_once_with(["status"])
+
+    def test_runs_locally_without_daemon(self, mocker: MockFixture):
+        mocker.patch("sys.argv", ["jikan", "status"])
+        mocker.patch("jikan.cli.forward", side_effect=DaemonUnavailableError)
+        app = mocker.patch("jikan.main.app")
+
+        main()
+        app.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            ["daemon", "stop"],
+            ["dashboard"],
+            ["status"],
+            ["--trace-sql", "list"],
+            ["--profile", "list"],
+            ["list", "--pager"],
+            ["delete", "1"],
+            ["tag", "delete", "1"],
+            ["project", "delete", "1"],
+            ["dev", "seed"],
+            ["--output-format", "json", "delete", "1"],
+            ["--output-format=json", "tag", "delete", "1"],
+            ["--profile-output", "out.prof", "dev", "seed"],
+        ],
+    )
+    def test_runs_locally(self, mocker: MockFixture, monkeypatch, argv: list[str]):
+        if argv == ["status"]:
+            monkeypatch.setenv(NO_DAEMON_ENV, "1")
+        mocker.patch("sys.argv", ["jikan", *argv])
+        forward = mocker.patch("jikan.cli.forward")
+        mocker.patch("jikan.main.app")
+
+        main()
+        forward.assert_not_called()
+
+
+class TestDaemonCommands:
+    def test_status_not_running(self):
+        result = runner.invoke(app, ["daemon", "status"])
+
+        assert result.exit_code == 0
+        assert "not running" in result.output
+
+    def test_stop_not_running(self):
+        result = runner.invoke(app, ["daemon", "stop"])
+
+        assert result.exit_code == 1
+        assert "Daemon is not running" in result.output
+
+    def test_status_running(self, mocker: MockFixture):
+        mocker.patch("jikan.lib.daemon.control", return_value={"pid": 42})
+        result = runner.invoke(app, ["daemon", "status"])
+
+        assert "pid 42" in result.output
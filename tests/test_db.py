@@ -0,0 +1,52 @@
+from pytest_mock import MockFixture
+from typer.testing import CliRunner
+
+from jikan.main import app
+from jikan.migrations import MIGRATIONS
+
+runner = CliRunner()
+
+
+class TestRebuildRollups:
+    def test_success(self, mocker: MockFixture):
+        mocker.patch("jikan.core.rollup.rebuild_rollups", return_value=42)
+        result = runner.invoke(app, ["db", "rebuild-rollups"])
+
+        assert result.exit_code == 0
+        assert "Success" in result.output
+        assert "42" in result.output
+
+    def test_core_func_raise_exception(self, mocker: MockFixture):
+        mocker.patch("jikan.core.rollup.rebuild_rollups", side_effect=Exception())
+        result = runner.invoke(app, ["db", "rebuild-rollups"])
+
+        assert result.exit_code == 1
+        assert "Failed to rebuild rollups" in result.output
+
+
+class TestMigrate:
+    def test_dry_run(self):
+        result = runner.invoke(app, ["db", "migrate", "--dry-run"])
+
+        assert result.exit_code == 0
+        assert f"{len(MIGRATIONS)} pending migrations" in result.output
+        assert MIGRATIONS[0].description in result.output
+
+        result = runner.invoke(app, ["db", "migrate", "--dry-run"])
+        assert f"{len(MIGRATIONS)} pending migrations" in result.output
+
+    def test_migrate(self):
+        result = runner.invoke(app, ["db", "migrate"])
+
+        assert result.exit_code == 0
+        assert f"Applied {len(MIGRATIONS)} migrations" in result.output
+
+        result = runner.invoke(app, ["db", "migrate"])
+        assert "up to date" in result.output
+
+    def test_failure(self, mocker: MockFixture):
+        mocker.patch("jikan.migrations.migrate", side_effect=Exception("boom"))
+        result = runner.invoke(app, ["db", "migrate"])
+
+        assert result.exit_code == 1
+        assert "Failed to migrate: boom" in result.output
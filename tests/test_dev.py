@@ -0,0 +1,34 @@
+from pytest_mock import MockFixture
+from typer.testing import CliRunner
+
+from jikan.core.seed import SeedSummary
+from jikan.main import app
+
+runner = CliRunner()
+
+
+class TestSeed:
+    def test_success(self, mocker: MockFixture):
+        seed_history = mocker.patch(
+            "jikan.core.seed.seed_history",
+            return_value=SeedSummary(projects=40, tags=60, entries=1000, links=1500),
+        )
+        result = runner.invoke(app, ["dev", "seed", "--entries", "1000", "--users", "2", "-y"])
+
+        assert result.exit_code == 0
+        assert "Added 1000 entries, 40 projects, 60 tags and 1500 tag links" in result.output
+        seed_history.assert_called_once_with(1000, 2, 20, 30, 0)
+
+    def test_confirm_cancel(self, mocker: MockFixture):
+        seed_history = mocker.patch("jikan.core.seed.seed_history")
+        result = runner.invoke(app, ["dev", "seed"], input="n\n")
+
+        assert result.exit_code == 1
+        seed_history.assert_not_called()
+
+    def test_core_func_raise_exception(self, mocker: MockFixture):
+        mocker.patch("jikan.core.seed.seed_history", side_effect=Exception("boom"))
+        result = runner.invoke(app, ["dev", "seed", "-y"])
+
+        assert result.exit_code == 1
+        assert "Failed to seed: boom" in result.output
@@ -1,18 +1,32 @@
-from datetime import datetime
-
+import gzip
+import json
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
 from pytest_mock import MockFixture
+from sqlmodel import Session
 from typer.testing import CliRunner
 
+import jikan.core.entry as entry_core
+import jikan.models
 from jikan.core.entry import (
     EntryAlreadyRunningError,
     EntryNotFoundError,
     EntryNotRunningError,
-    running_time,
 )
+from jikan.core.importer import ImportSummary
 from jikan.core.project import ProjectNotFoundError
-from jikan.lib.datetime import format_timedelta
+from jikan.core.tag import TagNotFoundError
+from jikan.lib.datetime import parse_dt, utc_now
+from jikan.lib.importer import RejectedRow
+from jikan.lib.report import ReportGroup, ReportRow
+from jikan.lib.state import RunningState, write_running_state
 from jikan.main import app
-from jikan.models import Entry
+from jikan.models import Entry, EntryTagLink, ImportJob, Project
 
 runner = CliRunner()
 
@@ -24,10 +38,47 @@ def test_app():
     assert "Usage" in result.output
 
 
+def test_trace_sql(seed_entries: None):
+    result = runner.invoke(app, ["--trace-sql", "--profile", "list"])
+
+    assert result.exit_code == 0
+    assert "entry-1" in result.stdout
+    assert "Profile:" in result.stderr
+    assert "SQL: " in result.stderr
+
+
+def test_profile_serve(mocker: MockFixture, monkeypatch: pytest.MonkeyPatch):
+    # serve configures the engine, which must not have been created yet.
+    monkeypatch.setattr(jikan.models, "_engine_options", {})
+    jikan.models.get_engine.cache_clear()
+    serve = mocker.patch("jikan.server.serve", new_callable=mocker.AsyncMock)
+
+    result = runner.invoke(app, ["--profile", "serve", "--workers", "2"])
+
+    assert result.exit_code == 0
+    serve.assert_awaited_once()
+    assert "Profile:" in result.stderr
+    assert jikan.models._engine_options == {"pool_size": 2, "max_overflow": 0}
+    jikan.models.get_engine.cache_clear()
+
+
+def test_import_does_not_load_heavy_dependencies():
+    code = (
+        "import sys, jikan.main; "
+        "print(','.join(m for m in ('rich', 'sqlalchemy', 'sqlmodel', 'jikan.models') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == ""
+
+
 class TestStart:
     def test_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.main.start_time_entry",
+            "jikan.core.entry.start_time_entry",
             return_value=Entry(
                 id=1, title="Test", description="", project_id=1, start_at=datetime.now()
             ),
@@ -39,7 +90,7 @@ class TestStart:
 
     def test_with_options(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.main.start_time_entry",
+            "jikan.core.entry.start_time_entry",
             return_value=Entry(
                 id=1, title="Test", description="", project_id=1, start_at=datetime.now()
             ),
@@ -54,7 +105,7 @@ class TestStart:
 
     def test_without_project_id(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.main.start_time_entry",
+            "jikan.core.entry.start_time_entry",
             return_value=Entry(
                 id=1, title="Test", description="", project_id=1, start_at=datetime.now()
             ),
@@ -66,7 +117,7 @@ class TestStart:
 
     def test_core_func_raise_exception(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.main.start_time_entry",
+            "jikan.core.entry.start_time_entry",
             side_effect=Exception(),
         )
 
@@ -79,7 +130,7 @@ class TestStart:
 
     def test_fail_if_active_entry_exist(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.main.start_time_entry",
+            "jikan.core.entry.start_time_entry",
             side_effect=EntryAlreadyRunningError(),
         )
 
@@ -90,11 +141,30 @@ class TestStart:
         assert result.exit_code == 1
         assert "Time entry is already running" in result.output
 
+    def test_with_tags(self, mocker: MockFixture):
+        start_time_entry = mocker.patch(
+            "jikan.core.entry.start_time_entry",
+            return_value=Entry(id=1, title="Test", description="", start_at=datetime.now()),
+        )
+
+        result = runner.invoke(app, ["start", "--tag", "1", "--tag", "2"])
+
+        assert result.exit_code == 0
+        start_time_entry.assert_called_once_with(None, "", "", [1, 2])
+
+    def test_tag_not_found(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.start_time_entry", side_effect=TagNotFoundError())
+
+        result = runner.invoke(app, ["start", "--tag", "9"])
+
+        assert result.exit_code == 1
+        assert "Tag not found" in result.output
+
 
 class TestStop:
     def test_with_entry(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.main.stop_time_entry",
+            "jikan.core.entry.stop_time_entry",
             return_value=Entry(
                 id=1, title="Test", description="", project_id=1, start_at=datetime.now()
             ),
@@ -105,7 +175,7 @@ class TestStop:
 
     def test_no_entry(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.main.stop_time_entry",
+            "jikan.core.entry.stop_time_entry",
             side_effect=EntryNotRunningError(),
         )
         result = runner.invoke(app, ["stop"])
@@ -115,7 +185,7 @@ class TestStop:
 
     def test_with_core_func_raise_exception(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.main.stop_time_entry",
+            "jikan.core.entry.stop_time_entry",
             side_effect=Exception(),
         )
         result = runner.invoke(app, ["stop"])
@@ -124,46 +194,140 @@ class TestStop:
         assert "Failed to stop." in result.output
 
 
-class TestStatus:
-    def test_entry_running(self, mocker: MockFixture):
-        entries = [
-            Entry(id=1, project_id=1, title="Test", description="Test", start_at=datetime.now())
-        ]
+class TestSwitch:
+    def test_success(self, mocker: MockFixture):
+        now = datetime.now()
         mocker.patch(
-            "jikan.main.get_running_entry",
-            return_value=entries,
+            "jikan.core.entry.switch_time_entry",
+            return_value=(
+                Entry(id=1, title="Before", start_at=now, end_at=now),
+                Entry(id=2, title="After", start_at=now),
+            ),
         )
-        result = runner.invoke(app, ["status"])
+        result = runner.invoke(app, ["switch", "--id", "1", "-t", "After", "--tag", "1"])
 
         assert result.exit_code == 0
-        assert entries[0].title in result.output
-        assert format_timedelta(running_time(entries[0])) in result.output
+        assert "Time entry stopped" in result.output
+        assert "Time entry started" in result.output
 
     def test_no_entry_running(self, mocker: MockFixture):
-        entries = []
         mocker.patch(
-            "jikan.main.get_running_entry",
-            return_value=entries,
+            "jikan.core.entry.switch_time_entry",
+            return_value=(None, Entry(id=1, title="After", start_at=datetime.now())),
         )
+        result = runner.invoke(app, ["switch", "-t", "After"])
+
+        assert result.exit_code == 0
+        assert "Time entry stopped" not in result.output
+        assert "Time entry started" in result.output
+
+    def test_tag_not_found(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.switch_time_entry", side_effect=TagNotFoundError())
+        result = runner.invoke(app, ["switch", "--tag", "1000"])
+
+        assert result.exit_code == 1
+        assert "Tag not found" in result.output
+
+    def test_core_func_raise_exception(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.switch_time_entry", side_effect=Exception())
+        result = runner.invoke(app, ["switch"])
+
+        assert result.exit_code == 1
+        assert "Failed to switch." in result.output
+
+
+def running_state() -> RunningState:
+    return RunningState(
+        id=1, title="Test", description="Desc", project="P", start_at=time.time() - 3725
+    )
+
+
+class TestStatus:
+    def test_entry_running(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.load_running_state", return_value=running_state())
+        result = runner.invoke(app, ["status"])
+
+        assert result.exit_code == 0
+        assert "Title: Test" in result.output
+        assert "Time entry running: 01h 02m" in result.output
+
+    def test_no_entry_running(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.load_running_state", return_value=None)
         result = runner.invoke(app, ["status"])
 
         assert result.exit_code == 0
         assert "No time entry running" in result.output
 
     def test_multiple_entry_running(self, mocker: MockFixture):
-        entries = [
-            Entry(id=1, project_id=1, title="Test", description="Test", start_at=datetime.now()),
-            Entry(id=2, project_id=1, title="Test", description="Test", start_at=datetime.now()),
-        ]
         mocker.patch(
-            "jikan.main.get_running_entry",
-            return_value=entries,
+            "jikan.core.entry.load_running_state",
+            side_effect=RuntimeError("Multiple time entries running"),
         )
         result = runner.invoke(app, ["status"])
 
         assert result.exit_code == 1
         assert "Multiple time entries running" in result.output
 
+    def test_reads_state_file_without_database(self, mocker: MockFixture, tmp_path: Path):
+        db_path = tmp_path / "data" / "database.db"
+        db_path.parent.mkdir()
+        db_path.touch()
+        write_running_state(db_path, running_state())
+        load_running_state = mocker.patch("jikan.core.entry.load_running_state")
+        result = runner.invoke(app, ["status"])
+
+        assert result.exit_code == 0
+        assert "Title: Test" in result.output
+        load_running_state.assert_not_called()
+
+
+class TestDashboard:
+    def test_runs_until_interrupted(self, mocker: MockFixture):
+        view = mocker.patch("jikan.core.dashboard.DashboardView").return_value
+        run = mocker.patch("jikan.lib.dashboard.run", side_effect=KeyboardInterrupt)
+        result = runner.invoke(app, ["dashboard", "--recent", "5"])
+
+        assert result.exit_code == 0
+        view.load.assert_called_once()
+        run.assert_called_once_with(view, 1.0)
+        view.close.assert_called_once()
+
+    def test_load_fails(self, mocker: MockFixture):
+        view = mocker.patch("jikan.core.dashboard.DashboardView").return_value
+        view.load.side_effect = Exception("locked")
+        result = runner.invoke(app, ["dashboard"])
+
+        assert result.exit_code == 1
+        assert "Failed to load dashboard: locked" in result.output
+
+
+class TestPrompt:
+    def test_default_format(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.load_running_state", return_value=running_state())
+        result = runner.invoke(app, ["prompt"])
+
+        assert result.exit_code == 0
+        assert result.output == "Test 1:02\n"
+
+    def test_custom_format(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.load_running_state", return_value=running_state())
+        result = runner.invoke(app, ["prompt", "-f", "[{project}] #{id}"])
+
+        assert result.output == "[P] #1\n"
+
+    def test_idle(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.load_running_state", return_value=None)
+
+        assert runner.invoke(app, ["prompt"]).output == ""
+        assert runner.invoke(app, ["prompt", "--idle", "-"]).output == "-\n"
+
+    def test_invalid_format(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.load_running_state", return_value=running_state())
+        result = runner.invoke(app, ["prompt", "-f", "{nope}"])
+
+        assert result.exit_code == 1
+        assert "Invalid format" in result.output
+
 
 class TestList:
     def test_success(self, mocker: MockFixture):
@@ -172,9 +336,10 @@ class TestList:
             Entry(id=2, project_id=1, title="Test2", description="Test", start_at=datetime.now()),
         ]
         mocker.patch(
-            "jikan.main.list_time_entry",
+            "jikan.core.entry.iter_time_entry",
             return_value=entries,
         )
+        mocker.patch("jikan.core.entry.list_widths", return_value=(1, 0))
         result = runner.invoke(app, ["list"])
 
         assert result.exit_code == 0
@@ -182,28 +347,187 @@ class TestList:
         assert "Test1" in result.output
         assert "Test2" in result.output
 
+    def test_shows_project_and_tag_names(self, seed_tags: None):
+        with Session(jikan.models.engine) as session:
+            session.add(Project(id=1, name="project-1"))
+            session.add(Entry(id=1, project_id=1, title="Test1", end_at=utc_now()))
+            session.add_all(EntryTagLink(entry_id=1, tag_id=tag_id) for tag_id in (1, 2))
+            session.commit()
+
+        result = runner.invoke(app, ["list"], env={"COLUMNS": "200"})
+
+        assert result.exit_code == 0
+        assert "project-1" in result.output
+        assert "tag-1, tag-2" in result.output
+
+    def test_fits_default_width(self, use_test_engine: None):
+        with Session(jikan.models.engine) as session:
+            session.add(Project(id=1, name="client-project"))
+            session.add(Entry(id=12345, project_id=1, title="Test1", end_at=utc_now()))
+            session.commit()
+
+        result = runner.invoke(app, ["list"], env={"COLUMNS": "80"})
+
+        assert result.exit_code == 0
+        assert "12345" in result.output
+        assert "client-project" in result.output
+        assert max(len(line) for line in result.output.splitlines()) <= 80
+
     def test_no_entry(self, mocker: MockFixture):
         entries = []
         mocker.patch(
-            "jikan.main.list_time_entry",
+            "jikan.core.entry.iter_time_entry",
             return_value=entries,
         )
+        mocker.patch("jikan.core.entry.list_widths", return_value=(1, 0))
         result = runner.invoke(app, ["list"])
 
         assert result.exit_code == 0
         assert "Title" in result.output
 
+    def test_filters(self, mocker: MockFixture):
+        iter_time_entry = mocker.patch("jikan.core.entry.iter_time_entry", return_value=[])
+        result = runner.invoke(
+            app,
+            [
+                "list",
+                "--since",
+                "2024/01/01",
+                "--until",
+                "2024/02/01 12:00:00",
+                "--project",
+                "1",
+                "--project",
+                "2",
+                "--tag",
+                "3",
+                "--limit",
+                "10",
+            ],
+        )
 
-class TestEdit:
+        assert result.exit_code == 0
+        args, kwargs = iter_time_entry.call_args
+        assert args == (
+            datetime(2024, 1, 1, tzinfo=UTC),
+            datetime(2024, 2, 1, 12, tzinfo=UTC),
+            [1, 2],
+            [3],
+        )
+        assert kwargs["limit"] == 10
+
+    def test_invalid_since(self):
+        result = runner.invoke(app, ["list", "--since", "yesterday"])
+
+        assert result.exit_code == 1
+
+    def test_streams_in_batches(self, mocker: MockFixture):
+        entries = [
+            Entry(id=i, project_id=1, title=f"Test{i}", description="", start_at=datetime.now())
+            for i in range(1, 6)
+        ]
+        mocker.patch("jikan.core.entry.iter_time_entry", return_value=iter(entries))
+        mocker.patch("jikan.main.LIST_BATCH_SIZE", 2)
+        result = runner.invoke(app, ["list"])
+
+        assert result.exit_code == 0
+        assert result.output.count("Title") == 1
+        assert all(f"Test{i}" in result.output for i in range(1, 6))
+
+    def test_pager_without_terminal(self, seed_entries: None, mocker: MockFixture):
+        mocker.patch("jikan.lib.pager.PAGE_SIZE", 1)
+        pages = mocker.spy(entry_core, "iter_entry_pages")
+
+        result = runner.invoke(app, ["list", "--pager", "--limit", "2"], env={"COLUMNS": "160"})
+
+        assert result.exit_code == 0
+        lines = result.output.splitlines()
+        assert lines[0].split()[:2] == ["ID", "Title"]
+        assert len(lines) == 4
+        assert pages.call_args.args[4:] == (1, 2)
+
+    def test_json(self, seed_tags: None):
+        with Session(jikan.models.engine) as session:
+            session.add(Project(id=1, name="project-1"))
+            session.add(
+                Entry(
+                    id=1,
+                    project_id=1,
+                    title="Test1",
+                    start_at=datetime(2024, 1, 1, 9),
+                    end_at=datetime(2024, 1, 1, 10),
+                )
+            )
+            session.add_all(EntryTagLink(entry_id=1, tag_id=tag_id) for tag_id in (1, 2))
+            session.commit()
+
+        result = runner.invoke(app, ["--output-format", "json", "list"])
+
+        assert result.exit_code == 0
+        assert json.loads(result.output) == [
+            {
+                "id": 1,
+                "title": "Test1",
+                "description": None,
+                "start_at": "2024-01-01T09:00:00Z",
+                "end_at": "2024-01-01T10:00:00Z",
+                "duration_seconds": 3600,
+                "project_id": 1,
+                "project": "project-1",
+                "tags": ["tag-1", "tag-2"],
+            }
+        ]
+
+    def test_tsv_with_filters(self, mocker: MockFixture):
+        iter_entry_rows = mocker.patch(
+            "jikan.core.entry.iter_entry_rows",
+            return_value=iter([(1, "a\tb", "", "2024-01-01T09:00:00Z", None, None, 1, "p", "")]),
+        )
+
+        result = runner.invoke(
+            app, ["--output-format", "tsv", "list", "--project", "1", "--limit", "5"]
+        )
+
+        assert result.exit_code == 0
+        header, row = result.output.splitlines()
+        assert header.split("\t")[:2] == ["id", "title"]
+        assert row == "1\ta\\tb\t\t2024-01-01T09:00:00Z\t\t\t1\tp\t"
+        args, kwargs = iter_entry_rows.call_args
+        assert args == (None, None, [1], [])
+        assert kwargs == {"tag_separator": ",", "limit": 5}
+
+
+class TestSearch:
     def test_success(self, mocker: MockFixture):
-        mocker.patch(
-            "jikan.main.get_entry",
-            return_value=Entry(
-                id=1, project_id=1, title="Entry", description="Entry", start_at=datetime.now()
-            ),
+        search_time_entry = mocker.patch(
+            "jikan.core.entry.search_time_entry",
+            return_value=[Entry(id=7, title="Vendor meeting", start_at=datetime.now())],
         )
-        mocker.patch(
-            "jikan.main.edit_entry",
+
+        result = runner.invoke(app, ["search", "vendor", "meet*", "--project", "1"])
+
+        assert result.exit_code == 0
+        assert "Vendor meeting" in result.output
+        search_time_entry.assert_called_once_with("vendor meet*", None, None, [1], [], 20)
+
+    def test_terms_should_be_given(self):
+        result = runner.invoke(app, ["search"])
+
+        assert result.exit_code == 2
+
+    def test_core_func_raise_exception(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.search_time_entry", side_effect=Exception("boom"))
+
+        result = runner.invoke(app, ["search", "vendor"])
+
+        assert result.exit_code == 1
+        assert "Failed to search: boom" in result.output
+
+
+class TestEdit:
+    def test_success(self, mocker: MockFixture):
+        edit_entry = mocker.patch(
+            "jikan.core.entry.edit_entry",
             return_value=Entry(
                 id=1, project_id=1, title="Edited", description="Edited", start_at=datetime.now()
             ),
@@ -230,16 +554,19 @@ class TestEdit:
         assert result.exit_code == 0
         assert "Entry edited" in result.output
         assert "Success" in result.output
+        edit_entry.assert_called_once_with(
+            1,
+            "Edited",
+            "Edited",
+            parse_dt("1990/01/01 12:34:56"),
+            parse_dt("2000/01/01 23:59:59"),
+            1,
+            [],
+        )
 
     def test_short_option(self, mocker: MockFixture):
-        mocker.patch(
-            "jikan.main.get_entry",
-            return_value=Entry(
-                id=1, project_id=1, title="Entry", description="Entry", start_at=datetime.now()
-            ),
-        )
-        mocker.patch(
-            "jikan.main.edit_entry",
+        edit_entry = mocker.patch(
+            "jikan.core.entry.edit_entry",
             return_value=Entry(
                 id=1, project_id=1, title="Edited", description="Edited", start_at=datetime.now()
             ),
@@ -250,6 +577,7 @@ class TestEdit:
         assert result.exit_code == 0
         assert "Entry edited" in result.output
         assert "Success" in result.output
+        edit_entry.assert_called_once_with(1, "Edited", "Edited", None, None, None, [])
 
     def test_id_not_passed(self):
         result = runner.invoke(app, ["edit", "--title", "Entry", "--description", "Entry"])
@@ -262,15 +590,16 @@ class TestEdit:
         assert result.exit_code == 1
 
     def test_entry_not_found(self, mocker: MockFixture):
-        mocker.patch(
-            "jikan.main.get_entry",
-            side_effect=EntryNotFoundError(),
-        )
+        edit_entry = mocker.patch("jikan.core.entry.edit_entry", side_effect=EntryNotFoundError())
 
         result = runner.invoke(app, ["edit", "1", "--title", "Edited", "--description", "Edited"])
         assert result.exit_code == 1
+        assert "Entry not found" in result.output
+        edit_entry.assert_called_once_with(1, "Edited", "Edited", None, None, None, [])
 
     def test_start_invalid(self, mocker: MockFixture):
+        edit_entry = mocker.patch("jikan.core.entry.edit_entry")
+
         result = runner.invoke(
             app,
             [
@@ -286,8 +615,11 @@ class TestEdit:
         )
 
         assert result.exit_code == 1
+        edit_entry.assert_not_called()
 
     def test_end_invalid(self, mocker: MockFixture):
+        edit_entry = mocker.patch("jikan.core.entry.edit_entry")
+
         result = runner.invoke(
             app,
             [
@@ -303,15 +635,10 @@ class TestEdit:
         )
 
         assert result.exit_code == 1
+        edit_entry.assert_not_called()
 
     def test_project_not_found(self, mocker: MockFixture):
-        mocker.patch(
-            "jikan.main.get_entry",
-            return_value=Entry(
-                id=1, project_id=1, title="Entry", description="Entry", start_at=datetime.now()
-            ),
-        )
-        mocker.patch("jikan.main.edit_entry", side_effect=ProjectNotFoundError())
+        edit_entry = mocker.patch("jikan.core.entry.edit_entry", side_effect=ProjectNotFoundError())
         result = runner.invoke(
             app,
             [
@@ -323,6 +650,16 @@ class TestEdit:
         )
 
         assert result.exit_code == 1
+        assert "Project not found" in result.output
+        edit_entry.assert_called_once_with(1, None, None, None, None, 1000, [])
+
+    def test_with_tags(self, mocker: MockFixture):
+        edit_entry = mocker.patch("jikan.core.entry.edit_entry")
+
+        result = runner.invoke(app, ["edit", "1", "--tag", "2"])
+
+        assert result.exit_code == 0
+        edit_entry.assert_called_once_with(1, None, None, None, None, None, [2])
 
 
 class TestDelete:
@@ -331,10 +668,10 @@ class TestDelete:
             id=1, project_id=1, title="Entry", description="Entry", start_at=datetime.now()
         )
 
-        mocker.patch("jikan.main.get_entry", return_value=entry)
+        mocker.patch("jikan.core.entry.get_entry", return_value=entry)
         mocker.patch("jikan.main.typer.confirm", return_value=True)
         mocker.patch(
-            "jikan.main.delete_entry",
+            "jikan.core.entry.delete_entry",
             return_value=None,
         )
 
@@ -348,19 +685,190 @@ class TestDelete:
         assert result.exit_code == 2
 
     def test_entry_not_found(self, mocker: MockFixture):
-        mocker.patch(
-            "jikan.main.get_entry",
-            side_effect=EntryNotFoundError(),
-        )
+        get_entry = mocker.patch("jikan.core.entry.get_entry", side_effect=EntryNotFoundError())
+        delete_entry = mocker.patch("jikan.core.entry.delete_entry")
+
         result = runner.invoke(app, ["delete", "1"])
         assert result.exit_code == 1
+        get_entry.assert_called_once_with(1)
+        delete_entry.assert_not_called()
 
     def test_reject_confirmation(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.main.get_entry",
+            "jikan.core.entry.get_entry",
             side_effect=EntryNotFoundError(),
         )
         mocker.patch("jikan.main.typer.confirm", return_value=False)
 
         result = runner.invoke(app, ["delete", "1"])
         assert result.exit_code == 1
+
+
+class TestExport:
+    fields = ("id", "title", "tags")
+    rows = [(1, "Entry 1", ("a", "b")), (2, "Entry, 2", ())]
+
+    def test_csv_to_stdout(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.ENTRY_ROW_FIELDS", self.fields)
+        iter_entry_rows = mocker.patch(
+            "jikan.core.entry.iter_entry_rows",
+            return_value=[(1, "Entry 1", "a;b"), (2, "Entry, 2", None)],
+        )
+        result = runner.invoke(app, ["export", "--since", "2024/01/01", "--tag", "1"])
+
+        assert result.exit_code == 0
+        assert result.output == 'id,title,tags\n1,Entry 1,a;b\n2,"Entry, 2",\n'
+        assert iter_entry_rows.call_args.args == (datetime(2024, 1, 1, tzinfo=UTC), None, [], [1])
+        assert iter_entry_rows.call_args.kwargs["tag_separator"] == ";"
+
+    def test_jsonl_gzip_to_file(self, mocker: MockFixture, tmp_path: Path):
+        mocker.patch("jikan.core.entry.ENTRY_ROW_FIELDS", self.fields)
+        mocker.patch("jikan.core.entry.iter_entry_rows", return_value=self.rows)
+        output = tmp_path / "entries.jsonl.gz"
+        result = runner.invoke(app, ["export", "-f", "jsonl", "--gzip", "-o", str(output)])
+
+        assert result.exit_code == 0
+        assert "Exported 2 entries" in result.output
+        lines = gzip.decompress(output.read_bytes()).decode().splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {"id": 1, "title": "Entry 1", "tags": ["a", "b"]},
+            {"id": 2, "title": "Entry, 2", "tags": []},
+        ]
+
+    def test_invalid_format(self):
+        result = runner.invoke(app, ["export", "-f", "xml"])
+
+        assert result.exit_code == 2
+
+    def test_core_func_raise_exception(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.iter_entry_rows", side_effect=Exception())
+        result = runner.invoke(app, ["export"])
+
+        assert result.exit_code == 1
+        assert "Failed to export" in result.output
+
+
+class TestReport:
+    rows = [ReportRow("1", "alpha", 5400, 2), ReportRow(None, "(no project)", 600, 1)]
+
+    def test_success(self, mocker: MockFixture):
+        report = mocker.patch("jikan.core.report.report", return_value=self.rows)
+        result = runner.invoke(app, ["report", "--since", "2024/01/01", "--project", "1"])
+
+        assert result.exit_code == 0
+        assert "alpha" in result.output
+        assert "01h 30m 00s" in result.output
+        assert "Total" in result.output
+        assert "01h 40m 00s" in result.output
+        assert report.call_args.args == (
+            ReportGroup.project,
+            datetime(2024, 1, 1, tzinfo=UTC),
+            None,
+            [1],
+            [],
+        )
+
+    def test_by_tag_has_no_total(self, mocker: MockFixture):
+        mocker.patch("jikan.core.report.report", return_value=self.rows)
+        result = runner.invoke(app, ["report", "--by", "tag"])
+
+        assert result.exit_code == 0
+        assert "Tag" in result.output
+        assert "Total" not in result.output
+
+    def test_invalid_group(self):
+        result = runner.invoke(app, ["report", "--by", "year"])
+
+        assert result.exit_code == 2
+
+    def test_core_func_raise_exception(self, mocker: MockFixture):
+        mocker.patch("jikan.core.report.report", side_effect=Exception())
+        result = runner.invoke(app, ["report"])
+
+        assert result.exit_code == 1
+        assert "Failed to build report" in result.output
+
+    def test_snapshot(self, mocker: MockFixture):
+        load = mocker.patch("jikan.core.analytics.load_snapshot")
+        report = mocker.patch("jikan.core.analytics.report", return_value=self.rows)
+        sql_report = mocker.patch("jikan.core.report.report")
+        result = runner.invoke(app, ["report", "--snapshot", "--by", "day"])
+
+        assert result.exit_code == 0
+        assert "alpha" in result.output
+        assert report.call_args.args == (load.return_value, ReportGroup.day, None, None, [], [])
+        sql_report.assert_not_called()
+
+    def test_snapshot_without_numpy(self, mocker: MockFixture, monkeypatch: pytest.MonkeyPatch):
+        import jikan.core
+
+        # As if importing numpy failed.
+        mocker.patch.dict("sys.modules", {"jikan.core.analytics": None})
+        monkeypatch.delattr(jikan.core, "analytics", raising=False)
+        result = runner.invoke(app, ["report", "--snapshot"])
+
+        assert result.exit_code == 1
+        assert "pip install 'jikan[analytics]'" in result.output
+
+
+class TestImport:
+    def source(self, tmp_path: Path) -> Path:
+        path = tmp_path / "entries.jsonl"
+        path.write_text(
+            '{"title": "a", "start_at": "2024-01-15T09:00:00", "end_at": "2024-01-15T10:00:00"}\n'
+            '{"title": "b", "start_at": "2024-01-15T09:00:00", "end_at": null}\n'
+        )
+        return path
+
+    def test_import(self, mocker: MockFixture, tmp_path: Path):
+        import_entries = mocker.patch(
+            "jikan.core.importer.import_entries",
+            side_effect=lambda items, **kwargs: ImportSummary(
+                job=ImportJob(digest="", source=""),
+                skipped=0,
+                imported=1,
+                rejected=[item for item in items if isinstance(item, RejectedRow)],
+            ),
+        )
+        result = runner.invoke(
+            app, ["import", str(self.source(tmp_path)), "--timezone", "Asia/Tokyo"]
+        )
+
+        assert result.exit_code == 0
+        assert "Imported 1 entries" in result.output
+        assert "Rejected 1 rows" in result.output
+        assert "row 2: missing end time" in result.output
+        assert import_entries.call_args.kwargs["source"] == "entries.jsonl"
+
+    def test_rejects_file(self, use_test_engine: None, tmp_path: Path):
+        rejects = tmp_path / "rejects.csv"
+        result = runner.invoke(
+            app, ["import", str(self.source(tmp_path)), "--rejects", str(rejects)]
+        )
+
+        assert result.exit_code == 0
+        assert rejects.read_text().startswith("line,reason\n2,missing end time")
+
+    def test_already_imported(self, use_test_engine: None, tmp_path: Path):
+        path = self.source(tmp_path)
+        runner.invoke(app, ["import", str(path)])
+        result = runner.invoke(app, ["import", str(path)])
+
+        assert result.exit_code == 1
+        assert "--restart" in result.output
+
+    def test_unknown_format(self, tmp_path: Path):
+        path = tmp_path / "entries.txt"
+        path.write_text("")
+        result = runner.invoke(app, ["import", str(path)])
+
+        assert result.exit_code == 1
+        assert "pass --format" in result.output
+
+    def test_unknown_time_zone(self, tmp_path: Path):
+        result = runner.invoke(
+            app, ["import", str(self.source(tmp_path)), "--timezone", "Mars/Base"]
+        )
+
+        assert result.exit_code == 1
+        assert "Unknown time zone" in result.output
@@ -0,0 +1,146 @@
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockFixture
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel, select
+
+import jikan.migrations
+import jikan.models
+from jikan.migrations import (
+    LATEST_VERSION,
+    MIGRATIONS,
+    Migration,
+    migrate,
+    pending_migrations,
+    schema_version,
+)
+from jikan.models import (
+    ChangeReader,
+    DailyRollup,
+    Entry,
+    EntryChange,
+    EntryTagLink,
+    Project,
+    Tag,
+    create_sqlite_engine,
+)
+
+
+@pytest.fixture()
+def engine(tmp_path: Path):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def legacy_engine(engine: Engine) -> Engine:
+    """A database as created before schema versioning, with some data."""
+    tables = [model.__table__ for model in (Project, Tag, Entry, EntryTagLink)]
+    SQLModel.metadata.create_all(engine, tables=tables)  # type: ignore[arg-type]
+    with engine.begin() as conn:
+        for name in ("entry_fts_insert", "entry_fts_delete", "entry_fts_update"):
+            conn.execute(text(f"DROP TRIGGER {name}"))
+        conn.execute(text("DROP TABLE entry_fts"))
+        conn.execute(text("DROP INDEX ix_entry_running"))
+        conn.execute(text("DROP INDEX ix_entry_start_at_id"))
+    with Session(engine) as session:
+        session.add(Project(id=1, name="project"))
+        session.add(
+            Entry(
+                id=1,
+                title="Vendor meeting",
+                project_id=1,
+                start_at=datetime(2024, 3, 1, 9, tzinfo=UTC),
+                end_at=datetime(2024, 3, 1, 10, tzinfo=UTC),
+            )
+        )
+        session.commit()
+    return engine
+
+
+def version(engine: Engine) -> int:
+    with engine.connect() as conn:
+        return schema_version(conn)
+
+
+class TestMigrate:
+    def test_new_database(self, engine: Engine):
+        with engine.connect() as conn:
+            applied = migrate(conn)
+
+        assert [m.version for m in applied] == [m.version for m in MIGRATIONS]
+        assert version(engine) == LATEST_VERSION
+        tables = set(inspect(engine).get_table_names())
+        assert {"project", "tag", "entry", "entrytaglink", "daily_rollup", "import_job"} <= tables
+        assert "entry_fts" in tables
+
+    def test_up_to_date(self, engine: Engine):
+        with engine.connect() as conn:
+            migrate(conn)
+            assert pending_migrations(conn) == []
+            assert migrate(conn) == []
+            # Nothing but the raw pragma read, so no transaction was started.
+            assert not conn.in_transaction()
+
+    def test_upgrades_legacy_database(self, legacy_engine: Engine):
+        with legacy_engine.connect() as conn:
+            assert len(pending_migrations(conn)) == len(MIGRATIONS)
+            migrate(conn)
+
+        with Session(legacy_engine) as session:
+            indexes = session.exec(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'entry'")
+            ).all()
+            assert {"ix_entry_running", "ix_entry_start_at_id"} <= {row[0] for row in indexes}
+            seconds = session.exec(select(DailyRollup.seconds)).all()
+            assert [round(s) for s in seconds] == [3600, 3600]
+            matches = session.exec(
+                text("SELECT rowid FROM entry_fts WHERE entry_fts MATCH 'vendor'")
+            ).all()
+            assert [row[0] for row in matches] == [1]
+
+    def test_change_log_records_every_update(self, legacy_engine: Engine):
+        with legacy_engine.connect() as conn:
+            migrate(conn)
+        with Session(legacy_engine) as session:
+            session.add(ChangeReader(name="test"))
+            session.commit()
+            session.exec(text("UPDATE entry SET title = 'Retitled' WHERE id = 1"))
+            session.commit()
+            assert session.exec(select(EntryChange.entry_id)).all() == [1]
+
+    def test_failed_migration_is_rolled_back(self, mocker: MockFixture, engine: Engine):
+        def fail(conn) -> None:
+            conn.execute(text("CREATE TABLE half_done (id INTEGER)"))
+            raise RuntimeError("boom")
+
+        migrations = (*MIGRATIONS, Migration(LATEST_VERSION + 1, "Fail", fail))
+        mocker.patch.object(jikan.migrations, "MIGRATIONS", migrations)
+
+        with engine.connect() as conn, pytest.raises(RuntimeError):
+            migrate(conn)
+
+        assert version(engine) == LATEST_VERSION
+        assert not inspect(engine).has_table("half_done")
+
+    def test_restores_begin_mode(self, engine: Engine):
+        with engine.connect() as conn:
+            migrate(conn)
+            assert conn.get_execution_options()["sqlite_begin"] == "DEFERRED"
+
+
+class TestApplicationEngine:
+    def test_migrates_on_first_connection(self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+        monkeypatch.setenv("JIKAN_DATA_DIR", str(tmp_path / "app"))
+        monkeypatch.setattr(jikan.models, "_engine_options", {})
+        jikan.models.get_engine.cache_clear()
+        try:
+            engine = jikan.models.get_engine()
+            assert version(engine) == LATEST_VERSION
+            engine.dispose()
+        finally:
+            jikan.models.get_engine.cache_clear()
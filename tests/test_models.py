@@ -0,0 +1,149 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockFixture
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+import jikan.models
+from jikan.models import (
+    Entry,
+    Project,
+    configure_engine,
+    create_db_and_tables,
+    create_sqlite_engine,
+    get_engine,
+)
+
+
+class TestCreateSqliteEngine:
+    def test_pragmas_are_applied(self, tmp_path: Path):
+        engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'test.db'}")
+
+        with engine.connect() as conn:
+
+            def pragma(name: str):
+                return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+            assert pragma("journal_mode") == "wal"
+            assert pragma("busy_timeout") == 5000
+            assert pragma("synchronous") == 1  # NORMAL
+            assert pragma("cache_size") == -64000
+            assert pragma("temp_store") == 2  # MEMORY
+        engine.dispose()
+
+
+class TestGetEngine:
+    @pytest.fixture(autouse=True)
+    def clear_engine_cache(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(jikan.models, "_engine_options", {})
+        get_engine.cache_clear()
+        yield
+        get_engine.cache_clear()
+
+    def test_uses_data_dir_from_env(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        data_dir = tmp_path / "data"
+        monkeypatch.setenv("JIKAN_DATA_DIR", str(data_dir))
+
+        engine = get_engine()
+
+        assert data_dir.is_dir()
+        assert engine.url.database == str(data_dir / "database.db")
+        engine.dispose()
+
+    def test_importing_core_does_not_create_engine(self, tmp_path: Path):
+        data_dir = tmp_path / "data"
+        code = (
+            "import jikan.core.entry, jikan.core.analytics, jikan.core.aio.entry, jikan.models; "
+            "print(jikan.models.get_engine.cache_info().currsize)"
+        )
+        env = {**os.environ, "JIKAN_DATA_DIR": str(data_dir)}
+
+        result = subprocess.run(
+            [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+        )
+
+        assert result.stdout.strip() == "0"
+        assert not data_dir.exists()
+
+    def test_configure_engine_sets_pool_size(self):
+        configure_engine(pool_size=3, max_overflow=0)
+
+        engine = get_engine()
+
+        assert engine.pool.size() == 3  # type: ignore[attr-defined]
+        engine.dispose()
+
+    def test_configure_engine_after_first_use_fails(self):
+        get_engine().dispose()
+
+        with pytest.raises(RuntimeError):
+            configure_engine(pool_size=3)
+
+
+class TestEntryFts:
+    def match(self, engine: Engine, query: str) -> list[int]:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text("SELECT rowid FROM entry_fts WHERE entry_fts MATCH :q ORDER BY rank"),
+                {"q": query},
+            )
+            return [row[0] for row in rows]
+
+    def test_triggers_keep_index_in_sync(self, test_engine: Engine):
+        with Session(test_engine) as session:
+            session.add(Entry(id=1, title="Vendor meeting", description="Contract"))
+            session.commit()
+            assert self.match(test_engine, "vendor") == [1]
+
+            entry = session.get_one(Entry, 1)
+            entry.title = "Lunch"
+            session.commit()
+            assert self.match(test_engine, "vendor") == []
+            assert self.match(test_engine, "lunch") == [1]
+
+            session.delete(entry)
+            session.commit()
+            assert self.match(test_engine, "lunch") == []
+
+    def test_created_and_backfilled_on_upgrade(self, mocker: MockFixture, test_engine: Engine):
+        with Session(test_engine) as session:
+            session.add(Project(name="project"))
+            session.add(Entry(id=1, title="Vendor meeting"))
+            session.commit()
+        with test_engine.begin() as conn:
+            for name in ("entry_fts_insert", "entry_fts_delete", "entry_fts_update"):
+                conn.execute(text(f"DROP TRIGGER {name}"))
+            conn.execute(text("DROP TABLE entry_fts"))
+            conn.execute(text("PRAGMA user_version = 4"))
+        mocker.patch("jikan.models.get_engine", return_value=test_engine)
+
+        create_db_and_tables()
+
+        assert self.match(test_engine, "vendor") == [1]
+
+
+class TestCreateDbAndTables:
+    def test_adds_sample_data_once(
+        self, mocker: MockFixture, use_test_engine: None, test_engine: Engine
+    ):
+        mocker.patch("jikan.models.get_engine", return_value=test_engine)
+
+        create_db_and_tables()
+        create_db_and_tables()
+
+        with Session(test_engine) as session:
+            assert len(session.exec(select(Project)).all()) == 1
+            assert len(session.exec(select(Entry)).all()) == 2
+
+    def test_keeps_existing_data(self, mocker: MockFixture, seed_projects: None, test_engine):
+        mocker.patch("jikan.models.get_engine", return_value=test_engine)
+
+        create_db_and_tables()
+
+        with Session(test_engine) as session:
+            assert len(session.exec(select(Entry)).all()) == 0
@@ -12,7 +12,7 @@ runner = CliRunner()
 class TestProjectList:
     def test_project_list(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.list_project",
+            "jikan.core.project.list_project",
             return_value=[Project(name="Mock Project", description="This is a mock test")],
         )
         result = runner.invoke(app, ["project", "list"])
@@ -26,7 +26,7 @@ class TestProjectList:
 
     def test_with_no_project(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.list_project",
+            "jikan.core.project.list_project",
             return_value=[],
         )
         result = runner.invoke(app, ["project", "list"])
@@ -36,6 +36,14 @@ class TestProjectList:
         assert "Name" in result.output
         assert "Description" in result.output
 
+    def test_plain(self, use_test_engine: None):
+        runner.invoke(app, ["project", "add", "--name", "Project", "--description", "Two\nlines"])
+
+        result = runner.invoke(app, ["--output-format", "plain", "project", "list"])
+
+        assert result.exit_code == 0
+        assert result.output == "1\tProject\tTwo lines\n"
+
 
 class TestProjectAdd:
     @staticmethod
@@ -44,7 +52,7 @@ class TestProjectAdd:
 
     def test_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.add_project",
+            "jikan.core.project.add_project",
             side_effect=self.mock_project_add,
         )
 
@@ -66,7 +74,7 @@ class TestProjectAdd:
 
     def test_short_options(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.add_project",
+            "jikan.core.project.add_project",
             side_effect=self.mock_project_add,
         )
 
@@ -88,7 +96,7 @@ class TestProjectAdd:
 
     def test_short_options_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.add_project",
+            "jikan.core.project.add_project",
             side_effect=self.mock_project_add,
         )
         result = runner.invoke(
@@ -102,7 +110,7 @@ class TestProjectAdd:
 
     def test_no_description_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.add_project",
+            "jikan.core.project.add_project",
             side_effect=self.mock_project_add,
         )
         result = runner.invoke(app, ["project", "add", "--name", '"New Mock Project"'])
@@ -118,9 +126,9 @@ class TestProjectAdd:
 class TestProjectDelete:
     def test_success(self, mocker: MockFixture):
         project = Project(id=1, name="Test", description="This is a test project")
-        mocker.patch("jikan.commands.project.get_project", return_value=project)
+        mocker.patch("jikan.core.project.get_project", return_value=project)
         mocker.patch("jikan.commands.project.typer.confirm", return_value=True)
-        mocker.patch("jikan.commands.project.delete_project", return_value=None)
+        mocker.patch("jikan.core.project.delete_project", return_value=None)
         result = runner.invoke(app, ["project", "delete", "1"])
         assert result.exit_code == 0
         assert str(project) in result.output
@@ -132,7 +140,7 @@ class TestProjectDelete:
 
     def test_project_not_found_validation(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.get_project",
+            "jikan.core.project.get_project",
             side_effect=ProjectNotFoundError(),
         )
         result = runner.invoke(app, ["project", "delete", "1"])
@@ -141,7 +149,7 @@ class TestProjectDelete:
 
     def test_confirm_cancel_validation(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.get_project",
+            "jikan.core.project.get_project",
             return_value=Project(id=1, name="Test", description="This is a test project"),
         )
         mocker.patch("jikan.commands.project.typer.confirm", side_effect=Abort)
@@ -153,11 +161,7 @@ class TestProjectDelete:
 class TestProjectEdit:
     def test_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.get_project",
-            return_value=Project(name="Test", description="This is a test project"),
-        )
-        mocker.patch(
-            "jikan.commands.project.edit_project",
+            "jikan.core.project.edit_project",
             return_value=Project(name="Test", description="This is a test project"),
         )
         result = runner.invoke(
@@ -178,11 +182,7 @@ class TestProjectEdit:
 
     def test_only_name_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.get_project",
-            return_value=Project(name="Test", description="This is a test project"),
-        )
-        mocker.patch(
-            "jikan.commands.project.edit_project",
+            "jikan.core.project.edit_project",
             return_value=Project(name="Test", description="This is a test project"),
         )
         result = runner.invoke(app, ["project", "edit", "1", "--name", "Test"])
@@ -195,7 +195,7 @@ class TestProjectEdit:
 
     def test_project_not_found_validation(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.get_project",
+            "jikan.core.project.edit_project",
             side_effect=ProjectNotFoundError(),
         )
         result = runner.invoke(app, ["project", "edit", "1", "--name", "Test"])
@@ -211,12 +211,8 @@ class TestProjectEdit:
 class TestProjectArchive:
     def test_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.get_project",
-            return_value=Project(name="Test", description="This is a test project"),
-        )
-        mocker.patch(
-            "jikan.commands.project.set_project_archived",
-            return_value=None,
+            "jikan.core.project.set_project_archived",
+            return_value=Project(id=1, name="Test", description="This is a test project"),
         )
         result = runner.invoke(app, ["project", "archive", "1"])
 
@@ -224,12 +220,10 @@ class TestProjectArchive:
 
     def test_already_archived_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.get_project",
-            return_value=Project(name="Test", description="This is a test project", archived=True),
-        )
-        mocker.patch(
-            "jikan.commands.project.set_project_archived",
-            return_value=None,
+            "jikan.core.project.set_project_archived",
+            return_value=Project(
+                id=1, name="Test", description="This is a test project", archived=True
+            ),
         )
         result = runner.invoke(app, ["project", "archive", "1"])
 
@@ -244,12 +238,8 @@ class TestProjectArchive:
 class TestProjectUnarchive:
     def test_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.get_project",
-            return_value=Project(name="Test", description="This is a test project"),
-        )
-        mocker.patch(
-            "jikan.commands.project.set_project_archived",
-            return_value=None,
+            "jikan.core.project.set_project_archived",
+            return_value=Project(id=1, name="Test", description="This is a test project"),
         )
         result = runner.invoke(app, ["project", "unarchive", "1"])
 
@@ -257,12 +247,8 @@ class TestProjectUnarchive:
 
     def test_already_archived_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.project.get_project",
-            return_value=Project(name="Test", description="This is a test project", archived=False),
-        )
-        mocker.patch(
-            "jikan.commands.project.set_project_archived",
-            return_value=None,
+            "jikan.core.project.set_project_archived",
+            return_value=Project(id=1, name="Test", description="This is a test project"),
         )
         result = runner.invoke(app, ["project", "unarchive", "1"])
 
@@ -0,0 +1,254 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from sqlmodel import Session, select
+
+import jikan.models
+from jikan.models import Entry, EntryTagLink, Tag
+from jikan.server import ApiServer
+
+
+class Client:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def request(
+        self, method: str, target: str, body: Any = None, headers: dict[str, str] | None = None
+    ) -> tuple[int, dict[str, str], Any]:
+        data = b"" if body is None else json.dumps(body).encode()
+        lines = [f"{method} {target} HTTP/1.1", "Host: localhost", f"Content-Length: {len(data)}"]
+        if method == "POST" and "Content-Type" not in (headers or {}):
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        return await self.send(("\r\n".join(lines) + "\r\n\r\n").encode() + data)
+
+    async def send(self, data: bytes) -> tuple[int, dict[str, str], Any]:
+        self.writer.write(data)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        response_headers = {}
+        while line := (await self.reader.readline()).decode().strip():
+            name, _, value = line.partition(":")
+            response_headers[name.lower()] = value.strip()
+        length = int(response_headers["content-length"])
+        payload = await self.reader.readexactly(length) if length else b""
+        return status, response_headers, json.loads(payload) if payload else None
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestEntries:
+    def test_start_and_stop(self, tmp_path: Path, use_test_engine: None):
+        async def scenario(client: Client):
+            status, _, body = await client.request("POST", "/entries/start", {"title": "api"})
+            assert status == 201
+            assert body["entry"]["title"] == "api"
+            assert body["entry"]["end_at"] is None
+
+            status, _, body = await client.request("POST", "/entries/start", {"title": "again"})
+            assert status == 409
+
+            status, _, body = await client.request("GET", "/entries/running")
+            assert body["entry"]["title"] == "api"
+
+            status, _, body = await client.request("POST", "/entries/stop")
+            assert status == 200
+            assert body["entry"]["end_at"] is not None
+
+            status, _, _ = await client.request("POST", "/entries/stop")
+            assert status == 409
+
+        run(_with_client(tmp_path, scenario))
+
+        with Session(jikan.models.engine) as session:
+            assert session.exec(select(Entry.title)).all() == ["api"]
+
+    def test_switch_unknown_tag(self, tmp_path: Path, use_test_engine: None):
+        async def scenario(client: Client):
+            status, _, body = await client.request("POST", "/entries/switch", {"tags": [9]})
+            assert status == 404
+            assert body == {"error": "Tag not found"}
+
+        run(_with_client(tmp_path, scenario))
+
+    def test_start_with_tags(self, tmp_path: Path, use_test_engine: None):
+        with Session(jikan.models.engine) as session:
+            session.add(Tag(id=1, name="focus"))
+            session.commit()
+
+        async def scenario(client: Client):
+            status, _, _ = await client.request("POST", "/entries/start", {"tags": [9]})
+            assert status == 404
+            status, _, _ = await client.request("POST", "/entries/start", {"tags": [1]})
+            assert status == 201
+
+        run(_with_client(tmp_path, scenario))
+
+        with Session(jikan.models.engine) as session:
+            assert session.exec(select(EntryTagLink.tag_id)).all() == [1]
+
+    def test_list_pages_with_cursor(self, tmp_path: Path, seed_entries: None):
+        async def scenario(client: Client):
+            _, _, first = await client.request("GET", "/entries?limit=1")
+            assert [e["id"] for e in first["entries"]] == [1]
+            assert first["next"] is not None
+
+            _, _, second = await client.request("GET", f"/entries?limit=1&after={first['next']}")
+            assert [e["id"] for e in second["entries"]] == [2]
+
+        run(_with_client(tmp_path, scenario))
+
+    def test_bad_parameter(self, tmp_path: Path, use_test_engine: None):
+        async def scenario(client: Client):
+            status, _, body = await client.request("GET", "/entries?since=yesterday")
+            assert status == 400
+            assert "since" in body["error"]
+
+        run(_with_client(tmp_path, scenario))
+
+
+class TestRouting:
+    def test_not_found_and_wrong_method(self, tmp_path: Path, use_test_engine: None):
+        async def scenario(client: Client):
+            assert (await client.request("GET", "/nope"))[0] == 404
+            assert (await client.request("GET", "/entries/start"))[0] == 405
+
+        run(_with_client(tmp_path, scenario))
+
+
+class TestPostChecks:
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {"project_id": "1"},
+            {"project_id": True},
+            {"tags": 1},
+            {"tags": ["1"]},
+            {"title": 1},
+        ],
+    )
+    @pytest.mark.parametrize("path", ["/entries/start", "/entries/switch"])
+    def test_bad_field(self, tmp_path: Path, use_test_engine: None, path: str, body: dict):
+        async def scenario(client: Client):
+            status, _, _ = await client.request("POST", path, body)
+            assert status == 400
+
+        run(_with_client(tmp_path, scenario))
+
+    @pytest.mark.parametrize("content_type", ["text/plain", "application/x-www-form-urlencoded"])
+    def test_requires_json(self, tmp_path: Path, use_test_engine: None, content_type: str):
+        async def scenario(client: Client):
+            headers = {"Content-Type": content_type}
+            status, _, _ = await client.request("POST", "/entries/start", {}, headers)
+            assert status == 415
+
+        run(_with_client(tmp_path, scenario))
+
+    def test_origin(self, tmp_path: Path, use_test_engine: None):
+        async def scenario(client: Client):
+            headers = {"Origin": "https://example.com"}
+            status, _, _ = await client.request("POST", "/entries/start", {}, headers)
+            assert status == 403
+
+            headers = {"Origin": "http://localhost"}
+            status, _, _ = await client.request("POST", "/entries/start", {}, headers)
+            assert status == 201
+
+        run(_with_client(tmp_path, scenario))
+
+        with Session(jikan.models.engine) as session:
+            assert len(session.exec(select(Entry)).all()) == 1
+
+
+class TestMalformed:
+    @pytest.mark.parametrize(
+        ("content_length", "status"), [("abc", 400), ("-1", 400), ("+1", 400), ("65537", 413)]
+    )
+    def test_content_length(
+        self, tmp_path: Path, use_test_engine: None, content_length: str, status: int
+    ):
+        async def scenario(client: Client):
+            request = f"POST /entries/start HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n"
+            assert (await client.send(request.encode()))[0] == status
+            # The connection is closed after the error.
+            assert await asyncio.wait_for(client.reader.read(), 5) == b""
+
+        run(_with_client(tmp_path, scenario))
+
+    @pytest.mark.parametrize(
+        ("request_head", "status"),
+        [
+            (b"GET /" + b"x" * 100_000 + b" HTTP/1.1\r\n\r\n", 400),
+            (b"GET / HTTP/1.1\r\nX-Long: " + b"x" * 100_000 + b"\r\n\r\n", 431),
+        ],
+    )
+    def test_line_too_long(
+        self, tmp_path: Path, use_test_engine: None, request_head: bytes, status: int
+    ):
+        async def scenario(client: Client):
+            assert (await client.send(request_head))[0] == status
+            assert await asyncio.wait_for(client.reader.read(), 5) == b""
+
+        run(_with_client(tmp_path, scenario))
+
+
+class TestETag:
+    def test_not_modified_until_a_write(self, tmp_path: Path, seed_entries: None):
+        async def scenario(client: Client):
+            status, headers, _ = await client.request("GET", "/entries")
+            assert status == 200
+            etag = headers["etag"]
+
+            status, _, body = await client.request(
+                "GET", "/entries", headers={"If-None-Match": etag}
+            )
+            assert status == 304
+            assert body is None
+
+            await client.request("POST", "/entries/stop")
+
+            status, headers, _ = await client.request(
+                "GET", "/entries", headers={"If-None-Match": etag}
+            )
+            assert status == 200
+            assert headers["etag"] != etag
+
+        run(_with_client(tmp_path, scenario))
+
+    def test_report_with_running_entry_is_not_cached_across_seconds(
+        self, tmp_path: Path, seed_entries: None, mocker
+    ):
+        clock = mocker.patch("jikan.server.time.time", return_value=1000.0)
+
+        async def scenario(client: Client):
+            _, headers, _ = await client.request("GET", "/report")
+            etag = headers["etag"]
+            status, _, _ = await client.request("GET", "/report", headers={"If-None-Match": etag})
+            assert status == 304
+
+            clock.return_value = 1001.0
+            status, _, _ = await client.request("GET", "/report", headers={"If-None-Match": etag})
+            assert status == 200
+
+        run(_with_client(tmp_path, scenario))
+
+
+async def _with_client(tmp_path: Path, scenario) -> None:
+    api = ApiServer(tmp_path / "test.db", workers=2)
+    server = await asyncio.start_server(api.handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        await scenario(Client(reader, writer))
+    finally:
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        api.close()
@@ -2,6 +2,7 @@ from pytest_mock import MockFixture
 from typer import Abort
 from typer.testing import CliRunner
 
+from jikan.core.entry import EntryNotFoundError
 from jikan.core.tag import TagNotFoundError
 from jikan.main import app
 from jikan.models import Tag
@@ -11,7 +12,7 @@ runner = CliRunner()
 
 class TestTagList:
     def test_success(self, mocker: MockFixture):
-        mocker.patch("jikan.commands.tag.list_tag", return_value=[Tag(name="Mock Tag")])
+        mocker.patch("jikan.core.tag.list_tag", return_value=[Tag(name="Mock Tag")])
         result = runner.invoke(app, ["tag", "list"])
 
         assert result.exit_code == 0
@@ -20,7 +21,7 @@ class TestTagList:
 
     def test_without_tag(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.tag.list_tag",
+            "jikan.core.tag.list_tag",
             return_value=[],
         )
         result = runner.invoke(app, ["tag", "list"])
@@ -29,6 +30,12 @@ class TestTagList:
         assert "ID" in result.output
         assert "Name" in result.output
 
+    def test_tsv(self, seed_tags: None):
+        result = runner.invoke(app, ["--output-format", "tsv", "tag", "list"])
+
+        assert result.exit_code == 0
+        assert result.output == "id\tname\n1\ttag-1\n2\ttag-2\n"
+
 
 class TestTagAdd:
     @staticmethod
@@ -36,7 +43,7 @@ class TestTagAdd:
         return Tag(name=name)
 
     def test_success(self, mocker: MockFixture):
-        mocker.patch("jikan.commands.tag.add_tag", side_effect=self.mock_tag_add)
+        mocker.patch("jikan.core.tag.add_tag", side_effect=self.mock_tag_add)
         result = runner.invoke(app, ["tag", "add", "--name", "Test"])
 
         assert result.exit_code == 0
@@ -44,7 +51,7 @@ class TestTagAdd:
         assert "Tag created. name: Test" in result.output
 
     def test_short_options(self, mocker: MockFixture):
-        mocker.patch("jikan.commands.tag.add_tag", side_effect=self.mock_tag_add)
+        mocker.patch("jikan.core.tag.add_tag", side_effect=self.mock_tag_add)
         result = runner.invoke(app, ["tag", "add", "-n", "Test"])
 
         assert result.exit_code == 0
@@ -65,11 +72,7 @@ class TestTagAdd:
 class TestTagEdit:
     def test_success(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.tag.get_tag",
-            return_value=Tag(name="Test"),
-        )
-        mocker.patch(
-            "jikan.commands.tag.edit_tag",
+            "jikan.core.tag.edit_tag",
             return_value=Tag(name="Edited"),
         )
         result = runner.invoke(app, ["tag", "edit", "1", "--name", "Edited"])
@@ -79,11 +82,7 @@ class TestTagEdit:
 
     def test_short_option(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.tag.get_tag",
-            return_value=Tag(name="Test"),
-        )
-        mocker.patch(
-            "jikan.commands.tag.edit_tag",
+            "jikan.core.tag.edit_tag",
             return_value=Tag(name="Edited"),
         )
         result = runner.invoke(app, ["tag", "edit", "1", "-n", "Edited"])
@@ -101,7 +100,7 @@ class TestTagEdit:
 
     def test_tag_not_found(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.tag.get_tag",
+            "jikan.core.tag.edit_tag",
             side_effect=TagNotFoundError(),
         )
         result = runner.invoke(app, ["tag", "edit", "1", "--name", "Edited"])
@@ -113,11 +112,11 @@ class TestTagDelete:
     def test_success(self, mocker: MockFixture):
         tag = Tag(name="Test")
         mocker.patch(
-            "jikan.commands.tag.get_tag",
+            "jikan.core.tag.get_tag",
             return_value=tag,
         )
         mocker.patch("jikan.commands.tag.typer.confirm", return_value=True)
-        mocker.patch("jikan.commands.tag.delete_tag", return_value=None)
+        mocker.patch("jikan.core.tag.delete_tag", return_value=None)
         result = runner.invoke(app, ["tag", "delete", "1"])
 
         assert result.exit_code == 0
@@ -131,7 +130,7 @@ class TestTagDelete:
 
     def test_tag_not_found(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.tag.get_tag",
+            "jikan.core.tag.get_tag",
             side_effect=TagNotFoundError(),
         )
         result = runner.invoke(app, ["tag", "delete", "1"])
@@ -141,10 +140,56 @@ class TestTagDelete:
 
     def test_confirm_cancel(self, mocker: MockFixture):
         mocker.patch(
-            "jikan.commands.tag.get_tag",
+            "jikan.core.tag.get_tag",
             return_value=Tag(name="Test"),
         )
         mocker.patch("jikan.commands.tag.typer.confirm", side_effect=Abort)
         result = runner.invoke(app, ["tag", "delete", "1"])
 
         assert result.exit_code == 1
+
+
+class TestTagAttach:
+    def test_success(self, mocker: MockFixture):
+        attach_tags = mocker.patch("jikan.core.entry.attach_tags", return_value=3)
+        result = runner.invoke(app, ["tag", "attach", "1", "2", "--tag", "1", "-t", "2"])
+
+        assert result.exit_code == 0
+        assert "Attached 3 tags" in result.output
+        attach_tags.assert_called_once_with([1, 2], [1, 2])
+
+    def test_tag_should_be_given(self):
+        result = runner.invoke(app, ["tag", "attach", "1"])
+
+        assert result.exit_code == 2
+
+    def test_entry_not_found(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.attach_tags", side_effect=EntryNotFoundError("9"))
+        result = runner.invoke(app, ["tag", "attach", "9", "--tag", "1"])
+
+        assert result.exit_code == 1
+        assert "Entry not found: 9" in result.output
+
+    def test_tag_not_found(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.attach_tags", side_effect=TagNotFoundError("9"))
+        result = runner.invoke(app, ["tag", "attach", "1", "--tag", "9"])
+
+        assert result.exit_code == 1
+        assert "Tag not found: 9" in result.output
+
+
+class TestTagDetach:
+    def test_success(self, mocker: MockFixture):
+        detach_tags = mocker.patch("jikan.core.entry.detach_tags", return_value=1)
+        result = runner.invoke(app, ["tag", "detach", "1", "--tag", "2"])
+
+        assert result.exit_code == 0
+        assert "Detached 1 tags" in result.output
+        detach_tags.assert_called_once_with([1], [2])
+
+    def test_core_func_raise_exception(self, mocker: MockFixture):
+        mocker.patch("jikan.core.entry.detach_tags", side_effect=Exception("boom"))
+        result = runner.invoke(app, ["tag", "detach", "1", "--tag", "2"])
+
+        assert result.exit_code == 1
+        assert "Failed to detach tags: boom" in result.output